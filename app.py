@@ -1,5 +1,10 @@
 ﻿# app.py
 import streamlit as st
 
+from utils.warmup import start_prewarm
+
+# 在后台预热计算核心，首页立即显示，进入分析页面时无需再等待导入
+start_prewarm()
+
 # 自动重定向到首页
 st.switch_page("pages/2_首页.py")
\ No newline at end of file
@@ -0,0 +1,122 @@
+import io
+
+import numpy as np
+import pandas as pd
+
+# Saaty 1-9 标度
+SAATY_SCALE = np.array([1 / 9, 1 / 8, 1 / 7, 1 / 6, 1 / 5, 1 / 4, 1 / 3, 1 / 2,
+                        1, 2, 3, 4, 5, 6, 7, 8, 9])
+
+DEFAULT_SEED = 20250101
+
+
+def make_indicator_data(n, m, seed=DEFAULT_SEED):
+    """生成 n 个方案 × m 个指标的原始数据，各指标量纲不同"""
+    rng = np.random.default_rng(seed)
+    scales = 10.0 ** rng.integers(0, 4, size=m)
+    data = rng.lognormal(mean=0.0, sigma=0.5, size=(n, m)) * scales
+    return pd.DataFrame(data, columns=[f"指标{j + 1}" for j in range(m)])
+
+
+def make_indicator_settings(m, seed=DEFAULT_SEED):
+    """生成指标类型和适度区间（约60%极大型、30%极小型、10%适度型）"""
+    rng = np.random.default_rng(seed + 1)
+    types = rng.choice(["max", "min", "range"], size=m, p=[0.6, 0.3, 0.1]).tolist()
+    ranges = [(0.8, 1.2) if t == "range" else (None, None) for t in types]
+    return types, ranges
+
+
+def make_ahp_matrices(k, n, seed=DEFAULT_SEED):
+    """生成 k 个 n×n 互反判断矩阵（由随机权重比值加扰动后取最近的Saaty标度）"""
+    rng = np.random.default_rng(seed + 2)
+    w = rng.dirichlet(np.ones(n), size=k)
+    ratios = w[:, :, np.newaxis] / w[:, np.newaxis, :]
+    ratios *= rng.lognormal(0.0, 0.3, size=ratios.shape)
+
+    log_scale = np.log(SAATY_SCALE)
+    nearest = np.abs(np.log(ratios)[..., np.newaxis] - log_scale).argmin(axis=-1)
+    A = SAATY_SCALE[nearest]
+
+    # 用上三角重建下三角，保证严格互反
+    upper = np.triu(np.ones((n, n), dtype=bool), k=1)
+    A = np.where(upper, A, 1 / np.swapaxes(A, -1, -2))
+    A[:, np.arange(n), np.arange(n)] = 1.0
+    return A
+
+
+def make_fuzzy_matrices(k, n, seed=DEFAULT_SEED):
+    """生成 k 个 n×n×3 三角模糊判断矩阵（以判断矩阵为中值，上下各放宽1~2倍）"""
+    rng = np.random.default_rng(seed + 5)
+    A = make_ahp_matrices(k, n, seed)
+    spread = rng.uniform(1.0, 2.0, size=A.shape)
+    upper = np.triu(np.ones((n, n), dtype=bool), k=1)
+    spread = np.where(upper, spread, np.swapaxes(spread, -1, -2))
+    spread[:, np.arange(n), np.arange(n)] = 1.0
+    return np.stack([A / spread, A, A * spread], axis=-1)
+
+
+def make_fuzzy_workbook(k, n, seed=DEFAULT_SEED):
+    """AHP页面模糊判断模式的上传文件：长格式，每行一条上三角判断"""
+    F = make_fuzzy_matrices(k, n, seed)
+    m, i, j = np.nonzero(np.broadcast_to(np.triu(np.ones((n, n), dtype=bool), k=1), (k, n, n)))
+    df = pd.DataFrame({
+        "专家": [f"专家{x + 1}" for x in m],
+        "因素A": [f"因素{x + 1}" for x in i],
+        "因素B": [f"因素{x + 1}" for x in j],
+        "l": F[m, i, j, 0],
+        "m": F[m, i, j, 1],
+        "u": F[m, i, j, 2],
+    })
+    return make_workbook(df)
+
+
+def make_weight_matrix(s, m, seed=DEFAULT_SEED):
+    """生成 s 个情景 × m 个指标的权重矩阵"""
+    rng = np.random.default_rng(seed + 3)
+    return rng.dirichlet(np.ones(m), size=s)
+
+
+def make_workbook(df, header=True):
+    """将数据写入内存中的xlsx文件，用于读取基准测试"""
+    buffer = io.BytesIO()
+    df.to_excel(buffer, index=False, header=header, engine="openpyxl")
+    return buffer.getvalue()
+
+
+def make_ahp_workbook(n, seed=DEFAULT_SEED):
+    """AHP页面的上传文件：无表头的 n×n 判断矩阵"""
+    return make_workbook(pd.DataFrame(make_ahp_matrices(1, n, seed)[0]), header=False)
+
+
+def make_weight_workbook(m, k=3, seed=DEFAULT_SEED):
+    """组合权重页面的上传文件：指标列和 k 列不同方法的权重"""
+    W = make_weight_matrix(k, m, seed)
+    df = pd.DataFrame({"指标": [f"指标{j + 1}" for j in range(m)]})
+    for i in range(k):
+        df[f"方法{i + 1}权重"] = W[i]
+    return make_workbook(df)
+
+
+def make_score_workbook(n, m, seed=DEFAULT_SEED):
+    """综合得分页面的上传文件：组合权重、序号、指标名称，其后各列为各方案的标准化数据"""
+    rng = np.random.default_rng(seed + 4)
+    df = pd.DataFrame({
+        "组合权重": make_weight_matrix(1, m, seed)[0],
+        "序号": np.arange(1, m + 1),
+        "指标名称": [f"指标{j + 1}" for j in range(m)],
+    })
+    data = pd.DataFrame(rng.random((m, n)), columns=[f"方案{i + 1}" for i in range(n)])
+    return make_workbook(pd.concat([df, data], axis=1))
+
+
+def make_export_tables(n, m, seed=DEFAULT_SEED):
+    """结果导出的数据表：方案按行排列的数值矩阵，以及含文本列的结果表"""
+    df = make_indicator_data(n, m, seed)
+    df.insert(0, "方案", [f"方案{i + 1}" for i in range(n)])
+    scores = np.random.default_rng(seed + 5).random(n)
+    result = pd.DataFrame({
+        "方案": df["方案"],
+        "综合得分": scores,
+        "排名": scores.argsort()[::-1].argsort() + 1,
+    })
+    return {"标准化矩阵": df, "综合评价结果": result}
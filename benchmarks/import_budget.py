@@ -0,0 +1,136 @@
+"""导入耗时预算检查
+
+在项目根目录运行：
+
+    python -m benchmarks.import_budget
+    python -m benchmarks.import_budget --repeat 7 --detail utils.mcdm_engine
+
+每个模块（以及各分析页面顶部的全部导入语句）在新的Python进程中单独导入，
+取多次运行的中位数与预算比较；同时检查惰性模块没有间接导入重型依赖。
+超出预算时返回非零退出码。预算按开发机测得的耗时留出约一倍余量，
+在较慢的机器上可用 --scale 整体放宽。
+"""
+import argparse
+import ast
+import json
+import statistics
+import subprocess
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+
+HEAVY_MODULES = ("numpy", "pandas", "streamlit", "pyarrow", "openpyxl", "plotly")
+
+# 导入耗时预算（秒）
+IMPORT_BUDGET_S = {
+    "utils": 0.01,
+    "utils.warmup": 0.03,
+    "utils.chunking": 0.03,
+    "utils.ahp_calculator": 0.2,
+    "utils.combination_calculator": 0.2,
+    "utils.ewm_calculator": 0.2,
+    "utils.fuzzy_ahp": 0.2,
+    "utils.score_calculator": 0.8,
+    "utils.strategy": 0.8,
+    "utils.validation": 0.8,
+    "utils.file_handlers": 0.8,
+    "utils.mcdm_engine": 0.8,
+    "utils.instrumentation": 1.2,
+    "utils.artifacts": 1.2,
+    "utils.display": 1.5,
+    "utils.run_store": 1.8,
+}
+
+# 各页面顶部导入语句的总耗时预算（秒），即首次打开页面时的导入开销
+PAGE_BUDGET_S = {
+    "pages/3_AHP.py": 2.0,
+    "pages/4_熵权法.py": 2.0,
+    "pages/5_组合权重.py": 2.0,
+    "pages/6_综合得分.py": 2.0,
+    "pages/8_AI策略供给.py": 2.0,
+}
+
+# 导入后不得加载任何重型依赖的模块
+LAZY_MODULES = ("utils", "utils.warmup", "utils.chunking")
+
+_PROBE = """
+import json, sys, time
+start = time.perf_counter()
+{imports}
+elapsed = time.perf_counter() - start
+print(json.dumps({{"elapsed": elapsed, "loaded": [m for m in {heavy!r} if m in sys.modules]}}))
+"""
+
+
+def page_imports(path):
+    """提取页面脚本顶层的导入语句（不执行页面）"""
+    tree = ast.parse((ROOT / path).read_text(encoding="utf-8-sig"))
+    return "\n".join(ast.unparse(node) for node in tree.body if isinstance(node, (ast.Import, ast.ImportFrom)))
+
+
+def probe(imports):
+    """在新进程中执行导入语句，返回 (耗时, 已加载的重型依赖)"""
+    code = _PROBE.format(imports=imports, heavy=HEAVY_MODULES)
+    output = subprocess.run(
+        [sys.executable, "-c", code], cwd=ROOT, capture_output=True, text=True, check=True
+    ).stdout
+    result = json.loads(output.strip().splitlines()[-1])
+    return result["elapsed"], result["loaded"]
+
+
+def measure(imports, repeat):
+    """多次测量取中位数"""
+    samples = [probe(imports) for _ in range(repeat)]
+    return statistics.median(s[0] for s in samples), samples[-1][1]
+
+
+def detail(module):
+    """输出 -X importtime 中累计耗时最多的导入"""
+    stderr = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=ROOT, capture_output=True, text=True, check=True
+    ).stderr
+    # 每行格式为 "import time: 自身耗时(us) | 累计耗时(us) | 模块名"
+    rows = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        rows.append((int(cumulative_us), int(self_us), name.rstrip()))
+    print(f"\n{module} 累计导入耗时最多的模块：")
+    for cumulative_us, self_us, name in sorted(rows, reverse=True)[:20]:
+        print(f"{cumulative_us / 1000:>10.1f} ms {self_us / 1000:>10.1f} ms  {name}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="导入耗时预算检查")
+    parser.add_argument("--repeat", type=int, default=5, help="每个模块的测量次数")
+    parser.add_argument("--scale", type=float, default=1.0, help="预算放宽倍数")
+    parser.add_argument("--detail", nargs="+", default=[], help="输出指定模块的 -X importtime 明细")
+    args = parser.parse_args(argv)
+
+    cases = [(module, f"import {module}", budget) for module, budget in IMPORT_BUDGET_S.items()]
+    cases += [(path, page_imports(path), budget) for path, budget in PAGE_BUDGET_S.items()]
+
+    failed = False
+    print(f"{'模块':<32}{'耗时(ms)':>10}{'预算(ms)':>10}")
+    for name, imports, budget in cases:
+        elapsed, loaded = measure(imports, args.repeat)
+        budget *= args.scale
+        flags = []
+        if elapsed > budget:
+            flags.append("超出预算")
+        if name in LAZY_MODULES and loaded:
+            flags.append(f"加载了 {', '.join(loaded)}")
+        failed |= bool(flags)
+        print(f"{name:<32}{elapsed * 1000:>10.1f}{budget * 1000:>10.1f}  {' '.join(flags)}")
+
+    for module in args.detail:
+        detail(module)
+
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,300 @@
+"""多会话负载测试
+
+基于Streamlit的AppTest在本进程内模拟多个用户会话（无浏览器、无网络），在项目根目录运行：
+
+    python -m benchmarks.load_test --sessions 1 4 16 --rounds 3
+    python -m benchmarks.load_test --sessions 8 --pages 4 6 --alternatives 5000 --output load.json
+
+每个会话依次打开所选页面：上传生成的工作簿、修改指标设置或计算方法、触发计算，
+每次重新运行（rerun）单独计时。对每个会话数报告重新运行延迟的分位数、
+吞吐量（次/秒）和该阶段的进程峰值RSS。运行记录写入临时目录。
+
+AppTest 不能在同一进程中并发运行，各会话交替进行，但每次重新运行串行执行：
+结果反映多个会话的状态同时驻留时的延迟和内存，吞吐量是串行执行的吞吐量，
+不代表真实服务的并发能力（真实并发需用浏览器自动化工具对 streamlit run 启动的服务施压）。
+"""
+import argparse
+import json
+import os
+import platform
+import resource
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime
+from pathlib import Path
+
+import numpy as np
+import streamlit
+
+from benchmarks import generators
+from benchmarks.run_benchmarks import git_commit
+
+PAGES_DIR = Path(__file__).resolve().parent.parent / "pages"
+
+PAGE_FILES = {
+    "3": "3_AHP.py",
+    "4": "4_熵权法.py",
+    "5": "5_组合权重.py",
+    "6": "6_综合得分.py",
+}
+
+XLSX_MIME = "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+
+# 各轮依次使用的导出格式
+EXPORT_FORMATS = ("xlsx", "parquet", "arrow", "csv")
+
+# 单次重新运行的超时时间（秒）
+RUN_TIMEOUT = 300
+
+# AppTest 不支持在同一进程中并发运行：每次运行都会设置并在结束时清空全局的
+# Runtime 实例，页面脚本的编译（ast.parse）也不是线程安全的。所有会话的重新运行
+# 因此按到达顺序串行执行，测得的是各会话状态同时驻留时单次重新运行的延迟和内存，
+# 不反映真实服务中多个脚本线程的并行度
+_RUN_LOCK = threading.Lock()
+
+
+def current_rss():
+    """当前进程的常驻内存（字节），无法读取 /proc 时返回峰值RSS"""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, AttributeError):
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak if sys.platform == "darwin" else peak * 1024
+
+
+class RSSSampler:
+    """后台线程定期采样RSS，记录采样期间的峰值"""
+
+    def __init__(self, interval=0.05):
+        self.interval = interval
+        self.peak = current_rss()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._loop, name="rss-sampler", daemon=True)
+
+    def _loop(self):
+        while not self._stop.wait(self.interval):
+            self.peak = max(self.peak, current_rss())
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        self._thread.join()
+        self.peak = max(self.peak, current_rss())
+        return False
+
+
+class Session:
+    """一个模拟用户会话，记录每次重新运行的耗时"""
+
+    def __init__(self, index, workbooks, args):
+        self.index = index
+        self.workbooks = workbooks
+        self.args = args
+        self.records = []
+        self.errors = []
+
+    def run(self, at, page, step):
+        # 排队等待的时间不计入延迟
+        with _RUN_LOCK:
+            start = time.perf_counter()
+            at.run(timeout=RUN_TIMEOUT)
+            self.records.append((page, step, time.perf_counter() - start))
+        # 未捕获的异常和页面自身显示的错误信息都计为错误
+        messages = [e.message for e in at.exception] + [e.value for e in at.error]
+        self.errors.extend(f"页面{page} {step}: {message}" for message in messages)
+        return at
+
+    def app(self, page):
+        from streamlit.testing.v1 import AppTest
+        return AppTest.from_file(str(PAGES_DIR / PAGE_FILES[page]), default_timeout=RUN_TIMEOUT)
+
+    def upload(self, at, page, key, name):
+        at.file_uploader(key=key).upload(name, self.workbooks[page], XLSX_MIME)
+        return self.run(at, page, "上传")
+
+    def page_3(self, round_index):
+        at = self.run(self.app("3"), "3", "打开")
+        self.upload(at, "3", "ahp_file", "ahp.xlsx")
+        at.radio(key="ahp_method").set_value(["几何平均", "算术平均"][round_index % 2])
+        at.radio(key="ahp_format").set_value(EXPORT_FORMATS[round_index % len(EXPORT_FORMATS)])
+        at.button(key="ahp_compute").click()
+        self.run(at, "3", "计算")
+
+    def export(self, at, page, key, round_index):
+        """计算完成后切换导出格式"""
+        at.radio(key=f"{key}_format").set_value(EXPORT_FORMATS[(round_index + 1) % len(EXPORT_FORMATS)])
+        self.run(at, page, "导出")
+
+    def page_4(self, round_index):
+        at = self.run(self.app("4"), "4", "打开")
+        self.upload(at, "4", "entropy_file", "data.xlsx")
+        # 每轮将不同的指标改为极小型
+        for j in range(self.args.indicators):
+            at.selectbox(key=f"type_{j}").set_value("min" if j % 3 == round_index % 3 else "max")
+        self.run(at, "4", "指标设置")
+        at.button(key="entropy_compute").click()
+        self.run(at, "4", "计算")
+        self.export(at, "4", "entropy", round_index)
+
+    def page_5(self, round_index):
+        at = self.run(self.app("5"), "5", "打开")
+        self.upload(at, "5", "combination_file", "weights.xlsx")
+        methods = at.radio(key="combination_method_choice").options
+        at.radio(key="combination_method_choice").set_value(methods[round_index % len(methods)])
+        self.run(at, "5", "方法设置")
+        at.button(key="combination_compute").click()
+        self.run(at, "5", "计算")
+        self.export(at, "5", "combination", round_index)
+
+    def page_6(self, round_index):
+        at = self.run(self.app("6"), "6", "打开")
+        self.upload(at, "6", "score_file", "scores.xlsx")
+        at.button(key="score_compute").click()
+        self.run(at, "6", "计算")
+        self.export(at, "6", "score", round_index)
+
+    def __call__(self, barrier):
+        barrier.wait()
+        for round_index in range(self.args.rounds):
+            for page in self.args.pages:
+                try:
+                    getattr(self, f"page_{page}")(round_index)
+                except Exception as e:
+                    self.errors.append(f"页面{page}: {type(e).__name__}: {e}")
+
+
+def make_workbooks(args):
+    """生成各页面的上传文件（所有会话共用）"""
+    return {
+        "3": generators.make_ahp_workbook(args.order, args.seed),
+        "4": generators.make_workbook(generators.make_indicator_data(args.alternatives, args.indicators, args.seed)),
+        "5": generators.make_weight_workbook(args.indicators, seed=args.seed),
+        "6": generators.make_score_workbook(args.alternatives, args.indicators, args.seed),
+    }
+
+
+def run_level(n_sessions, workbooks, args):
+    """以 n_sessions 个交替进行的会话运行一轮测试"""
+    sessions = [Session(i, workbooks, args) for i in range(n_sessions)]
+    barrier = threading.Barrier(n_sessions + 1)
+    threads = [threading.Thread(target=s, args=(barrier,), name=f"session-{s.index}") for s in sessions]
+
+    with RSSSampler() as sampler:
+        for thread in threads:
+            thread.start()
+        barrier.wait()
+        start = time.perf_counter()
+        for thread in threads:
+            thread.join()
+        elapsed = time.perf_counter() - start
+
+    records = [r for s in sessions for r in s.records]
+    errors = [e for s in sessions for e in s.errors]
+    latency = np.array([seconds for _, _, seconds in records])
+    result = {
+        "sessions": n_sessions,
+        "reruns": len(records),
+        "errors": len(errors),
+        "elapsed_s": elapsed,
+        "throughput_rps": len(records) / elapsed if elapsed else 0.0,
+        "peak_rss_bytes": sampler.peak,
+        "latency_s": _percentiles(latency),
+        "pages": {},
+    }
+    for page in args.pages:
+        for step in dict.fromkeys(step for p, step, _ in records if p == page):
+            values = np.array([sec for p, st_, sec in records if p == page and st_ == step])
+            result["pages"][f"{page}/{step}"] = _percentiles(values)
+    return result, errors
+
+
+def _percentiles(values):
+    if not len(values):
+        return {}
+    p50, p95, p99 = np.percentile(values, [50, 95, 99])
+    return {"p50": p50, "p95": p95, "p99": p99, "max": float(values.max())}
+
+
+def print_level(result, errors, verbose):
+    latency = result["latency_s"]
+    print(f"{result['sessions']:>6} {result['reruns']:>8} {latency.get('p50', 0) * 1000:>10.1f} "
+          f"{latency.get('p95', 0) * 1000:>10.1f} {latency.get('p99', 0) * 1000:>10.1f} "
+          f"{result['throughput_rps']:>10.2f} {result['peak_rss_bytes'] / 2 ** 20:>12.1f} {result['errors']:>6}")
+    if verbose:
+        for name, values in result["pages"].items():
+            print(f"{'':>6} {name:<16} p50 {values['p50'] * 1000:>9.1f} ms  p95 {values['p95'] * 1000:>9.1f} ms")
+    for error in errors[:5]:
+        print(f"{'':>6} 错误: {error}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="多会话负载测试（重新运行串行执行）")
+    parser.add_argument("--sessions", type=int, nargs="+", default=[1, 2, 4, 8], help="会话数（逐级测试）")
+    parser.add_argument("--rounds", type=int, default=2, help="每个会话重复执行所选页面的轮数")
+    parser.add_argument("--pages", nargs="+", choices=list(PAGE_FILES), default=list(PAGE_FILES), help="参与测试的页面")
+    parser.add_argument("--alternatives", type=int, default=500, help="方案数量")
+    parser.add_argument("--indicators", type=int, default=8, help="指标数量")
+    parser.add_argument("--order", type=int, default=7, help="AHP判断矩阵阶数")
+    parser.add_argument("--seed", type=int, default=generators.DEFAULT_SEED, help="随机数种子")
+    parser.add_argument("--output", help="结果JSON文件路径")
+    parser.add_argument("--verbose", action="store_true", help="输出各页面各步骤的延迟")
+    args = parser.parse_args(argv)
+
+    try:
+        from streamlit.testing.v1 import AppTest
+    except ImportError:
+        print("当前Streamlit版本不支持AppTest，请升级Streamlit")
+        return 1
+    if not hasattr(AppTest, "file_uploader"):
+        print("当前Streamlit版本的AppTest不支持模拟文件上传，请升级Streamlit")
+        return 1
+
+    workbooks = make_workbooks(args)
+    results = []
+    print(f"{'会话数':>6} {'运行次数':>8} {'p50(ms)':>10} {'p95(ms)':>10} {'p99(ms)':>10} "
+          f"{'吞吐(次/s)':>10} {'峰值RSS(MiB)':>12} {'错误':>6}")
+
+    previous_store = os.environ.get("GREEN_TOWN_RUN_STORE")
+    with tempfile.TemporaryDirectory(prefix="green_town_load_") as workdir:
+        # 运行记录写入临时目录，结束后恢复原来的设置
+        os.environ["GREEN_TOWN_RUN_STORE"] = os.path.join(workdir, "runs")
+        try:
+            for n_sessions in args.sessions:
+                result, errors = run_level(n_sessions, workbooks, args)
+                results.append(result)
+                print_level(result, errors, args.verbose)
+        finally:
+            if previous_store is None:
+                os.environ.pop("GREEN_TOWN_RUN_STORE", None)
+            else:
+                os.environ["GREEN_TOWN_RUN_STORE"] = previous_store
+
+    if args.output:
+        report = {
+            "meta": {
+                "timestamp": datetime.now().isoformat(timespec="seconds"),
+                "commit": git_commit(),
+                "python": platform.python_version(),
+                "streamlit": streamlit.__version__,
+                "platform": platform.platform(),
+                "cpu_count": os.cpu_count(),
+                "serialized_reruns": True,
+                "args": {k: v for k, v in vars(args).items() if k != "output"},
+            },
+            "results": results,
+        }
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+        print(f"结果已保存到 {args.output}")
+
+    return 1 if any(r["errors"] for r in results) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
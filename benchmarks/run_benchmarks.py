@@ -0,0 +1,242 @@
+"""评价流程热点的基准测试
+
+在项目根目录运行：
+
+    python -m benchmarks.run_benchmarks --alternatives 1000 20000 --indicators 30 --output new.json
+    python -m benchmarks.run_benchmarks --compare old.json new.json
+
+每个用例记录多次运行的墙钟时间（中位数、最小值）和一次运行的峰值内存
+（tracemalloc统计，含NumPy数组分配），结果以JSON保存，可在不同提交之间比较。
+"""
+import argparse
+import functools
+import io
+import json
+import platform
+import statistics
+import subprocess
+import sys
+import time
+import tracemalloc
+from datetime import datetime
+from types import SimpleNamespace
+
+import numpy as np
+import pandas as pd
+
+from benchmarks import generators
+from utils import ahp_calculator as ahp
+from utils import ewm_calculator as ewm
+from utils import fuzzy_ahp
+from utils import score_calculator
+from utils.file_handlers import XLSX_MAX_ROWS, export_tables
+
+
+def measure(func, repeat):
+    """测量函数的运行时间和峰值内存"""
+    func()  # 预热（同时生成用例数据，不计入计时和内存统计）
+
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        times.append(time.perf_counter() - start)
+
+    # 单独一次运行统计内存，避免tracemalloc影响计时
+    tracemalloc.start()
+    try:
+        func()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    return {
+        "median_s": statistics.median(times),
+        "min_s": min(times),
+        "repeat": repeat,
+        "peak_memory_bytes": peak
+    }
+
+
+def matrix_cases(n, m, scenarios, seed):
+    """标准化、熵权、TOPSIS和综合评分用例（含分块并行版本）"""
+    @functools.cache
+    def data():
+        X = generators.make_indicator_data(n, m, seed).values
+        types, ranges = generators.make_indicator_settings(m, seed)
+        standardized = ewm.standardize_data(X, types, ranges)
+        return SimpleNamespace(
+            X=X, types=types, ranges=ranges, standardized=standardized,
+            weights=ewm.calculate_entropy_weights(standardized)[2],
+            weight_matrix=generators.make_weight_matrix(scenarios, m, seed)
+        )
+
+    params = {"n": n, "m": m}
+
+    yield "standardize_data", params, lambda: ewm.standardize_data(data().X, data().types, data().ranges)
+    yield "calculate_entropy_weights", params, lambda: ewm.calculate_entropy_weights(data().standardized)
+    yield "calculate_topsis", params, lambda: ewm.calculate_topsis(data().standardized, data().weights)
+    yield ("calculate_topsis_chunked", params,
+           lambda: ewm.calculate_topsis_chunked(data().standardized, data().weights, return_weighted=False))
+    yield "calculate_scores", params, lambda: score_calculator.calculate_scores(data().standardized, data().weights)
+    yield ("calculate_scores_chunked", params,
+           lambda: score_calculator.calculate_scores_chunked(data().standardized, data().weights))
+    yield ("calculate_scores_scenarios", dict(params, scenarios=scenarios),
+           lambda: score_calculator.calculate_scores(data().standardized, data().weight_matrix))
+
+
+def ahp_cases(k, order, seed):
+    """AHP权重、一致性检验、一致性修正与模糊AHP用例"""
+    @functools.cache
+    def data():
+        A = generators.make_ahp_matrices(k, order, seed)
+        return SimpleNamespace(A=A, weights=ahp.calculate_weights_geometric(A))
+
+    @functools.cache
+    def fuzzy_data():
+        return generators.make_fuzzy_matrices(k, order, seed)
+
+    params = {"k": k, "n": order}
+
+    yield "ahp_weights_geometric", params, lambda: ahp.calculate_weights_geometric(data().A)
+    yield "ahp_weights_arithmetic", params, lambda: ahp.calculate_weights_arithmetic(data().A)
+    yield "ahp_consistency", params, lambda: ahp.calculate_consistency(data().A, data().weights)
+    yield "ahp_repair", params, lambda: ahp.repair_consistency(data().A)
+    yield "fuzzy_ahp", params, lambda: fuzzy_ahp.calculate_fuzzy_ahp(fuzzy_data())
+
+
+def io_cases(n, m, seed):
+    """Excel读取与导出用例"""
+    @functools.cache
+    def data():
+        df = generators.make_indicator_data(n, m, seed)
+        return SimpleNamespace(df=df, workbook=generators.make_workbook(df))
+
+    params = {"n": n, "m": m}
+
+    yield "read_excel", params, lambda: pd.read_excel(io.BytesIO(data().workbook))
+    yield "write_excel", params, lambda: generators.make_workbook(data().df)
+
+
+def export_cases(n, m, seed):
+    """结果导出用例（各导出格式）"""
+    @functools.cache
+    def tables():
+        return generators.make_export_tables(n, m, seed)
+
+    params = {"n": n, "m": m}
+
+    for fmt in ("parquet", "arrow", "csv", "xlsx"):
+        if fmt == "xlsx" and n > XLSX_MAX_ROWS:
+            continue
+        yield f"export_{fmt}", params, lambda fmt=fmt: export_tables(tables(), fmt)
+
+
+def collect_cases(args):
+    """按参数组合生成全部用例；用例数据在首次运行时才生成，--filter 未选中的用例不生成数据"""
+    for n in args.alternatives:
+        for m in args.indicators:
+            yield from matrix_cases(n, m, args.scenarios, args.seed)
+    for k in args.matrices:
+        for order in args.order:
+            yield from ahp_cases(k, order, args.seed)
+    for n in sorted({min(n, args.io_max_rows) for n in args.alternatives}):
+        for m in args.indicators:
+            yield from io_cases(n, m, args.seed)
+    for n in args.alternatives:
+        for m in args.indicators:
+            yield from export_cases(n, m, args.seed)
+
+
+def git_commit():
+    """当前git提交（不在git仓库中时返回None）"""
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run(args):
+    """运行基准测试并保存结果"""
+    results = []
+    for name, params, func in collect_cases(args):
+        if args.filter and not any(f in name for f in args.filter):
+            continue
+        record = {"case": name, "params": params, **measure(func, args.repeat)}
+        results.append(record)
+        print(f"{name:<28} {json.dumps(params, ensure_ascii=False):<36} "
+              f"{record['median_s'] * 1000:>10.2f} ms {record['peak_memory_bytes'] / 2 ** 20:>10.2f} MiB")
+
+    report = {
+        "meta": {
+            "timestamp": datetime.now().isoformat(timespec="seconds"),
+            "commit": git_commit(),
+            "python": platform.python_version(),
+            "numpy": np.__version__,
+            "pandas": pd.__version__,
+            "platform": platform.platform(),
+            "seed": args.seed
+        },
+        "results": results
+    }
+
+    output = args.output or f"benchmark_{report['meta']['commit'] or 'local'}.json"
+    with open(output, "w", encoding="utf-8") as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+    print(f"结果已保存到 {output}")
+
+
+def compare(old_path, new_path, threshold):
+    """比较两次基准测试结果，返回是否存在超过阈值的性能回归"""
+    def load(path):
+        with open(path, encoding="utf-8") as f:
+            report = json.load(f)
+        return report["meta"], {
+            (r["case"], json.dumps(r["params"], sort_keys=True)): r for r in report["results"]
+        }
+
+    old_meta, old = load(old_path)
+    new_meta, new = load(new_path)
+    print(f"基准: {old_meta.get('commit')}  对比: {new_meta.get('commit')}")
+
+    regressed = False
+    for key in sorted(old.keys() & new.keys()):
+        time_ratio = new[key]["median_s"] / old[key]["median_s"]
+        old_peak = old[key]["peak_memory_bytes"]
+        memory_ratio = new[key]["peak_memory_bytes"] / old_peak if old_peak else 1.0
+        flag = ""
+        if time_ratio > threshold or memory_ratio > threshold:
+            flag = "回归"
+            regressed = True
+        print(f"{key[0]:<28} {key[1]:<36} 时间 x{time_ratio:>6.2f}  内存 x{memory_ratio:>6.2f}  {flag}")
+
+    return regressed
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="评价流程基准测试")
+    parser.add_argument("--alternatives", type=int, nargs="+", default=[1000, 20000], help="方案数量 n")
+    parser.add_argument("--indicators", type=int, nargs="+", default=[10, 30], help="指标数量 m")
+    parser.add_argument("--scenarios", type=int, default=20, help="多情景评分的情景数量")
+    parser.add_argument("--matrices", type=int, nargs="+", default=[1000], help="判断矩阵数量 k")
+    parser.add_argument("--order", type=int, nargs="+", default=[5, 9], help="判断矩阵阶数 n")
+    parser.add_argument("--io-max-rows", type=int, default=20000, help="Excel读写用例的最大行数")
+    parser.add_argument("--repeat", type=int, default=5, help="每个用例的计时次数")
+    parser.add_argument("--seed", type=int, default=generators.DEFAULT_SEED, help="随机数种子")
+    parser.add_argument("--filter", nargs="+", help="只运行名称包含指定字符串的用例")
+    parser.add_argument("--output", help="结果JSON文件路径")
+    parser.add_argument("--compare", nargs=2, metavar=("OLD", "NEW"), help="比较两个结果文件")
+    parser.add_argument("--threshold", type=float, default=1.2, help="判定为回归的倍数")
+    args = parser.parse_args(argv)
+
+    if args.compare:
+        return 1 if compare(*args.compare, args.threshold) else 0
+    run(args)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
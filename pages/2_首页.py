@@ -1,11 +1,16 @@
 # pages/首页.py
 import streamlit as st
 
+from utils.warmup import start_prewarm
+
 st.set_page_config(
     page_title="首页 - 生态增值，农策共荣",
     layout="wide"
 )
 
+# 直接打开首页时同样在后台预热计算核心
+start_prewarm()
+
 ## 主标题
 st.title("生态增值，农策共荣")
 st.subheader("农业生态产品价值实现综合效益评估与策略供给模型")
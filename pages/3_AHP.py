@@ -1,8 +1,22 @@
 import streamlit as st
 import pandas as pd
 import numpy as np
-import os
-from datetime import datetime
+
+from utils.ahp_calculator import (
+    RI_dict,
+    calculate_consistency,
+    calculate_weights_arithmetic,
+    calculate_weights_geometric,
+    format_saaty,
+    repair_consistency,
+)
+from utils.artifacts import WEIGHTS, new_run_id, publish
+from utils.display import download_results, select_export_format
+from utils.file_handlers import parse_fuzzy_judgments
+from utils.fuzzy_ahp import calculate_fuzzy_ahp
+from utils.instrumentation import render_diagnostics_panel, set_page, stage
+from utils.run_store import render_run_history, save_session_run, set_current_data
+from utils.validation import has_errors, validate_ahp_matrices, validate_numeric_frame
 
 # 设置页面配置
 st.set_page_config(
@@ -10,54 +24,130 @@ st.set_page_config(
     page_icon="📊",
     layout="wide"
 )
+set_page("AHP")
+
+def format_fuzzy(values):
+    """三角模糊数显示为 (l, m, u)"""
+    return "(" + ", ".join(f"{v:.4g}" for v in values) + ")"
+
+def fuzzy_main():
+    """三角模糊判断：从长格式表读取全部判断矩阵，一次计算模糊权重、解模糊权重和一致性"""
+    st.markdown("""
+    模糊判断表第一行为表头，每行一条判断，各列依次为：矩阵名称（可省略）、因素A、因素B、l、m、u，
+    表示A相对B的重要程度为三角模糊数 (l, m, u)；m 留空时按区间判断 [l, u] 处理。
+    互反位置和对角线自动补齐，同一张表中的多个判断矩阵（如多位专家）一次计算。
+    """)
+
+    uploaded_file = st.file_uploader("选择模糊判断Excel文件", type=["xlsx", "xls"], key="fuzzy_file")
+    if uploaded_file is None:
+        return
+
+    try:
+        excel_file = pd.ExcelFile(uploaded_file)
+        selected_sheet = st.selectbox("选择工作表", excel_file.sheet_names)
+
+        with stage("读取Excel") as record:
+            df = pd.read_excel(uploaded_file, sheet_name=selected_sheet, header=0)
+            record.set_shape(df)
+
+        with stage("数据检查", df):
+            matrix_names, factor_names, F, issues = parse_fuzzy_judgments(df)
+        if has_errors(issues):
+            st.error("模糊判断表存在以下问题，请修改后重新上传：")
+            st.dataframe(issues)
+            return
 
-# 定义RI字典
-RI_dict = {
-    1: 0, 2: 0, 3: 0.52, 4: 0.89, 5: 1.12, 6: 1.26, 7: 1.36,
-    8: 1.41, 9: 1.46, 10: 1.49, 11: 1.52, 12: 1.54, 13: 1.56,
-    14: 1.58, 15: 1.59, 16: 1.5943, 17: 1.6064, 18: 1.6133,
-    19: 1.6207, 20: 1.6292
-}
-
-def check_reciprocal(matrix):
-    """检查矩阵是否为互反矩阵"""
-    n = matrix.shape[0]
-    for i in range(n):
-        for j in range(i + 1, n):
-            if not np.isclose(matrix[i, j], 1 / matrix[j, i], atol=1e-5):
-                return False
-    return True
-
-def calculate_weights_geometric(matrix):
-    """几何平均法计算权重"""
-    n = matrix.shape[0]
-    row_products = np.prod(matrix, axis=1)
-    W = np.power(row_products, 1 / n)
-    return W / np.sum(W)
-
-def calculate_weights_arithmetic(matrix):
-    """算术平均法计算权重"""
-    col_sums = np.sum(matrix, axis=0)
-    normalized = matrix / col_sums
-    return np.mean(normalized, axis=1)
-
-def calculate_consistency(matrix, weights):
-    """计算一致性指标"""
-    n = matrix.shape[0]
-    AW = np.dot(matrix, weights)
-    lambda_max = np.mean(AW / weights)
-    CI = (lambda_max - n) / (n - 1)
-    CR = CI / RI_dict[n]
-    return lambda_max, CI, CR
+        set_current_data("AHP", F)
+
+        st.subheader("模糊判断矩阵")
+        st.write(f"共 {len(matrix_names)} 个判断矩阵，{len(factor_names)} 个因素")
+        for name, matrix in zip(matrix_names, F):
+            with st.expander(name):
+                st.dataframe(pd.DataFrame(
+                    [[format_fuzzy(v) for v in row] for row in matrix],
+                    index=factor_names, columns=factor_names
+                ))
+
+        export_format = select_export_format("fuzzy_ahp")
+
+        if st.button("执行模糊AHP计算"):
+            with stage("模糊AHP计算", F):
+                fuzzy_weights, weights, lambda_max, CI, CR = calculate_fuzzy_ahp(F)
+
+            st.subheader("模糊AHP权重计算结果")
+            weights_df = pd.DataFrame(weights.T, index=factor_names, columns=matrix_names)
+            weights_df.index.name = "因素"
+            st.dataframe(weights_df.style.format("{:.5f}"))
+            st.bar_chart(weights_df)
+
+            fuzzy_df = pd.DataFrame({
+                "矩阵": np.repeat(matrix_names, len(factor_names)),
+                "因素": np.tile(factor_names, len(matrix_names)),
+                "l": fuzzy_weights[..., 0].ravel(),
+                "m": fuzzy_weights[..., 1].ravel(),
+                "u": fuzzy_weights[..., 2].ravel(),
+                "解模糊权重": weights.ravel()
+            })
+            with st.expander("模糊权重"):
+                st.dataframe(fuzzy_df.set_index(["矩阵", "因素"]).style.format("{:.5f}"))
+
+            st.subheader("一致性检验（中值矩阵）")
+            consistency_df = pd.DataFrame({
+                "矩阵": matrix_names,
+                "最大特征根(λ_max)": lambda_max,
+                "一致性指标(CI)": CI,
+                "一致性比率(CR)": CR,
+                "是否通过": np.where(CR < 0.1, "通过", "未通过")
+            })
+            st.dataframe(consistency_df.set_index("矩阵").style.format("{:.5f}", subset=consistency_df.columns[1:4]))
+            failed = [name for name, cr in zip(matrix_names, CR) if cr >= 0.1]
+            if failed:
+                st.error(f"⚠️ 以下判断矩阵的中值矩阵未通过一致性检验 (CR ≥ 0.1): {', '.join(failed)}")
+            else:
+                st.success("✅ 全部判断矩阵通过一致性检验 (CR < 0.1)")
+
+            # 每个判断矩阵的解模糊权重分别发布，供组合权重、综合得分页面使用
+            saved_artifacts = [
+                publish(
+                    new_run_id(),
+                    WEIGHTS,
+                    f"模糊AHP权重（{name}，{selected_sheet}）",
+                    "AHP",
+                    w,
+                    labels=factor_names,
+                    meta={"CR": float(cr), "lambda_max": float(lam)}
+                )
+                for name, w, cr, lam in zip(matrix_names, weights, CR, lambda_max)
+            ]
+            save_session_run(
+                "AHP",
+                "模糊AHP",
+                (F,),
+                saved_artifacts,
+                params={"工作表": selected_sheet, "矩阵数": len(matrix_names), "阶数": len(factor_names)},
+                tables={"权重结果": weights_df.reset_index(), "模糊权重": fuzzy_df, "一致性检验": consistency_df}
+            )
+
+            st.subheader("下载结果")
+            download_results(
+                {"权重结果": weights_df, "模糊权重": fuzzy_df, "一致性检验": consistency_df},
+                "模糊AHP计算结果",
+                "fuzzy_ahp",
+                export_format,
+                data=weights_df
+            )
+
+    except Exception as e:
+        st.error(f"发生错误: {str(e)}")
 
 def main():
     st.title("AHP层次分析法计算工具")
     st.markdown("""
     ### 使用说明
-    1. 上传包含判断矩阵的Excel文件
+    1. 选择判断形式，上传包含判断矩阵的Excel文件
     2. 选择工作表
     3. 选择计算方法
-    4. 执行AHP计算
+    4. 执行AHP计算（可选：CR不达标时自动修正判断矩阵）
     5. 查看结果并下载
     """)
     
@@ -71,8 +161,14 @@ def main():
     if 'consistency_ratio' not in st.session_state:
         st.session_state.consistency_ratio = None
     
+    # 判断形式
+    mode = st.radio("判断形式", ["精确判断矩阵", "三角模糊判断"], horizontal=True, key="ahp_mode")
+    if mode == "三角模糊判断":
+        fuzzy_main()
+        return
+
     # 文件上传
-    uploaded_file = st.file_uploader("选择Excel文件", type=["xlsx", "xls"])
+    uploaded_file = st.file_uploader("选择Excel文件", type=["xlsx", "xls"], key="ahp_file")
     
     if uploaded_file is not None:
         try:
@@ -88,7 +184,18 @@ def main():
             selected_sheet = st.selectbox("选择工作表", sheet_names)
             
             # 读取数据
-            df = pd.read_excel(uploaded_file, sheet_name=selected_sheet, header=None)
+            with stage("读取Excel") as record:
+                df = pd.read_excel(uploaded_file, sheet_name=selected_sheet, header=None)
+                record.set_shape(df)
+
+            # 一次性检查非数值和缺失单元格
+            with stage("数据检查", df):
+                df, issues = validate_numeric_frame(df, check_constant=False)
+            if has_errors(issues):
+                st.error("判断矩阵存在以下问题，请修改后重新上传：")
+                st.dataframe(issues)
+                return
+
             rows, cols = df.shape
             
             if rows != cols:
@@ -102,37 +209,59 @@ def main():
                     return
             
             st.session_state.matrix = df.values
+            set_current_data("AHP", df.values)
             
             # 显示矩阵
             st.subheader("判断矩阵")
             st.dataframe(df.style.format("{:.4f}"))
-            
+
+            # 读入后立即检查互反性，存在错误时不允许计算
+            with stage("互反性检查", df.values):
+                reciprocal_issues = validate_ahp_matrices(df.values)
+            if has_errors(reciprocal_issues):
+                st.error("判断矩阵不是严格的互反矩阵！以下位置存在问题，请修改后重新上传：")
+                st.dataframe(reciprocal_issues)
+
             # 计算方法选择
-            method = st.radio("计算方法", ["几何平均", "算术平均"], horizontal=True)
+            method = st.radio("计算方法", ["几何平均", "算术平均"], horizontal=True, key="ahp_method")
+            weight_method = calculate_weights_geometric if method == "几何平均" else calculate_weights_arithmetic
+
+            # 一致性修正选项
+            auto_repair = st.checkbox("CR不达标时自动修正判断矩阵（按Saaty 1-9标度给出最少修改建议）")
+            repair_threshold = 0.1
+            if auto_repair:
+                repair_threshold = st.number_input("CR阈值", min_value=0.01, max_value=0.5, value=0.1, step=0.01)
+
+            export_format = select_export_format("ahp")
             
             # 执行计算按钮
-            if st.button("执行AHP计算"):
+            if st.button("执行AHP计算", key="ahp_compute", disabled=has_errors(reciprocal_issues)):
                 if st.session_state.matrix is None:
                     st.warning("没有可计算的数据！")
                     return
                 
                 matrix = np.array(st.session_state.matrix, dtype=np.float64)
                 
-                if not check_reciprocal(matrix):
-                    st.warning("判断矩阵不是严格的互反矩阵！")
-                    if not st.checkbox("继续计算？"):
-                        return
-                
                 # 计算权重
-                if method == "几何平均":
-                    weights = calculate_weights_geometric(matrix)
-                else:
-                    weights = calculate_weights_arithmetic(matrix)
+                with stage("AHP权重计算", matrix):
+                    weights = weight_method(matrix)
                 
                 st.session_state.weights = weights
-                lambda_max, CI, CR = calculate_consistency(matrix, weights)
+                with stage("一致性检验", matrix):
+                    lambda_max, CI, CR = calculate_consistency(matrix, weights)
                 st.session_state.lambda_max = lambda_max
                 st.session_state.consistency_ratio = CR
+
+                # 发布权重供组合权重、综合得分页面直接使用
+                weights_artifact = publish(
+                    new_run_id(),
+                    WEIGHTS,
+                    f"AHP权重（{method}，{selected_sheet}）",
+                    "AHP",
+                    weights,
+                    labels=[f"因素{i+1}" for i in range(len(weights))],
+                    meta={"CR": float(CR), "lambda_max": float(lambda_max)}
+                )
                 
                 # 显示结果
                 st.subheader("AHP权重计算结果")
@@ -157,34 +286,91 @@ def main():
                     st.success("✅ 一致性检验通过 (CR < 0.1)")
                 else:
                     st.error("⚠️ 一致性检验未通过 (CR ≥ 0.1)! 请重新调整判断矩阵")
+
+                # 自动修正判断矩阵
+                saved_artifacts = [weights_artifact]
+                repair_tables = {}
+                if auto_repair and CR >= repair_threshold:
+                    with stage("一致性修正", matrix):
+                        repaired, repaired_CR, edits = repair_consistency(
+                            matrix, repair_threshold, weight_method=weight_method
+                        )
+
+                    st.subheader("判断矩阵自动修正")
+                    if len(edits["row"]) == 0:
+                        st.warning("没有找到能降低CR的单处修改，请手动调整判断矩阵")
+                    else:
+                        edits_df = pd.DataFrame({
+                            "位置": [f"因素{i+1} / 因素{j+1}" for i, j in zip(edits["row"], edits["col"])],
+                            "原判断值": [format_saaty(v) for v in edits["old"]],
+                            "建议值": [format_saaty(v) for v in edits["new"]],
+                            "修改后CR": [f"{c:.5f}" for c in edits["CR"]]
+                        })
+                        st.dataframe(edits_df)
+
+                        repaired_weights = weight_method(repaired)
+                        labels = [f"因素{i+1}" for i in range(len(repaired_weights))]
+                        repaired_df = pd.DataFrame(repaired, columns=labels, index=labels)
+                        st.write("修正后的判断矩阵")
+                        st.dataframe(repaired_df.style.format("{:.4f}"))
+                        repaired_weights_df = pd.DataFrame({
+                            "因素": labels,
+                            "原权重": [f"{w:.5f}" for w in weights],
+                            "修正后权重": [f"{w:.5f}" for w in repaired_weights]
+                        })
+                        st.dataframe(repaired_weights_df)
+
+                        if repaired_CR < repair_threshold:
+                            st.success(f"✅ 修改{len(edits_df)}处判断后 CR = {repaired_CR:.5f} < {repair_threshold:g}")
+                        else:
+                            st.warning(f"修改{len(edits_df)}处判断后 CR = {repaired_CR:.5f}，仍未低于{repair_threshold:g}，请手动调整")
+
+                        saved_artifacts.append(publish(
+                            new_run_id(),
+                            WEIGHTS,
+                            f"AHP权重（{method}，{selected_sheet}，修正后）",
+                            "AHP",
+                            repaired_weights,
+                            labels=labels,
+                            meta={"CR": float(repaired_CR), "修改处数": len(edits_df)}
+                        ))
+                        repair_tables = {
+                            "修正建议": edits_df,
+                            "修正后矩阵": repaired_df.rename_axis("因素").reset_index(),
+                            "修正后权重": repaired_weights_df
+                        }
+
+                # 保存运行记录，之后可在历史运行记录中直接载入
+                save_session_run(
+                    "AHP",
+                    method,
+                    (matrix,),
+                    saved_artifacts,
+                    params={"工作表": selected_sheet, "阶数": len(weights)},
+                    tables={"权重结果": weights_df, "一致性检验": consistency_df, **repair_tables}
+                )
                 
                 # 下载结果
                 st.subheader("下载结果")
-                timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-                output_filename = f"AHP计算结果_{timestamp}.xlsx"
-                
-                # 创建Excel文件
-                output = pd.ExcelWriter(output_filename, engine='openpyxl')
-                pd.DataFrame(matrix).to_excel(output, sheet_name=f"原始矩阵_{selected_sheet[:25]}", index=False, 
-                                      header=[f"因素{i+1}" for i in range(matrix.shape[1])])
-                weights_df.to_excel(output, sheet_name="权重结果", index=False)
-                consistency_df.to_excel(output, sheet_name="一致性检验", index=False)
-                output.close()
-                
-                # 提供下载链接
-                with open(output_filename, "rb") as f:
-                    st.download_button(
-                        label="下载结果",
-                        data=f,
-                        file_name=output_filename,
-                        mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
-                    )
-                
-                # 删除临时文件
-                os.remove(output_filename)
+                download_results(
+                    {
+                        f"原始矩阵_{selected_sheet[:25]}": pd.DataFrame(
+                            matrix, columns=[f"因素{i+1}" for i in range(matrix.shape[1])]
+                        ),
+                        "权重结果": weights_df,
+                        "一致性检验": consistency_df,
+                        **repair_tables
+                    },
+                    "AHP计算结果",
+                    "ahp",
+                    export_format,
+                    data=matrix
+                )
         
         except Exception as e:
             st.error(f"发生错误: {str(e)}")
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
+    render_run_history("AHP")
+    render_diagnostics_panel()
\ No newline at end of file
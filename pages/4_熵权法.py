@@ -1,8 +1,16 @@
 import streamlit as st
 import pandas as pd
 import numpy as np
-import os
-from datetime import datetime
+import hashlib
+
+from utils import ewm_calculator as ewm
+from utils.artifacts import SCORES, STANDARDIZED, WEIGHTS, new_run_id, publish
+from utils.display import download_results, paged_dataframe, ranking_chart, select_export_format
+from utils.instrumentation import render_diagnostics_panel, set_page, stage
+from utils.mcdm_engine import MCDMEngine, RANKING_METHODS, WEIGHT_METHODS
+from utils.run_store import render_run_history, save_session_run, set_current_data
+from utils.score_calculator import rank_scores
+from utils.validation import IMPUTE_STRATEGIES, has_errors, impute_missing, validate_numeric_frame
 
 # 设置页面配置
 st.set_page_config(
@@ -10,6 +18,7 @@ st.set_page_config(
     page_icon="📊",
     layout="wide"
 )
+set_page("熵权法")
 
 def main():
     st.title("稳健熵权法计算工具")
@@ -25,6 +34,8 @@ def main():
     # 初始化session state
     if 'original_df' not in st.session_state:
         st.session_state.original_df = None
+    if 'numeric_df' not in st.session_state:
+        st.session_state.numeric_df = None
     if 'standardized_df' not in st.session_state:
         st.session_state.standardized_df = None
     if 'weighted_df' not in st.session_state:
@@ -41,40 +52,48 @@ def main():
         st.session_state.non_negative_shift = 0.01
     if 'has_header' not in st.session_state:
         st.session_state.has_header = True
+    if 'data_issues' not in st.session_state:
+        st.session_state.data_issues = None
 
     # 文件上传
-    uploaded_file = st.file_uploader("选择Excel文件", type=["xlsx", "xls", "csv"])
+    uploaded_file = st.file_uploader("选择Excel文件", type=["xlsx", "xls", "csv"], key="entropy_file")
 
     if uploaded_file is not None:
         try:
             # 读取文件
-            if uploaded_file.name.endswith('.csv'):
-                st.session_state.has_header = st.checkbox("CSV文件包含表头", value=True)
-                st.session_state.original_df = pd.read_csv(
-                    uploaded_file, 
-                    header=0 if st.session_state.has_header else None
-                )
-            else:
-                st.session_state.has_header = st.checkbox("Excel文件包含表头", value=True)
-                excel_file = pd.ExcelFile(uploaded_file)
-                sheet_names = excel_file.sheet_names
-                
-                if len(sheet_names) > 1:
-                    selected_sheet = st.selectbox("选择工作表", sheet_names)
-                    st.session_state.original_df = pd.read_excel(
+            with stage("读取文件") as record:
+                if uploaded_file.name.endswith('.csv'):
+                    st.session_state.has_header = st.checkbox("CSV文件包含表头", value=True)
+                    st.session_state.original_df = pd.read_csv(
                         uploaded_file, 
-                        sheet_name=selected_sheet,
                         header=0 if st.session_state.has_header else None
                     )
                 else:
-                    st.session_state.original_df = pd.read_excel(
-                        uploaded_file, 
-                        header=0 if st.session_state.has_header else None
-                    )
+                    st.session_state.has_header = st.checkbox("Excel文件包含表头", value=True)
+                    excel_file = pd.ExcelFile(uploaded_file)
+                    sheet_names = excel_file.sheet_names
+                
+                    if len(sheet_names) > 1:
+                        selected_sheet = st.selectbox("选择工作表", sheet_names)
+                        st.session_state.original_df = pd.read_excel(
+                            uploaded_file, 
+                            sheet_name=selected_sheet,
+                            header=0 if st.session_state.has_header else None
+                        )
+                    else:
+                        st.session_state.original_df = pd.read_excel(
+                            uploaded_file, 
+                            header=0 if st.session_state.has_header else None
+                        )
+                record.set_shape(st.session_state.original_df)
 
             # 显示原始数据
             st.subheader("原始数据")
-            st.dataframe(st.session_state.original_df)
+            paged_dataframe(st.session_state.original_df, key="original")
+
+            # 计算前一次性检查数据问题
+            check_data()
+            set_current_data("熵权法", st.session_state.numeric_df)
 
             # 设置指标类型
             if st.session_state.has_header:
@@ -115,9 +134,11 @@ def main():
                 )
 
         # 执行计算按钮
-        if st.button("执行计算"):
+        if st.button("执行计算", key="entropy_compute"):
             if not st.session_state.indicator_types:
                 st.warning("请先设置指标类型！")
+            elif has_errors(st.session_state.data_issues):
+                st.error("数据存在错误，请根据数据检查结果修改后重新上传，或选择缺失值处理方式！")
             else:
                 try:
                     perform_entropy_calculation()
@@ -129,6 +150,31 @@ def main():
         if st.session_state.result_df is not None:
             display_results()
 
+def check_data():
+    """检查数据中的非数值、缺失值和常数列，可选择填充缺失值"""
+    row_offset = 1 if st.session_state.has_header else 0
+    with stage("数据检查", st.session_state.original_df):
+        numeric_df, issues = validate_numeric_frame(st.session_state.original_df, row_offset=row_offset)
+
+    if len(issues):
+        st.subheader("数据检查")
+        paged_dataframe(issues, key="issues")
+
+        if has_errors(issues):
+            strategy = st.selectbox("缺失值处理（非数值单元格按缺失值处理）", ["不处理"] + IMPUTE_STRATEGIES)
+            if strategy != "不处理":
+                with stage("缺失值填充", numeric_df):
+                    numeric_df = impute_missing(numeric_df, strategy)
+                numeric_df, issues = validate_numeric_frame(numeric_df, row_offset=row_offset)
+                if has_errors(issues):
+                    st.error("填充后仍存在错误（如整列为空），请修改数据后重新上传")
+                else:
+                    st.info(f"已按{strategy}处理缺失值")
+
+    # 原始数据保持上传时的内容（导出时原样输出），计算使用数值化（及填充）后的数据
+    st.session_state.numeric_df = numeric_df
+    st.session_state.data_issues = issues
+
 def setup_indicator_settings():
     """设置指标类型和参数"""
     st.subheader("指标类型设置")
@@ -183,114 +229,48 @@ def setup_indicator_settings():
         
         st.session_state.optimal_ranges[i] = (a, b)
 
+def get_engine(df):
+    """获取多方法评价引擎，数据和参数不变时复用已缓存的标准化矩阵"""
+    cache_key = (
+        hashlib.sha1(pd.util.hash_pandas_object(df, index=False).values.tobytes()).hexdigest(),
+        tuple(st.session_state.indicator_types),
+        tuple(st.session_state.optimal_ranges),
+        st.session_state.method_var,
+        st.session_state.non_negative_shift,
+        st.session_state.weight_usage_var
+    )
+    if st.session_state.get("engine_key") != cache_key:
+        st.session_state.engine = MCDMEngine(
+            df,
+            indicator_types=st.session_state.indicator_types,
+            optimal_ranges=st.session_state.optimal_ranges,
+            method=st.session_state.method_var,
+            non_negative_shift=st.session_state.non_negative_shift,
+            weight_usage=st.session_state.weight_usage_var
+        )
+        st.session_state.engine_key = cache_key
+        st.session_state.comparison = None
+    return st.session_state.engine
+
 def standardize_data(df):
     """标准化数据"""
     if df is None:
         return None
 
-    standardized = df.copy()
-    n, m = df.shape
-
-    for j in range(m):
-        col = df.iloc[:, j]
-        indicator_type = st.session_state.indicator_types[j]
-        a, b = st.session_state.optimal_ranges[j]
-
-        try:
-            if indicator_type == "max":  # 极大型指标
-                min_val = col.min()
-                max_val = col.max()
-                if max_val == min_val:
-                    standardized.iloc[:, j] = 1.0
-                else:
-                    standardized.iloc[:, j] = (col - min_val) / (max_val - min_val)
-
-            elif indicator_type == "min":  # 极小型指标
-                min_val = col.min()
-                max_val = col.max()
-                if max_val == min_val:
-                    standardized.iloc[:, j] = 1.0
-                else:
-                    standardized.iloc[:, j] = (max_val - col) / (max_val - min_val)
-
-            elif indicator_type == "range":  # 适度指标
-                if a is None or b is None:
-                    raise ValueError(f"指标 '{df.columns[j]}' 是适度指标，但未设置有效范围")
-
-                min_val = col.min()
-                max_val = col.max()
-                denominator = max(a - min_val, max_val - b)
-
-                if denominator == 0:
-                    standardized.iloc[:, j] = 1.0
-                else:
-                    for i in range(n):
-                        val = col.iloc[i]
-                        if val < a:
-                            standardized.iloc[i, j] = 1 - (a - val) / denominator
-                        elif val > b:
-                            standardized.iloc[i, j] = 1 - (val - b) / denominator
-                        else:
-                            standardized.iloc[i, j] = 1.0
-        except Exception as e:
-            raise ValueError(f"指标 '{df.columns[j]}' 标准化失败: {str(e)}")
-
-    # 应用标准化方法
-    method = st.session_state.method_var
-    if method == "平方和":  # 平方和法
-        for j in range(m):
-            col = standardized.iloc[:, j]
-            norm = np.sqrt(np.sum(col**2))
-            if norm > 0:
-                standardized.iloc[:, j] = col / norm
-
-    # 非负平移处理
-    min_val = standardized.min().min()
-    if min_val <= 0:
-        standardized += abs(min_val) + st.session_state.non_negative_shift  # 保证所有值大于0
-
-    return standardized
+    standardized = get_engine(df).standardized
+    return pd.DataFrame(standardized, index=df.index, columns=df.columns)
 
 def calculate_entropy_weights(df):
     """计算熵权法权重"""
     if df is None:
         return None
 
-    n, m = df.shape
-    P = df.copy()
-
-    # 计算比重
-    for j in range(m):
-        col_sum = df.iloc[:, j].sum()
-        if col_sum <= 0:
-            raise ValueError(f"指标 '{df.columns[j]}' 的和为0或负数，无法计算")
-        P.iloc[:, j] = df.iloc[:, j] / col_sum
-
-    # 计算熵值
-    E = np.zeros(m)
-    ln_n = np.log(n)
-
-    for j in range(m):
-        entropy = 0
-        for i in range(n):
-            p = P.iloc[i, j]
-            if p > 0:
-                entropy -= p * np.log(p)
-            else:
-                entropy -= 0  # 当p=0时，定义p*ln(p)=0
-        E[j] = entropy / ln_n
-
-    # 计算差异系数
-    G = 1 - E
+    E, G, W = ewm.calculate_entropy_weights(df.values)
 
     # 处理特殊情况：所有熵值都为1
-    if np.allclose(G, 0):
-        G = np.ones(m)  # 赋予相等权重
+    if np.allclose(1 - E, 0):
         st.warning("所有指标的熵值都为1，已自动分配相等权重")
 
-    # 计算权重
-    W = G / np.sum(G)
-
     # 创建结果DataFrame - 保持原始顺序
     result_df = pd.DataFrame({
         "指标": df.columns,
@@ -300,13 +280,7 @@ def calculate_entropy_weights(df):
     })
 
     # 添加排名列但不改变原始顺序
-    ranked_df = result_df.copy()
-    ranked_df = ranked_df.sort_values(by="权重", ascending=False)
-    ranked_df["排序"] = range(1, len(ranked_df)+1)
-
-    # 将排名映射回原始顺序
-    rank_dict = dict(zip(ranked_df["指标"], ranked_df["排序"]))
-    result_df["排序"] = result_df["指标"].map(rank_dict)
+    result_df["排序"] = rank_scores(W)[0]
 
     return result_df
 
@@ -315,84 +289,31 @@ def calculate_topsis(df, weights):
     if df is None or weights is None:
         return None, None
 
-    # 根据权重使用选项处理数据
-    weight_usage = st.session_state.weight_usage_var
-    n, m = df.shape
-
-    # 创建加权矩阵
-    weighted_matrix = df.copy()
-    if weight_usage in ["标准化后", "两者都用"]:
-        for j in range(m):
-            weighted_matrix.iloc[:, j] = df.iloc[:, j] * weights[j]
-
-    # 确定正负理想解
-    positive_ideal = []
-    negative_ideal = []
-
-    for j in range(m):
-        col = weighted_matrix.iloc[:, j] if weight_usage in ["标准化后", "两者都用"] else df.iloc[:, j]
-        if st.session_state.indicator_types[j] == "min":
-            positive_ideal.append(col.min())
-            negative_ideal.append(col.max())
-        else:  # max or range
-            positive_ideal.append(col.max())
-            negative_ideal.append(col.min())
-
-    # 计算距离
-    distance_positive = []
-    distance_negative = []
-
-    for i in range(n):
-        row = weighted_matrix.iloc[i, :] if weight_usage in ["标准化后", "两者都用"] else df.iloc[i, :]
-
-        # 计算加权欧氏距离
-        if weight_usage in ["距离计算", "两者都用"]:
-            sum_pos = 0
-            sum_neg = 0
-            for j in range(m):
-                sum_pos += (weights[j] * (row.iloc[j] - positive_ideal[j])) ** 2
-                sum_neg += (weights[j] * (row.iloc[j] - negative_ideal[j])) ** 2
-            distance_positive.append(np.sqrt(sum_pos))
-            distance_negative.append(np.sqrt(sum_neg))
-        else:
-            sum_pos = 0
-            sum_neg = 0
-            for j in range(m):
-                sum_pos += (row.iloc[j] - positive_ideal[j]) ** 2
-                sum_neg += (row.iloc[j] - negative_ideal[j]) ** 2
-            distance_positive.append(np.sqrt(sum_pos))
-            distance_negative.append(np.sqrt(sum_neg))
-
-    # 计算接近度
-    closeness = []
-    for i in range(n):
-        if distance_positive[i] + distance_negative[i] == 0:
-            closeness.append(0)
-        else:
-            closeness.append(distance_negative[i] / (distance_positive[i] + distance_negative[i]))
+    # 按行分块并行计算，大规模方案时临时内存只与块大小成正比。
+    # 标准化后所有指标均为越大越好（极小型、适度型已转换），与多方法对比中的TOPSIS一致
+    distance_positive, distance_negative, closeness, weighted = ewm.calculate_topsis_chunked(
+        df.values,
+        weights,
+        weight_usage=st.session_state.weight_usage_var
+    )
+    weighted_matrix = pd.DataFrame(weighted, index=df.index, columns=df.columns)
 
     # 创建结果DataFrame - 保持原始顺序
     topsis_df = pd.DataFrame({
-        "方案": [f"方案{i+1}" for i in range(n)],
+        "方案": [f"方案{i+1}" for i in range(len(closeness))],
         "正理想解距离": distance_positive,
         "负理想解距离": distance_negative,
         "接近度": closeness
     })
 
     # 添加排名列但不改变原始顺序
-    ranked_topsis = topsis_df.copy()
-    ranked_topsis = ranked_topsis.sort_values(by="接近度", ascending=False)
-    ranked_topsis["排名"] = range(1, len(ranked_topsis)+1)
-
-    # 将排名映射回原始顺序
-    rank_dict = dict(zip(ranked_topsis["方案"], ranked_topsis["排名"]))
-    topsis_df["排名"] = topsis_df["方案"].map(rank_dict)
+    topsis_df["排名"] = rank_scores(closeness)[0]
 
     return topsis_df, weighted_matrix
 
 def perform_entropy_calculation():
     """执行熵权法计算"""
-    if st.session_state.original_df is None:
+    if st.session_state.numeric_df is None:
         raise ValueError("没有可计算的数据！")
 
     # 检查指标设置是否完成
@@ -400,12 +321,14 @@ def perform_entropy_calculation():
         raise ValueError("请先设置指标类型！")
 
     # 标准化数据
-    st.session_state.standardized_df = standardize_data(st.session_state.original_df)
+    with stage("标准化", st.session_state.numeric_df):
+        st.session_state.standardized_df = standardize_data(st.session_state.numeric_df)
     if st.session_state.standardized_df is None:
         raise ValueError("数据标准化失败！")
 
     # 计算熵权法权重
-    st.session_state.result_df = calculate_entropy_weights(st.session_state.standardized_df)
+    with stage("熵权计算", st.session_state.standardized_df):
+        st.session_state.result_df = calculate_entropy_weights(st.session_state.standardized_df)
     if st.session_state.result_df is None:
         raise ValueError("权重计算失败！")
 
@@ -413,18 +336,89 @@ def perform_entropy_calculation():
     weights = st.session_state.result_df["权重"].values
 
     # 计算TOPSIS结果
-    st.session_state.topsis_df, st.session_state.weighted_df = calculate_topsis(
-        st.session_state.standardized_df, 
-        weights
+    with stage("TOPSIS", st.session_state.standardized_df):
+        st.session_state.topsis_df, st.session_state.weighted_df = calculate_topsis(
+            st.session_state.standardized_df, 
+            weights
+        )
+
+    # 发布权重、标准化矩阵和接近度供下游页面直接使用
+    run_id = new_run_id()
+    indicator_names = st.session_state.standardized_df.columns
+    alternative_names = st.session_state.topsis_df["方案"]
+    published = [publish(run_id, WEIGHTS, "熵权法权重", "熵权法", weights, labels=indicator_names)]
+    published.append(publish(
+        run_id,
+        STANDARDIZED,
+        f"标准化矩阵（{st.session_state.method_var}）",
+        "熵权法",
+        st.session_state.standardized_df.values,
+        labels=alternative_names,
+        columns=indicator_names
+    ))
+    published.append(publish(
+        run_id,
+        SCORES,
+        "TOPSIS接近度",
+        "熵权法",
+        st.session_state.topsis_df["接近度"].values,
+        labels=alternative_names
+    ))
+
+    # 保存运行记录，之后可在历史运行记录中直接载入
+    save_session_run(
+        "熵权法",
+        st.session_state.method_var,
+        (st.session_state.numeric_df,),
+        published,
+        params={
+            "权重使用": st.session_state.weight_usage_var,
+            "非负平移值": st.session_state.non_negative_shift,
+            "指标类型": dict(zip(indicator_names, st.session_state.indicator_types)),
+            "适度区间": dict(zip(indicator_names, st.session_state.optimal_ranges))
+        },
+        tables={"熵权法结果": st.session_state.result_df, "TOPSIS结果": st.session_state.topsis_df},
+        run_id=run_id
     )
 
+def display_comparison():
+    """多方法对比：复用已标准化的矩阵计算多种赋权与排序方法"""
+    col1, col2 = st.columns(2)
+    with col1:
+        weight_methods = st.multiselect("赋权方法", list(WEIGHT_METHODS), default=list(WEIGHT_METHODS))
+    with col2:
+        ranking_methods = st.multiselect("排序方法", list(RANKING_METHODS), default=list(RANKING_METHODS))
+
+    if st.button("执行多方法对比"):
+        try:
+            engine = get_engine(st.session_state.numeric_df)
+            with stage("多方法对比", st.session_state.numeric_df):
+                weights_df, score_df, rank_df = engine.evaluate(weight_methods, ranking_methods)
+            st.session_state.comparison = {
+                "权重": weights_df,
+                "得分": score_df,
+                "排名": rank_df,
+                "一致性": MCDMEngine.rank_agreement(rank_df)
+            }
+        except Exception as e:
+            st.error(f"多方法对比计算错误: {str(e)}")
+
+    if st.session_state.get("comparison") is not None:
+        st.subheader("各方法权重")
+        st.dataframe(st.session_state.comparison["权重"].style.format("{:.5f}"))
+        st.subheader("排名对比")
+        paged_dataframe(st.session_state.comparison["排名"], key="comparison_rank")
+        st.subheader("排名一致性 (Kendall τ)")
+        st.dataframe(st.session_state.comparison["一致性"].style.format("{:.4f}"))
+
 def display_results():
     """显示计算结果"""
-    tab1, tab2, tab3, tab4 = st.tabs([
+    tab1, tab2, tab3, tab4, tab5 = st.tabs([
         "熵权法结果", 
         "标准化矩阵", 
         "加权矩阵", 
-        "TOPSIS结果"
+        "TOPSIS结果",
+        "多方法对比"
     ])
 
     with tab1:
@@ -436,54 +430,41 @@ def display_results():
         st.bar_chart(weights_df)
 
     with tab2:
-        st.dataframe(st.session_state.standardized_df.style.format("{:.4f}"))
+        paged_dataframe(st.session_state.standardized_df, key="standardized", fmt="{:.4f}")
 
     with tab3:
-        st.dataframe(st.session_state.weighted_df.style.format("{:.4f}"))
+        paged_dataframe(st.session_state.weighted_df, key="weighted", fmt="{:.4f}")
 
     with tab4:
-        st.dataframe(st.session_state.topsis_df)
+        paged_dataframe(st.session_state.topsis_df, key="topsis")
         
         # 可视化TOPSIS结果
         st.subheader("方案排名")
-        topsis_rank = st.session_state.topsis_df[["方案", "接近度"]].set_index("方案")
-        st.bar_chart(topsis_rank)
+        topsis_rank = st.session_state.topsis_df.set_index("方案")["接近度"]
+        ranking_chart(topsis_rank)
+
+    with tab5:
+        display_comparison()
 
     # 下载结果
     st.subheader("下载结果")
-    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-    output_filename = f"熵权TOPSIS结果_{timestamp}.xlsx"
-    
-    # 创建Excel文件
-    output = pd.ExcelWriter(output_filename, engine='openpyxl')
-    st.session_state.original_df.to_excel(output, sheet_name="原始数据", index=False)
-    st.session_state.standardized_df.to_excel(output, sheet_name="标准化矩阵", index=False)
-    st.session_state.weighted_df.to_excel(output, sheet_name="加权矩阵", index=False)
-    st.session_state.result_df.to_excel(
-        output, 
-        sheet_name="熵权法结果", 
-        index=False,
-        columns=["指标", "熵值", "差异系数", "权重", "排序"]
-    )
-    st.session_state.topsis_df.to_excel(
-        output, 
-        sheet_name="TOPSIS结果", 
-        index=False,
-        columns=["方案", "正理想解距离", "负理想解距离", "接近度", "排名"]
+    # 导出结果按本次计算缓存，切换标签页等重新运行时不再重复导出
+    download_results(
+        lambda: {
+            "原始数据": st.session_state.original_df,
+            "标准化矩阵": st.session_state.standardized_df,
+            "加权矩阵": st.session_state.weighted_df,
+            "熵权法结果": st.session_state.result_df[["指标", "熵值", "差异系数", "权重", "排序"]],
+            "TOPSIS结果": st.session_state.topsis_df[["方案", "正理想解距离", "负理想解距离", "接近度", "排名"]]
+        },
+        "熵权TOPSIS结果",
+        "entropy",
+        select_export_format("entropy"),
+        source=st.session_state.topsis_df,
+        data=st.session_state.standardized_df
     )
-    output.close()
-    
-    # 提供下载链接
-    with open(output_filename, "rb") as f:
-        st.download_button(
-            label="下载结果",
-            data=f,
-            file_name=output_filename,
-            mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
-        )
-    
-    # 删除临时文件
-    os.remove(output_filename)
 
 if __name__ == "__main__":
     main()
+    render_run_history("熵权法")
+    render_diagnostics_panel()
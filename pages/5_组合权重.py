@@ -1,22 +1,81 @@
 import streamlit as st
 import pandas as pd
 import numpy as np
-import os
 from datetime import datetime
 
+from utils.artifacts import WEIGHTS, new_run_id, publish, select_artifacts
+from utils.combination_calculator import COMBINATION_METHODS, combine_weights
+from utils.display import download_results, select_export_format
+from utils.file_handlers import extract_weight_columns
+from utils.instrumentation import render_diagnostics_panel, set_page, stage
+from utils.run_store import render_run_history, save_session_run, set_current_data
+
+
+def load_weight_artifacts():
+    """从当前会话已发布的权重中选择多种权重"""
+    # 先清空之前上传的权重，选择不足两种或数量不一致时不会误用旧数据
+    st.session_state.weights_data = None
+    st.session_state.num_weights = 0
+    st.session_state.criteria_names = None
+    st.session_state.batch_names = None
+
+    artifacts = select_artifacts(WEIGHTS, "选择参与组合的权重（至少两种）", key="weight_artifacts")
+    if len(artifacts) < 2:
+        return
+
+    lengths = {len(a.labels) for a in artifacts}
+    if len(lengths) > 1:
+        st.error("所选权重的指标数量不一致，无法组合!")
+        return
+
+    # 按指标名称对齐；名称相同但顺序不同时重新排序，名称不一致时需确认按位置对应
+    reference = list(artifacts[0].labels)
+    columns = [np.asarray(artifacts[0].data)]
+    mismatched = []
+    for i, a in enumerate(artifacts[1:], start=1):
+        position = {label: j for j, label in enumerate(a.labels)}
+        if len(position) == len(reference) and set(position) == set(reference):
+            columns.append(np.asarray(a.data)[[position[label] for label in reference]])
+        else:
+            columns.append(np.asarray(a.data))
+            mismatched.append(i)
+    if mismatched:
+        st.warning("所选权重的指标名称不一致，请核对各指标的对应关系：")
+        st.dataframe(pd.DataFrame({
+            f"权重方法{i + 1}：{artifacts[i].name}": list(artifacts[i].labels) for i in [0] + mismatched
+        }))
+        if not st.checkbox("确认按位置对应各指标", key="weight_artifacts_by_position"):
+            return
+
+    st.session_state.weights_data = np.column_stack(columns)
+    st.session_state.num_weights = len(artifacts)
+    st.session_state.num_criteria = len(artifacts[0].labels)
+    st.session_state.criteria_names = list(artifacts[0].labels)
+    st.session_state.batch_names = None
+
+    # 显示所选权重
+    st.subheader("权重数据")
+    preview = pd.DataFrame(
+        st.session_state.weights_data,
+        index=st.session_state.criteria_names,
+        columns=[f"权重方法{i + 1}：{a.name}" for i, a in enumerate(artifacts)]
+    )
+    st.dataframe(preview.style.format("{:.5f}"))
+
 def main():
     st.set_page_config(
         page_title="组合权重计算工具",
         page_icon="⚖️",
         layout="wide"
     )
+    set_page("组合权重")
 
-    st.title("组合权重计算工具(乘法合成)")
+    st.title("组合权重计算工具")
     st.markdown("""
     ### 使用说明
-    1. 上传包含多种权重数据的Excel文件
-    2. 选择工作表（如有多个）
-    3. 执行组合权重计算
+    1. 上传包含多种权重数据的Excel文件，或直接选用AHP、熵权法页面已计算的权重
+    2. 选择工作表（如有多个），或批量计算全部工作表（每个工作表一组权重，如各地区）
+    3. 选择组合方法并执行组合权重计算
     4. 查看结果并下载
     """)
 
@@ -31,33 +90,66 @@ def main():
         st.session_state.num_weights = 0
     if 'num_criteria' not in st.session_state:
         st.session_state.num_criteria = 0
+    if 'batch_names' not in st.session_state:
+        st.session_state.batch_names = None
+    if 'coefficients_df' not in st.session_state:
+        st.session_state.coefficients_df = None
+    if 'combination_method' not in st.session_state:
+        st.session_state.combination_method = None
+    if 'criteria_names' not in st.session_state:
+        st.session_state.criteria_names = None
 
-    # 文件上传
-    uploaded_file = st.file_uploader("选择Excel文件", type=["xlsx", "xls"])
+    # 数据来源
+    source = st.radio("数据来源", ["上传Excel文件", "使用已计算的权重"], horizontal=True)
+    uploaded_file = None
+    if source == "上传Excel文件":
+        uploaded_file = st.file_uploader("选择Excel文件", type=["xlsx", "xls"], key="combination_file")
+    else:
+        load_weight_artifacts()
 
     if uploaded_file is not None:
         try:
             excel_file = pd.ExcelFile(uploaded_file)
             sheet_names = excel_file.sheet_names
 
+            batch_mode = False
             if len(sheet_names) > 1:
-                selected_sheet = st.selectbox("选择工作表", sheet_names)
-                df = pd.read_excel(uploaded_file, sheet_name=selected_sheet, header=0)
-            else:
-                df = pd.read_excel(uploaded_file, header=0)
+                batch_mode = st.checkbox("批量计算全部工作表（每个工作表一组权重）")
+
+            if batch_mode:
+                # 读取全部工作表并堆叠为 (批次, 指标, 方法) 数组
+                with stage("读取Excel") as record:
+                    sheets = pd.read_excel(uploaded_file, sheet_name=None, header=0)
+                    record.set_shape(next(iter(sheets.values())))
+                weights_list = []
+                for name, sheet_df in sheets.items():
+                    cols = extract_weight_columns(sheet_df)
+                    weights_list.append(sheet_df[cols].values.astype(float))
+                if len({w.shape for w in weights_list}) > 1:
+                    st.error("数据格式错误: 各工作表的指标数量和权重方法数量必须一致!")
+                    return
 
-            if df.shape[1] < 2:
-                st.error("数据格式错误: 至少需要两列权重数据!")
-                return
+                st.session_state.weights_data = np.stack(weights_list)
+                st.session_state.batch_names = list(sheets.keys())
+                df = sheets[sheet_names[0]]
+                weight_cols = extract_weight_columns(df)
+                st.info(f"已读取 {len(weights_list)} 组权重数据，以下为第一个工作表预览")
+            else:
+                with stage("读取Excel") as record:
+                    if len(sheet_names) > 1:
+                        selected_sheet = st.selectbox("选择工作表", sheet_names)
+                        df = pd.read_excel(uploaded_file, sheet_name=selected_sheet, header=0)
+                    else:
+                        df = pd.read_excel(uploaded_file, header=0)
+                    record.set_shape(df)
 
-            weight_cols = [col for col in df.columns if '权重' in str(col)]
-            if not weight_cols:
-                st.error("数据格式错误: 没有找到包含'权重'的列!")
-                return
+                weight_cols = extract_weight_columns(df)
+                st.session_state.weights_data = df[weight_cols].values.astype(float)
+                st.session_state.batch_names = None
 
-            st.session_state.weights_data = df[weight_cols].values
             st.session_state.num_weights = len(weight_cols)
             st.session_state.num_criteria = df.shape[0]
+            st.session_state.criteria_names = None
 
             # 显示原始数据
             st.subheader("权重数据")
@@ -66,8 +158,32 @@ def main():
         except Exception as e:
             st.error(f"文件读取错误: {str(e)}")
 
+    if st.session_state.weights_data is not None:
+        set_current_data("组合权重", st.session_state.weights_data)
+
+    # 组合方法设置
+    method = st.radio("组合方法", list(COMBINATION_METHODS), horizontal=True, key="combination_method_choice")
+    coefficients = None
+    if method in ["线性加权", "最小信息熵"] and st.session_state.num_weights > 0:
+        st.caption("组合系数（将自动归一化）")
+        coef_cols = st.columns(st.session_state.num_weights)
+        coefficients = []
+        for i, col in enumerate(coef_cols):
+            with col:
+                coefficients.append(st.number_input(
+                    f"权重方法{i + 1}系数",
+                    min_value=0.0,
+                    value=1.0,
+                    step=0.1,
+                    key=f"coef_{i}"
+                ))
+        # 输入的系数按比例归一化（全部为0时由计算函数提示错误）
+        total = sum(coefficients)
+        if total > 0:
+            coefficients = [c / total for c in coefficients]
+
     # 执行计算按钮
-    if st.button("执行组合权重计算"):
+    if st.button("执行组合权重计算", key="combination_compute"):
         if st.session_state.weights_data is None:
             st.warning("没有可计算的数据！")
         else:
@@ -75,32 +191,92 @@ def main():
                 if np.any(st.session_state.weights_data <= 0):
                     raise ValueError("权重数据必须全部为正数!")
 
-                # 乘法合成法计算组合权重
-                product_weights = np.prod(st.session_state.weights_data, axis=1)
-                combined_weights = product_weights / np.sum(product_weights)
+                with stage("组合权重计算", st.session_state.weights_data):
+                    combined_weights, coef = combine_weights(
+                        st.session_state.weights_data,
+                        method=method,
+                        coefficients=coefficients
+                    )
                 st.session_state.combined_weights = combined_weights
+                st.session_state.combination_method = method
+                criteria_names = st.session_state.criteria_names or [
+                    f"指标{i + 1}" for i in range(st.session_state.num_criteria)
+                ]
+                method_names = [f"权重方法{i + 1}" for i in range(st.session_state.num_weights)]
 
                 # 创建结果DataFrame
-                results = {
-                    "指标": [f"指标{i + 1}" for i in range(st.session_state.num_criteria)],
-                    **{f"权重方法{i + 1}": [f"{w:.5f}" for w in st.session_state.weights_data[:, i]]
-                        for i in range(st.session_state.num_weights)},
-                    "组合权重": [f"{w:.5f}" for w in combined_weights]
-                }
+                if st.session_state.batch_names is None:
+                    results = {
+                        "指标": criteria_names,
+                        **{name: [f"{w:.5f}" for w in st.session_state.weights_data[:, i]]
+                            for i, name in enumerate(method_names)},
+                        "组合权重": [f"{w:.5f}" for w in combined_weights]
+                    }
+                    coef_index = ["组合系数"]
+                else:
+                    results = {
+                        "指标": criteria_names,
+                        **{f"组合权重_{name}": [f"{w:.5f}" for w in combined_weights[b]]
+                            for b, name in enumerate(st.session_state.batch_names)}
+                    }
+                    coef_index = st.session_state.batch_names
                 st.session_state.result_df = pd.DataFrame(results)
 
+                if coef is None:
+                    st.session_state.coefficients_df = None
+                else:
+                    coef_df = pd.DataFrame(np.atleast_2d(coef), columns=method_names)
+                    coef_df.insert(0, "权重组", coef_index)
+                    st.session_state.coefficients_df = coef_df
+
+                # 发布组合权重供综合得分页面直接使用
+                run_id = new_run_id()
+                if st.session_state.batch_names is None:
+                    published = [publish(run_id, WEIGHTS, f"组合权重（{method}）", "组合权重",
+                                         combined_weights, labels=criteria_names)]
+                else:
+                    published = [
+                        publish(f"{run_id}-{b + 1}", WEIGHTS, f"组合权重（{method}，{name}）", "组合权重",
+                                combined_weights[b], labels=criteria_names)
+                        for b, name in enumerate(st.session_state.batch_names)
+                    ]
+
+                # 保存运行记录，之后可在历史运行记录中直接载入
+                tables = {"组合权重结果": st.session_state.result_df}
+                if st.session_state.coefficients_df is not None:
+                    tables["组合系数"] = st.session_state.coefficients_df
+                save_session_run(
+                    "组合权重",
+                    method,
+                    (st.session_state.weights_data,),
+                    published,
+                    params={
+                        "组合系数": coefficients,
+                        "权重组": st.session_state.batch_names,
+                        "权重方法数量": st.session_state.num_weights
+                    },
+                    tables=tables,
+                    run_id=run_id
+                )
+
                 st.success("计算完成！")
 
                 # 显示计算结果
-                st.subheader("组合权重计算结果")
+                st.subheader(f"组合权重计算结果（{method}）")
                 st.dataframe(st.session_state.result_df)
 
+                if st.session_state.coefficients_df is not None:
+                    st.subheader("组合系数")
+                    st.dataframe(st.session_state.coefficients_df.style.format(
+                        {name: "{:.5f}" for name in method_names}
+                    ))
+
                 # 验证权重和
-                sum_weights = np.sum(combined_weights)
-                if np.isclose(sum_weights, 1.0, atol=1e-5):
-                    st.success(f"权重和验证通过: {sum_weights:.5f}")
+                sum_weights = np.atleast_1d(np.sum(combined_weights, axis=-1))
+                if np.allclose(sum_weights, 1.0, atol=1e-5):
+                    st.success(f"权重和验证通过: {sum_weights[0]:.5f}")
                 else:
-                    st.warning(f"⚠️ 权重和不为1: {sum_weights:.5f}")
+                    st.warning(f"⚠️ 权重和不为1: {sum_weights.min():.5f} ~ {sum_weights.max():.5f}")
 
             except Exception as e:
                 st.error(f"计算过程中发生错误: {str(e)}")
@@ -108,36 +284,36 @@ def main():
     # 下载结果
     if st.session_state.result_df is not None:
         st.subheader("下载结果")
-        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        output_filename = f"组合权重结果_{timestamp}.xlsx"
-        
-        # 创建Excel文件
-        output = pd.ExcelWriter(output_filename, engine='openpyxl')
-        st.session_state.result_df.to_excel(output, sheet_name="组合权重结果", index=False)
-        
-        # 添加计算摘要
-        summary_data = {
-            "信息": ["权重方法数量", "指标数量", "计算时间"],
-            "值": [
-                st.session_state.num_weights, 
-                st.session_state.num_criteria, 
-                datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-            ]
-        }
-        pd.DataFrame(summary_data).to_excel(output, sheet_name="计算摘要", index=False)
-        output.close()
-        
-        # 提供下载链接
-        with open(output_filename, "rb") as f:
-            st.download_button(
-                label="下载结果",
-                data=f,
-                file_name=output_filename,
-                mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
-            )
-        
-        # 删除临时文件
-        os.remove(output_filename)
+        download_results(
+            collect_export_tables,
+            "组合权重结果",
+            "combination",
+            select_export_format("combination"),
+            source=st.session_state.result_df,
+            data=st.session_state.result_df
+        )
+
+def collect_export_tables():
+    """整理导出的结果表"""
+    tables = {"组合权重结果": st.session_state.result_df}
+    if st.session_state.coefficients_df is not None:
+        tables["组合系数"] = st.session_state.coefficients_df
+
+    # 添加计算摘要
+    summary_data = {
+        "信息": ["组合方法", "权重组数量", "权重方法数量", "指标数量", "计算时间"],
+        "值": [
+            st.session_state.combination_method,
+            len(st.session_state.batch_names or [None]),
+            st.session_state.num_weights,
+            st.session_state.num_criteria,
+            datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        ]
+    }
+    tables["计算摘要"] = pd.DataFrame(summary_data)
+    return tables
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
+    render_run_history("组合权重")
+    render_diagnostics_panel()
\ No newline at end of file
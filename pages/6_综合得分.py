@@ -1,8 +1,55 @@
 import streamlit as st
 import pandas as pd
 import numpy as np
-import os
-from datetime import datetime
+
+from utils.artifacts import SCORES, STANDARDIZED, WEIGHTS, new_run_id, publish, select_artifact
+from utils.display import download_results, paged_dataframe, ranking_chart, select_export_format
+from utils.file_handlers import parse_score_sheet, read_scenario_weights
+from utils.instrumentation import render_diagnostics_panel, set_page, stage
+from utils.run_store import render_run_history, save_session_run, set_current_data
+from utils.score_calculator import calculate_scores_chunked, kendall_w, rank_scores, score_scenarios, top_k_indices
+from utils.validation import has_errors
+
+
+def read_uploaded_data(uploaded_file):
+    """读取上传的Excel文件，返回 (权重, 指标名称, 标准化矩阵)，存在问题时返回None"""
+    # 读取Excel文件
+    with stage("读取Excel") as record:
+        df = pd.read_excel(uploaded_file, header=None)
+        record.set_shape(df)
+
+    # 解析前一次性检查权重列和数据区域
+    with stage("数据检查", df):
+        weights, indicator_names, standardized_data, issues = parse_score_sheet(df)
+    if has_errors(issues):
+        st.error("文件中存在以下问题，请修改后重新上传：")
+        paged_dataframe(issues, key="issues")
+        return None
+    return weights, indicator_names, standardized_data
+
+
+def select_artifact_data():
+    """选用其他页面已发布的权重和标准化矩阵，返回 (权重, 指标名称, 标准化矩阵)"""
+    weights_artifact = select_artifact(WEIGHTS, "选择权重", key="weights_artifact")
+    matrix_artifact = select_artifact(STANDARDIZED, "选择标准化矩阵", key="matrix_artifact")
+    if weights_artifact is None or matrix_artifact is None:
+        return None
+
+    if len(weights_artifact.labels) != len(matrix_artifact.columns):
+        st.error(
+            f"权重数量({len(weights_artifact.labels)})与标准化矩阵指标数量"
+            f"({len(matrix_artifact.columns)})不一致!"
+        )
+        return None
+
+    # 与上传文件格式保持一致：行为指标，列为方案
+    indicator_names = np.array(matrix_artifact.columns, dtype=object)
+    standardized_data = pd.DataFrame(
+        matrix_artifact.data.T,
+        index=indicator_names,
+        columns=[f"指标{i+1}" for i in range(matrix_artifact.data.shape[0])]
+    )
+    return weights_artifact.data, indicator_names, standardized_data
 
 def main():
     st.set_page_config(
@@ -10,33 +57,40 @@ def main():
         page_icon="📊",
         layout="wide"
     )
+    set_page("综合得分")
 
     st.title("综合评分计算工具")
     st.markdown("""
     ### 使用说明
-    1. 上传包含组合权重和标准化数据的Excel文件（格式：第一列权重，第三列指标名称，第四列开始数据）
-    2. 执行综合评分计算
-    3. 下载结果文件（将生成与示例完全相同的格式）
+    1. 上传包含组合权重和标准化数据的Excel文件（格式：第一列权重，第三列指标名称，第四列开始数据），
+       或直接选用其他页面已计算的权重和标准化矩阵
+    2. 如需比较多种权重情景，勾选“多情景评分”并上传情景权重矩阵（第一列情景名称，其后各列依次为各指标权重）
+    3. 执行综合评分计算
+    4. 下载结果文件（将生成与示例完全相同的格式）
     """)
 
     # 初始化session state
     if 'final_result' not in st.session_state:
         st.session_state.final_result = None
+    if 'scenario_result' not in st.session_state:
+        st.session_state.scenario_result = None
 
-    # 文件上传
-    uploaded_file = st.file_uploader("选择Excel文件", type=["xlsx", "xls"])
+    # 数据来源
+    source = st.radio("数据来源", ["上传Excel文件", "使用已计算的结果"], horizontal=True)
+    uploaded_file = None
+    if source == "上传Excel文件":
+        uploaded_file = st.file_uploader("选择Excel文件", type=["xlsx", "xls"], key="score_file")
 
-    if uploaded_file is not None:
+    if uploaded_file is not None or source == "使用已计算的结果":
         try:
-            # 读取Excel文件
-            df = pd.read_excel(uploaded_file, header=None)
-            
-            # 解析数据
-            weights = df.iloc[1:, 0].astype(float).values
-            indicator_names = df.iloc[1:, 2].values
-            standardized_data = df.iloc[1:, 3:].astype(float)
-            standardized_data.columns = [f"指标{i+1}" for i in range(standardized_data.shape[1])]
-            standardized_data.index = indicator_names
+            if uploaded_file is not None:
+                loaded = read_uploaded_data(uploaded_file)
+            else:
+                loaded = select_artifact_data()
+            if loaded is None:
+                return
+            weights, indicator_names, standardized_data = loaded
+            set_current_data("综合得分", weights, standardized_data.values)
             
             # 显示数据预览
             st.subheader("数据预览")
@@ -51,114 +105,179 @@ def main():
                 st.dataframe(weights_df.style.format({"组合权重": "{:.6f}"}))
             
             with col2:
-                st.write("标准化数据矩阵 (前5行)")
-                st.dataframe(standardized_data.head().style.format("{:.6f}"))
+                st.write("标准化数据矩阵 (按方案分页)")
+                paged_dataframe(standardized_data.T, key="standardized_preview", fmt="{:.6f}")
+
+            # 多情景权重
+            scenario_names, scenario_weights = None, None
+            if st.checkbox("多情景评分"):
+                scenario_file = st.file_uploader("选择情景权重矩阵Excel文件", type=["xlsx", "xls"])
+                if scenario_file is not None:
+                    scenario_names, scenario_weights, scenario_issues = read_scenario_weights(
+                        scenario_file, indicator_names
+                    )
+                    if has_errors(scenario_issues):
+                        st.error("情景权重矩阵中存在以下问题，请修改后重新上传：")
+                        st.dataframe(scenario_issues)
+                        scenario_names, scenario_weights = None, None
+                    else:
+                        st.write(f"已读取 {len(scenario_names)} 个情景，将与组合权重一并计算")
 
             # 执行计算按钮
-            if st.button("执行综合评分计算"):
-                # 归一化权重
-                normalized_weights = weights / np.sum(weights)
-                
-                # 计算加权矩阵
-                weighted_matrix = standardized_data.multiply(normalized_weights, axis=0)
-                weighted_matrix.columns = [f"方案{i+1}" for i in range(weighted_matrix.shape[1])]
-                
-                # 计算综合得分
-                scores = weighted_matrix.sum(axis=0)
+            if st.button("执行综合评分计算", key="score_compute"):
+                with stage("综合评分", standardized_data):
+                    # 归一化权重
+                    normalized_weights = weights / np.sum(weights)
+                    alternative_names = [f"方案{i+1}" for i in range(standardized_data.shape[1])]
+
+                    # 计算综合得分（按方案分块并行计算，全部完成后再排名）
+                    scores = calculate_scores_chunked(standardized_data.values.T, normalized_weights)[0]
                 
-                # 创建结果DataFrame
-                result_df = pd.DataFrame({
-                    "方案": weighted_matrix.columns,
-                    "综合得分": scores.values,
-                    "排名": scores.rank(ascending=False).astype(int).values
-                }).sort_values("排名")
+                    # 创建结果DataFrame
+                    result_df = pd.DataFrame({
+                        "方案": alternative_names,
+                        "综合得分": scores,
+                        "排名": rank_scores(scores)[0]
+                    }).sort_values("排名")
+
+                # 发布综合得分
+                published = [publish(new_run_id(), SCORES, "综合得分", "综合得分", scores, labels=alternative_names)]
+
+                # 多情景得分：组合权重与各情景权重组成权重矩阵，一次矩阵乘法完成
+                if scenario_weights is not None:
+                    with stage("多情景评分", standardized_data):
+                        score_df, rank_df, tau_df = score_scenarios(
+                            standardized_data.values.T,
+                            np.vstack([normalized_weights, scenario_weights]),
+                            scenario_names=["组合权重"] + scenario_names,
+                            alternative_names=alternative_names
+                        )
+                    st.session_state.scenario_result = {
+                        "得分": score_df,
+                        "名次": rank_df,
+                        "Kendall τ": tau_df
+                    }
+                else:
+                    st.session_state.scenario_result = None
                 
                 # 准备最终输出格式
                 final_output = {
                     "组合权重": weights_df,
                     "标准化矩阵": standardized_data,
-                    "加权矩阵": weighted_matrix,
                     "综合评价结果": result_df
                 }
                 
                 st.session_state.final_result = final_output
+
+                # 保存运行记录（结果表和多情景结果），之后可在历史运行记录中直接载入
+                tables = {"组合权重": weights_df, "综合评价结果": result_df}
+                if st.session_state.scenario_result is not None:
+                    tables.update({
+                        "多情景得分": st.session_state.scenario_result["得分"],
+                        "Kendall τ": st.session_state.scenario_result["Kendall τ"]
+                    })
+                save_session_run(
+                    "综合得分",
+                    "多情景评分" if scenario_weights is not None else "加权求和",
+                    (weights, standardized_data.values),
+                    published,
+                    params={"数据来源": source, "情景": scenario_names},
+                    tables=tables
+                )
                 st.success("计算完成！")
-                
-                # 显示计算结果
-                st.subheader("综合评价结果")
-                st.dataframe(result_df.style.format({"综合得分": "{:.6f}"}))
-                
-                # 可视化结果
-                st.subheader("综合得分分布")
-                st.bar_chart(result_df.set_index("方案")["综合得分"])
 
         except Exception as e:
             st.error(f"文件处理错误: {str(e)}")
             st.error("请确保文件格式正确：第一列权重，第三列指标名称，第四列开始是标准化数据")
 
+    # 显示计算结果（分页控件触发重新运行时结果仍保留）
+    if st.session_state.final_result is not None:
+        result_df = st.session_state.final_result["综合评价结果"]
+        st.subheader("综合评价结果")
+        paged_dataframe(result_df, key="score_result", fmt={"综合得分": "{:.6f}"})
+        
+        # 可视化结果
+        st.subheader("综合得分分布")
+        ranking_chart(result_df.set_index("方案")["综合得分"])
+
+    # 显示多情景评分结果
+    if st.session_state.scenario_result is not None:
+        score_df = st.session_state.scenario_result["得分"]
+        tau_df = st.session_state.scenario_result["Kendall τ"]
+
+        st.subheader("多情景排名一致性")
+        st.metric("Kendall协和系数W", f"{kendall_w(score_df.values):.4f}")
+        st.write("情景间Kendall τ系数")
+        st.dataframe(tau_df.style.format("{:.4f}"))
+
+        st.subheader("各情景前K名方案")
+        k = st.number_input("K", min_value=1, max_value=score_df.shape[1], value=min(10, score_df.shape[1]))
+        top_idx = top_k_indices(score_df.values, int(k))
+        st.dataframe(pd.DataFrame(
+            score_df.columns.values[top_idx].T,
+            index=[f"第{i+1}名" for i in range(top_idx.shape[1])],
+            columns=score_df.index
+        ))
+
+        st.subheader("多情景得分")
+        paged_dataframe(score_df.T, key="scenario_scores", fmt="{:.6f}")
+
     # 下载结果
     if st.session_state.final_result is not None:
         st.subheader("生成结果文件")
-        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        output_filename = f"综合得分_综合评价结果_{timestamp}.xlsx"
-        
-        # 创建Excel文件（完全按照要求的格式）
-        with pd.ExcelWriter(output_filename, engine='openpyxl') as writer:
-            # 1. 组合权重表
-            st.session_state.final_result["组合权重"].to_excel(
-                writer,
-                sheet_name="组合权重",
-                index=False,
-                header=["指标名称", "组合权重"]
-            )
-            
-            # 2. 标准化矩阵表
-            standardized_df = st.session_state.final_result["标准化矩阵"].copy()
-            standardized_df.reset_index(inplace=True)
-            standardized_df.columns = ["指标名称"] + [f"指标{i+1}" for i in range(standardized_df.shape[1]-1)]
-            standardized_df.to_excel(
-                writer,
-                sheet_name="标准化矩阵",
-                index=False
-            )
-            
-            # 3. 加权矩阵表（特殊格式）
-            weighted_df = st.session_state.final_result["加权矩阵"].copy()
-            weighted_df.reset_index(inplace=True)
-            
-            # 创建符合要求的加权矩阵格式
-            weighted_output = pd.DataFrame()
-            weighted_output["方案"] = ["指标"+str(i+1) for i in range(weighted_df.shape[0])]
-            
-            for col in weighted_df.columns[1:]:
-                weighted_output[col] = weighted_df[col]
-            
-            weighted_output.to_excel(
-                writer,
-                sheet_name="加权矩阵",
-                index=False
-            )
-            
-            # 4. 综合评价结果表
-            st.session_state.final_result["综合评价结果"].to_excel(
-                writer,
-                sheet_name="综合评价结果",
-                index=False,
-                columns=["方案", "综合得分", "排名"]
-            )
-        
-        # 提供下载链接
-        with open(output_filename, "rb") as f:
-            st.download_button(
-                label="下载结果文件",
-                data=f,
-                file_name=output_filename,
-                mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
-                help="下载的文件将完全符合示例格式要求"
-            )
+        download_results(
+            collect_export_tables,
+            "综合得分_综合评价结果",
+            "score",
+            select_export_format("score"),
+            source=st.session_state.final_result,
+            data=st.session_state.final_result["标准化矩阵"],
+            label="下载结果文件"
+        )
         
         # 显示文件生成信息
-        st.info("文件包含4个工作表：组合权重、标准化矩阵、加权矩阵、综合评价结果")
+        if st.session_state.scenario_result is not None:
+            st.info("文件包含7个工作表：组合权重、标准化矩阵、加权矩阵、综合评价结果、多情景得分、多情景名次、Kendall τ")
+        else:
+            st.info("文件包含4个工作表：组合权重、标准化矩阵、加权矩阵、综合评价结果")
+
+def collect_export_tables():
+    """整理导出的结果表（方案按行、指标按列排列）"""
+    final_result = st.session_state.final_result
+
+    # 1. 组合权重表
+    weights_df = final_result["组合权重"].set_axis(["指标名称", "组合权重"], axis=1)
+
+    # 2. 标准化矩阵表：首列为方案，其后各列为各指标（方案数可能远超xlsx的最大列数，不按方案展开列）
+    standardized = final_result["标准化矩阵"]
+    alternative_names = [f"方案{i+1}" for i in range(standardized.shape[1])]
+    standardized_df = pd.DataFrame(standardized.values.T, columns=standardized.index)
+    standardized_df.insert(0, "方案", alternative_names)
+
+    # 3. 加权矩阵表：与标准化矩阵相同的排列方式；导出时才计算，不在会话中保存一份与数据同样大小的矩阵
+    weights = final_result["组合权重"]["组合权重"].to_numpy(dtype=float)
+    weighted_output = pd.DataFrame(
+        np.multiply(standardized.values.T, weights / weights.sum()),
+        columns=standardized.index
+    )
+    weighted_output.insert(0, "方案", alternative_names)
+
+    tables = {
+        "组合权重": weights_df,
+        "标准化矩阵": standardized_df,
+        "加权矩阵": weighted_output,
+        # 4. 综合评价结果表
+        "综合评价结果": final_result["综合评价结果"][["方案", "综合得分", "排名"]].reset_index(drop=True)
+    }
+
+    # 5. 多情景结果（方案按行排列）
+    if st.session_state.scenario_result is not None:
+        tables["多情景得分"] = st.session_state.scenario_result["得分"].T.rename_axis("方案")
+        tables["多情景名次"] = st.session_state.scenario_result["名次"].T.rename_axis("方案")
+        tables["Kendall τ"] = st.session_state.scenario_result["Kendall τ"].rename_axis("情景")
+    return tables
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
+    render_run_history("综合得分")
+    render_diagnostics_panel()
\ No newline at end of file
@@ -1,39 +1,157 @@
 import streamlit as st
 
-st.set_page_config(
-    page_title="智能农业助手",
-    layout="wide",
-    initial_sidebar_state="collapsed"
+from utils.artifacts import SCORES, STANDARDIZED, WEIGHTS, select_artifact
+from utils.display import download_results, paged_dataframe, select_export_format
+from utils.instrumentation import render_diagnostics_panel, set_page, stage
+from utils.strategy import (
+    DEFAULT_BATCH_SIZE,
+    DEFAULT_WEAKEST,
+    LocalModelBackend,
+    TemplateBackend,
+    build_strategy_inputs,
+    generate_strategies,
+    get_cache,
+    strategy_table,
 )
 
-# 隐藏Streamlit默认元素
-st.markdown("""
-<style>
-    #MainMenu {visibility: hidden;}
-    footer {visibility: hidden;}
-    header {visibility: hidden;}
-    .stApp {
-        padding: 0;
-        margin: 0;
-    }
-    .block-container {
-        padding-top: 0;
-        padding-bottom: 0;
-        padding-left: 0;
-        padding-right: 0;
-        max-width: 100%;
-    }
-</style>
-""", unsafe_allow_html=True)
+ONLINE_ASSISTANT_URL = "https://udify.app/chat/Ni87WoW126qxVLnf"
+
+
+def select_inputs():
+    """选用其他页面已发布的标准化矩阵、权重和得分，返回 (矩阵制品, 权重制品, 得分或None)"""
+    matrix_artifact = select_artifact(STANDARDIZED, "选择标准化矩阵", key="strategy_matrix")
+    weights_artifact = select_artifact(WEIGHTS, "选择权重", key="strategy_weights")
+    if matrix_artifact is None or weights_artifact is None:
+        return None
+
+    if len(weights_artifact.labels) != len(matrix_artifact.columns):
+        st.error(
+            f"权重数量({len(weights_artifact.labels)})与标准化矩阵指标数量"
+            f"({len(matrix_artifact.columns)})不一致!"
+        )
+        return None
+
+    scores = None
+    if st.checkbox("使用已计算的综合得分（否则按所选权重加权求和）", key="strategy_use_scores"):
+        scores_artifact = select_artifact(SCORES, "选择综合得分", key="strategy_scores")
+        if scores_artifact is None:
+            return None
+        if len(scores_artifact.labels) != len(matrix_artifact.labels):
+            st.error(
+                f"得分数量({len(scores_artifact.labels)})与标准化矩阵方案数量"
+                f"({len(matrix_artifact.labels)})不一致!"
+            )
+            return None
+        scores = scores_artifact.data
+    return matrix_artifact, weights_artifact, scores
+
+
+def select_backend():
+    """选择策略生成后端"""
+    name = st.radio("生成方式", [TemplateBackend.name, LocalModelBackend.name], horizontal=True, key="strategy_backend")
+    if name == TemplateBackend.name:
+        return TemplateBackend()
+    col1, col2 = st.columns(2)
+    with col1:
+        endpoint = st.text_input("本地模型服务地址", value=LocalModelBackend.DEFAULT_ENDPOINT)
+    with col2:
+        model = st.text_input("模型名称", value="local")
+    return LocalModelBackend(endpoint=endpoint, model=model)
+
+
+def main():
+    st.set_page_config(
+        page_title="策略建议生成",
+        page_icon="💡",
+        layout="wide"
+    )
+    set_page("策略生成")
+
+    st.title("策略建议生成")
+    st.markdown("""
+    ### 使用说明
+    1. 在熵权法等页面完成计算后，选择已发布的标准化矩阵和权重（可选综合得分）
+    2. 按各方案与最优值的加权差距找出短板指标
+    3. 选择生成方式：规则模板（离线可用）或本地模型服务（提示词按批发送）
+    4. 生成结果按输入内容缓存，重新生成时只处理发生变化的方案
+    """)
 
-# 嵌入您的聊天机器人
-st.markdown("""
-<div style="width: 100%; height: 100vh;">
-    <iframe
-         src="https://udify.app/chat/Ni87WoW126qxVLnf"
-         style="width: 100%; height: 100%; min-height: 700px"
-         frameborder="0"
-         allow="microphone">
-    </iframe>
-</div>
+    if 'strategy_result' not in st.session_state:
+        st.session_state.strategy_result = None
+
+    selected = select_inputs()
+    if selected is not None:
+        matrix_artifact, weights_artifact, scores = selected
+
+        col1, col2 = st.columns(2)
+        with col1:
+            n_weakest = st.number_input(
+                "短板指标数", min_value=1, max_value=len(matrix_artifact.columns),
+                value=min(DEFAULT_WEAKEST, len(matrix_artifact.columns))
+            )
+        with col2:
+            batch_size = st.number_input("每批方案数", min_value=1, max_value=1024, value=DEFAULT_BATCH_SIZE)
+        backend = select_backend()
+
+        if st.button("生成策略"):
+            try:
+                with stage("短板分析", matrix_artifact.data):
+                    items = build_strategy_inputs(
+                        matrix_artifact.data,
+                        weights_artifact.data,
+                        scores=scores,
+                        alternative_names=matrix_artifact.labels,
+                        indicator_names=matrix_artifact.columns,
+                        n_weakest=int(n_weakest)
+                    )
+                progress = st.progress(0.0, text="正在生成策略...")
+
+                def _progress(done, total):
+                    progress.progress(done / total, text=f"正在生成策略：{done}/{total}")
+
+                with stage(f"策略生成（{backend.name}）", matrix_artifact.data):
+                    texts, stats = generate_strategies(
+                        items, backend, cache=get_cache(), batch_size=int(batch_size), progress=_progress
+                    )
+                progress.empty()
+                st.session_state.strategy_result = {
+                    "策略": strategy_table(items, texts),
+                    "统计": stats,
+                    "来源": f"{matrix_artifact.title} / {weights_artifact.title}",
+                }
+                st.success("策略生成完成！")
+            except (OSError, ValueError) as e:
+                st.error(f"策略生成失败: {str(e)}")
+
+    # 显示生成结果（分页控件触发重新运行时结果仍保留）
+    result = st.session_state.strategy_result
+    if result is not None:
+        st.subheader("策略建议")
+        st.caption(result["来源"])
+        stats = result["统计"]
+        cols = st.columns(len(stats))
+        for col, (label, value) in zip(cols, stats.items()):
+            col.metric(label, value)
+        paged_dataframe(result["策略"], key="strategy_table", fmt={"综合得分": "{:.4f}"})
+
+        fmt = select_export_format("strategy")
+        download_results(
+            {"策略建议": result["策略"]}, "策略建议", key="strategy", fmt=fmt,
+            source=result, data=result["策略"]
+        )
+
+    # 联网环境下仍可使用在线AI助手
+    with st.expander("在线AI助手（需联网）"):
+        st.markdown(f"""
+<iframe
+     src="{ONLINE_ASSISTANT_URL}"
+     style="width: 100%; min-height: 700px"
+     frameborder="0"
+     allow="microphone">
+</iframe>
 """, unsafe_allow_html=True)
+
+
+if __name__ == "__main__":
+    main()
+    render_diagnostics_panel()
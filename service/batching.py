@@ -0,0 +1,134 @@
+"""常驻工作线程池与小请求微批处理"""
+import queue
+import threading
+import time
+from collections import defaultdict
+from concurrent.futures import Future, ThreadPoolExecutor
+
+_STOP = object()
+
+
+class WorkerPool:
+    """预热的工作线程池
+
+    NumPy 的向量化计算会释放GIL，线程池即可并行。启动时在每个线程上
+    同时运行一次 warmup，完成线程创建和BLAS初始化，避免首批请求的冷启动延迟。
+    """
+
+    def __init__(self, workers, warmup=None):
+        self.workers = workers
+        self.executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="score-worker")
+        if warmup is not None:
+            self._warm(warmup)
+
+    def _warm(self, warmup):
+        barrier = threading.Barrier(self.workers)
+
+        def task():
+            # 所有任务在屏障处等待，保证每个任务占用一个新线程
+            barrier.wait(timeout=30)
+            warmup()
+
+        for future in [self.executor.submit(task) for _ in range(self.workers)]:
+            future.result()
+
+    def submit(self, func, *args):
+        return self.executor.submit(func, *args)
+
+    def shutdown(self):
+        self.executor.shutdown(wait=True)
+
+
+class MicroBatcher:
+    """将并发到达的小请求合并为一次向量化计算
+
+    submit(key, item) 返回 Future。后台线程从第一个请求到达起最多等待
+    max_wait 秒、收集最多 max_batch 个请求，按 key 分组后在线程池中调用
+    handler(items)，handler 返回与 items 等长的结果列表。合并计算失败时
+    逐个重试，使一个异常请求不影响同批的其他请求。
+    """
+
+    def __init__(self, handler, pool, max_batch=256, max_wait=0.002, name="micro-batcher"):
+        self.handler = handler
+        self.pool = pool
+        self.max_batch = max_batch
+        self.max_wait = max_wait
+        self._queue = queue.SimpleQueue()
+        self._lock = threading.Lock()
+        self._batches = 0
+        self._items = 0
+        self._largest = 0
+        self._thread = threading.Thread(target=self._loop, name=name, daemon=True)
+        self._thread.start()
+
+    def submit(self, key, item):
+        future = Future()
+        self._queue.put((key, item, future))
+        return future
+
+    def _collect(self):
+        """阻塞等待第一个请求，然后在等待窗口内收集后续请求"""
+        first = self._queue.get()
+        if first is _STOP:
+            return None
+
+        pending = [first]
+        deadline = time.perf_counter() + self.max_wait
+        while len(pending) < self.max_batch:
+            remaining = deadline - time.perf_counter()
+            if remaining <= 0:
+                break
+            try:
+                entry = self._queue.get(timeout=remaining)
+            except queue.Empty:
+                break
+            if entry is _STOP:
+                self._queue.put(_STOP)
+                break
+            pending.append(entry)
+        return pending
+
+    def _loop(self):
+        while True:
+            pending = self._collect()
+            if pending is None:
+                return
+            groups = defaultdict(list)
+            for key, item, future in pending:
+                if future.set_running_or_notify_cancel():
+                    groups[key].append((item, future))
+            for group in groups.values():
+                self.pool.submit(self._run, group)
+
+    def _run(self, group):
+        items = [item for item, _ in group]
+        try:
+            results = self.handler(items)
+        except Exception as exc:
+            if len(group) == 1:
+                group[0][1].set_exception(exc)
+            else:
+                for entry in group:
+                    self._run([entry])
+            return
+
+        with self._lock:
+            self._batches += 1
+            self._items += len(items)
+            self._largest = max(self._largest, len(items))
+        for (_, future), result in zip(group, results):
+            future.set_result(result)
+
+    def stats(self):
+        """合并批次统计"""
+        with self._lock:
+            return {
+                "batches": self._batches,
+                "requests": self._items,
+                "mean_batch_size": self._items / self._batches if self._batches else 0.0,
+                "max_batch_size": self._largest,
+            }
+
+    def close(self):
+        self._queue.put(_STOP)
+        self._thread.join()
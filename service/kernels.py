@@ -0,0 +1,193 @@
+"""评分服务的请求解析与计算内核
+
+parse_* 负责校验单个请求并整理为数组（错误在进入批处理之前抛出ValueError），
+*_batch 接收同一分组的多个已解析请求，合并为一次向量化计算后按请求拆分结果。
+"""
+import numpy as np
+
+from utils import ahp_calculator as ahp
+from utils import ewm_calculator as ewm
+from utils import score_calculator
+
+AHP_METHODS = {
+    "几何平均": ahp.calculate_weights_geometric,
+    "算术平均": ahp.calculate_weights_arithmetic,
+}
+
+STANDARDIZE_METHODS = ["极差法", "平方和"]
+WEIGHT_USAGES = ["标准化后", "距离计算", "两者都用"]
+INDICATOR_TYPES = ["max", "min", "range"]
+
+# 单个评分请求的数据量（方案×情景×指标）超过该值时不参与合并，直接计算
+BATCH_SCORE_MAX_ELEMENTS = 1 << 16
+
+
+def _finite_array(values, name, ndim):
+    """转换为浮点数组并检查维数和有限值"""
+    try:
+        array = np.asarray(values, dtype=np.float64)
+    except (TypeError, ValueError):
+        raise ValueError(f"{name} 必须是数值数组")
+    if array.ndim not in ndim:
+        raise ValueError(f"{name} 的维数应为 {' 或 '.join(map(str, ndim))}，实际为 {array.ndim}")
+    if array.size == 0:
+        raise ValueError(f"{name} 不能为空")
+    if not np.all(np.isfinite(array)):
+        raise ValueError(f"{name} 中存在缺失值或非有限数值")
+    return array
+
+
+def parse_ahp(payload):
+    """解析AHP请求：matrix 为单个判断矩阵，或 matrices 为一组同阶判断矩阵"""
+    if "matrices" in payload:
+        A = _finite_array(payload["matrices"], "matrices", (3,))
+        single = False
+    else:
+        A = _finite_array(payload.get("matrix"), "matrix", (2,))[np.newaxis]
+        single = True
+    if A.shape[-1] != A.shape[-2]:
+        raise ValueError("判断矩阵必须是方阵")
+    n = A.shape[-1]
+    if n not in ahp.RI_dict:
+        raise ValueError(f"判断矩阵阶数必须在 1 到 {max(ahp.RI_dict)} 之间")
+    if np.any(A <= 0):
+        raise ValueError("判断值必须为正数")
+
+    method = payload.get("method", "几何平均")
+    if method not in AHP_METHODS:
+        raise ValueError(f"未知的计算方法: {method}，可选 {list(AHP_METHODS)}")
+    return {"matrices": A, "single": single, "method": method}
+
+
+def ahp_key(request):
+    """AHP请求按 (方法, 阶数) 分组合并"""
+    return ("ahp", request["method"], request["matrices"].shape[-1])
+
+
+def ahp_batch(requests):
+    """将同组请求的判断矩阵堆叠后一次计算权重和一致性"""
+    A = np.concatenate([r["matrices"] for r in requests])
+    W = AHP_METHODS[requests[0]["method"]](A)
+    lambda_max, CI, CR = ahp.calculate_consistency(A, W)
+    reciprocal = ahp.check_reciprocal(A)
+
+    results = []
+    bounds = np.cumsum([0] + [len(r["matrices"]) for r in requests])
+    for r, start, stop in zip(requests, bounds[:-1], bounds[1:]):
+        part = {
+            "weights": W[start:stop].tolist(),
+            "lambda_max": lambda_max[start:stop].tolist(),
+            "CI": CI[start:stop].tolist(),
+            "CR": CR[start:stop].tolist(),
+            "reciprocal": reciprocal[start:stop].tolist(),
+        }
+        if r["single"]:
+            part = {key: value[0] for key, value in part.items()}
+        results.append(part)
+    return results
+
+
+def parse_entropy(payload):
+    """解析熵权法/TOPSIS请求，参数含义与熵权法页面一致"""
+    X = _finite_array(payload.get("data"), "data", (2,))
+    n, m = X.shape
+    if n < 2:
+        raise ValueError("至少需要2个方案")
+
+    types = payload.get("indicator_types", ["max"] * m)
+    if len(types) != m or any(t not in INDICATOR_TYPES for t in types):
+        raise ValueError(f"indicator_types 必须是长度为 {m} 的列表，取值为 {INDICATOR_TYPES}")
+    ranges = payload.get("optimal_ranges") or [None] * m
+    if len(ranges) != m:
+        raise ValueError(f"optimal_ranges 的长度必须为 {m}")
+    ranges = [tuple(r) if r is not None else (None, None) for r in ranges]
+
+    method = payload.get("method", "极差法")
+    if method not in STANDARDIZE_METHODS:
+        raise ValueError(f"未知的标准化方法: {method}，可选 {STANDARDIZE_METHODS}")
+    weight_usage = payload.get("weight_usage", "两者都用")
+    if weight_usage not in WEIGHT_USAGES:
+        raise ValueError(f"未知的权重使用方式: {weight_usage}，可选 {WEIGHT_USAGES}")
+
+    return {
+        "data": X,
+        "indicator_types": list(types),
+        "optimal_ranges": ranges,
+        "method": method,
+        "weight_usage": weight_usage,
+        "non_negative_shift": float(payload.get("non_negative_shift", 0.01)),
+    }
+
+
+def entropy(request):
+    """标准化、熵权和TOPSIS（各请求的指标设置不同，逐个计算）"""
+    standardized = ewm.standardize_data(
+        request["data"],
+        request["indicator_types"],
+        request["optimal_ranges"],
+        method=request["method"],
+        non_negative_shift=request["non_negative_shift"]
+    )
+    E, G, W = ewm.calculate_entropy_weights(standardized)
+    # 标准化后所有指标均为越大越好
+    d_pos, d_neg, closeness, _ = ewm.calculate_topsis(standardized, W, weight_usage=request["weight_usage"])
+    return {
+        "entropy": E.tolist(),
+        "divergence": G.tolist(),
+        "weights": W.tolist(),
+        "distance_positive": d_pos.tolist(),
+        "distance_negative": d_neg.tolist(),
+        "closeness": closeness.tolist(),
+        "ranks": score_calculator.rank_scores(closeness)[0].tolist(),
+    }
+
+
+def parse_score(payload):
+    """解析综合评分请求：data 为 (方案, 指标)，weights 为 (指标,) 或 (情景, 指标)"""
+    X = _finite_array(payload.get("data"), "data", (2,))
+    W = _finite_array(payload.get("weights"), "weights", (1, 2))
+    single = W.ndim == 1
+    W = score_calculator.normalize_weight_matrix(W)
+    if W.shape[1] != X.shape[1]:
+        raise ValueError(f"权重数量({W.shape[1]})与指标数量({X.shape[1]})不一致!")
+    return {"data": X, "weights": W, "single": single}
+
+
+def score_key(request):
+    """评分请求按 (指标数, 情景数) 分组；大请求单独成组"""
+    X, W = request["data"], request["weights"]
+    if X.shape[0] * W.size > BATCH_SCORE_MAX_ELEMENTS:
+        return ("score", id(request))
+    return ("score", X.shape[1], W.shape[0])
+
+
+def score_batch(requests):
+    """将同组请求的数据按行拼接，每行与所属请求的权重一次求内积"""
+    if len(requests) == 1:
+        r = requests[0]
+        scores = [score_calculator.calculate_scores(r["data"], r["weights"])]
+    else:
+        X = np.concatenate([r["data"] for r in requests])
+        W = np.stack([r["weights"] for r in requests])
+        owner = np.repeat(np.arange(len(requests)), [len(r["data"]) for r in requests])
+        S = np.einsum("nm,nsm->sn", X, W[owner])
+        scores = np.split(S, np.cumsum([len(r["data"]) for r in requests])[:-1], axis=1)
+
+    results = []
+    for r, S in zip(requests, scores):
+        ranks = score_calculator.rank_scores(S)
+        if r["single"]:
+            results.append({"scores": S[0].tolist(), "ranks": ranks[0].tolist()})
+        else:
+            results.append({"scores": S.tolist(), "ranks": ranks.tolist()})
+    return results
+
+
+def warmup():
+    """在工作线程上运行一次各计算内核"""
+    rng = np.random.default_rng(0)
+    A = np.ones((2, 3, 3))
+    ahp_batch([parse_ahp({"matrices": A})])
+    X = rng.random((8, 4)) + 0.1
+    entropy(parse_entropy({"data": X}))
+    score_batch([parse_score({"data": X, "weights": np.full(4, 0.25)})] * 2)
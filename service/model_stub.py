@@ -0,0 +1,124 @@
+"""本地模型服务桩
+
+在项目根目录运行：
+
+    python -m service.model_stub --port 8766
+
+实现策略生成页面“本地模型”后端使用的接口，用于在没有推理服务的环境中联调：
+
+    POST /generate  {"model": "local", "prompts": ["...", ...], "max_tokens": 512}
+                    -> {"model": "local", "outputs": ["...", ...]}
+
+每个提示词返回确定性的占位文本（引用提示词中的短板指标）。部署时替换为内网推理服务，
+只需保持相同的请求和响应格式。GET /health 返回服务状态。
+"""
+import argparse
+import json
+import threading
+from http import HTTPStatus
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlsplit
+
+JSON_MIME = "application/json"
+
+
+def placeholder_output(prompt, max_tokens):
+    """按提示词生成占位文本：列出提示词中编号的短板指标"""
+    weak = [line.split("：")[0].split(". ", 1)[-1] for line in prompt.splitlines() if line[:1].isdigit()]
+    lines = ["【本地模型服务桩输出】"]
+    lines += [f"{i}. 针对“{name}”制定专项提升方案。" for i, name in enumerate(weak, 1)]
+    return "\n".join(lines)[:max_tokens]
+
+
+class ModelStubHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    server_version = "GreenTownModelStub/1.0"
+    disable_nagle_algorithm = True
+
+    def _send(self, status, body):
+        body = json.dumps(body, ensure_ascii=False).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", JSON_MIME)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        path = urlsplit(self.path).path.rstrip("/")
+        if path == "/health":
+            self._send(HTTPStatus.OK, {"status": "ok", "requests": self.server.requests})
+        else:
+            self._send(HTTPStatus.NOT_FOUND, {"error": f"未知的接口: {path}"})
+
+    def do_POST(self):
+        path = urlsplit(self.path).path.rstrip("/")
+        body = self.rfile.read(int(self.headers.get("Content-Length") or 0))
+        if path != "/generate":
+            self._send(HTTPStatus.NOT_FOUND, {"error": f"未知的接口: {path}"})
+            return
+        try:
+            payload = json.loads(body or b"{}")
+            if not isinstance(payload, dict):
+                raise TypeError("请求体必须是JSON对象")
+            prompts = payload["prompts"]
+            if not isinstance(prompts, list):
+                raise TypeError("prompts 必须是列表")
+            max_tokens = int(payload.get("max_tokens", 512))
+        except (ValueError, KeyError, TypeError) as e:
+            self._send(HTTPStatus.BAD_REQUEST, {"error": str(e)})
+            return
+
+        with self.server.lock:
+            self.server.requests += 1
+        self._send(HTTPStatus.OK, {
+            "model": payload.get("model", "local"),
+            "outputs": [placeholder_output(str(prompt), max_tokens) for prompt in prompts],
+        })
+
+    def log_message(self, format, *args):
+        if self.server.verbose:
+            super().log_message(format, *args)
+
+
+class ModelStubServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, address, verbose=False):
+        super().__init__(address, ModelStubHandler)
+        self.verbose = verbose
+        self.requests = 0
+        self.lock = threading.Lock()
+
+
+def start_server(host="127.0.0.1", port=0, verbose=False):
+    """在后台线程中启动服务桩，返回 (server, thread)；port=0 时自动分配端口"""
+    server = ModelStubServer((host, port), verbose)
+    thread = threading.Thread(target=server.serve_forever, name="model-stub", daemon=True)
+    thread.start()
+    return server, thread
+
+
+def stop_server(server):
+    server.shutdown()
+    server.server_close()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="本地模型服务桩")
+    parser.add_argument("--host", default="127.0.0.1", help="监听地址")
+    parser.add_argument("--port", type=int, default=8766, help="监听端口")
+    parser.add_argument("--verbose", action="store_true", help="输出访问日志")
+    args = parser.parse_args(argv)
+
+    server = ModelStubServer((args.host, args.port), args.verbose)
+    print(f"本地模型服务桩已启动: http://{args.host}:{server.server_address[1]}/generate")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
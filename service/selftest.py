@@ -0,0 +1,247 @@
+"""评分服务的吞吐量与延迟自测
+
+在项目根目录运行：
+
+    python -m service.selftest --requests 3000 --concurrency 32
+    python -m service.selftest --url http://127.0.0.1:8765 --arrow
+
+未指定 --url 时在本进程内启动服务（仅监听127.0.0.1）。先核对各接口的结果与
+直接调用 utils 的计算一致，再以指定并发发送混合请求，报告各接口的延迟分位数、
+总吞吐量和服务端的合并批次统计。
+"""
+import argparse
+import http.client
+import io
+import json
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlencode, urlsplit
+
+import numpy as np
+
+from benchmarks import generators
+from service import server
+from utils import ahp_calculator as ahp
+from utils import ewm_calculator as ewm
+from utils import score_calculator
+
+ENDPOINTS = ["ahp", "ahp_batch", "entropy", "score"]
+
+
+def make_payloads(args):
+    """生成各类请求的JSON内容，每类若干个轮流使用"""
+    rng = np.random.default_rng(args.seed)
+    variants = 16
+    matrices = generators.make_ahp_matrices(variants * (args.ahp_batch + 1), args.order, args.seed)
+    types, ranges = generators.make_indicator_settings(args.indicators, args.seed)
+
+    payloads = {"ahp": [], "ahp_batch": [], "entropy": [], "score": []}
+    for i in range(variants):
+        payloads["ahp"].append({"matrix": matrices[i].tolist()})
+        block = matrices[variants + i * args.ahp_batch: variants + (i + 1) * args.ahp_batch]
+        payloads["ahp_batch"].append({"matrices": block.tolist()})
+        data = generators.make_indicator_data(args.rows, args.indicators, args.seed + i).values
+        payloads["entropy"].append({
+            "data": data.tolist(),
+            "indicator_types": types,
+            "optimal_ranges": [list(r) if t == "range" else None for t, r in zip(types, ranges)],
+        })
+        payloads["score"].append({
+            "data": rng.random((args.rows, args.indicators)).tolist(),
+            "weights": rng.dirichlet(np.ones(args.indicators)).tolist(),
+        })
+    return payloads
+
+
+def _arrow_body(table):
+    pa = server.pa
+    sink = pa.BufferOutputStream()
+    with pa.ipc.new_stream(sink, table.schema) as writer:
+        writer.write_table(table)
+    return sink.getvalue().to_pybytes()
+
+
+def encode(kind, payload, use_arrow):
+    """编码请求，返回 (路径, 请求体, Content-Type)"""
+    endpoint = "ahp" if kind.startswith("ahp") else kind
+    if not use_arrow:
+        return f"/{endpoint}", json.dumps(payload).encode("utf-8"), server.JSON_MIME
+
+    pa = server.pa
+    query = {}
+    if kind == "ahp":
+        A = np.asarray(payload["matrix"])
+        table = pa.table({f"c{j + 1}": A[:, j] for j in range(A.shape[1])})
+    elif kind == "ahp_batch":
+        A = np.asarray(payload["matrices"])
+        k, n, _ = A.shape
+        flat = A.reshape(k * n, n)
+        columns = {"matrix": np.repeat(np.arange(k), n)}
+        columns.update({f"c{j + 1}": flat[:, j] for j in range(n)})
+        table = pa.table(columns)
+    else:
+        X = np.asarray(payload["data"])
+        table = pa.table({f"x{j + 1}": X[:, j] for j in range(X.shape[1])})
+        if kind == "entropy":
+            query["types"] = ",".join(payload["indicator_types"])
+            query["ranges"] = ",".join(
+                f"{r[0]}:{r[1]}" if r is not None else "" for r in payload["optimal_ranges"]
+            )
+        else:
+            query["weights"] = ",".join(map(str, payload["weights"]))
+    path = f"/{endpoint}" + (f"?{urlencode(query)}" if query else "")
+    return path, _arrow_body(table), server.ARROW_MIME
+
+
+def decode(kind, body, use_arrow):
+    """解码响应，统一为JSON接口的结果格式"""
+    if not use_arrow:
+        return json.loads(body)
+
+    table = server.pa.ipc.open_stream(io.BytesIO(body)).read_all()
+    if kind.startswith("ahp"):
+        weight_columns = [name for name in table.column_names if name.startswith("w")]
+        result = {
+            "weights": np.column_stack([table.column(c).to_numpy() for c in weight_columns]),
+            "CR": table.column("CR").to_numpy(),
+        }
+        if kind == "ahp":
+            result = {key: value[0] for key, value in result.items()}
+        return result
+    if kind == "entropy":
+        metadata = table.schema.metadata
+        return {
+            "weights": json.loads(metadata[b"weights"]),
+            "closeness": table.column("closeness").to_numpy(),
+        }
+    return {"scores": table.column("score").to_numpy()}
+
+
+def expected(kind, payload):
+    """直接调用 utils 得到的参考结果"""
+    if kind.startswith("ahp"):
+        A = np.asarray(payload.get("matrix", payload.get("matrices")))
+        W = ahp.calculate_weights_geometric(A)
+        return {"weights": W, "CR": ahp.calculate_consistency(A, W)[2]}
+    if kind == "entropy":
+        X = ewm.standardize_data(
+            payload["data"], payload["indicator_types"],
+            [tuple(r) if r is not None else (None, None) for r in payload["optimal_ranges"]]
+        )
+        W = ewm.calculate_entropy_weights(X)[2]
+        closeness = ewm.calculate_topsis(X, W)[2]
+        return {"weights": W, "closeness": closeness}
+    return {"scores": score_calculator.calculate_scores(payload["data"], payload["weights"])[0]}
+
+
+class Client:
+    """保持连接的HTTP客户端（每个线程一个）"""
+
+    def __init__(self, url):
+        parts = urlsplit(url)
+        self.connection = http.client.HTTPConnection(parts.hostname, parts.port, timeout=120)
+
+    def request(self, method, path, body=None, content_type=server.JSON_MIME):
+        headers = {"Content-Type": content_type} if body is not None else {}
+        self.connection.request(method, path, body, headers)
+        response = self.connection.getresponse()
+        data = response.read()
+        if response.status != 200:
+            raise RuntimeError(f"{method} {path} 返回 {response.status}: {data[:200]!r}")
+        return data
+
+
+def verify(url, payloads, use_arrow):
+    """核对每类请求的服务结果与直接计算结果一致"""
+    client = Client(url)
+    for kind in ENDPOINTS:
+        payload = payloads[kind][0]
+        path, body, content_type = encode(kind, payload, use_arrow)
+        result = decode(kind, client.request("POST", path, body, content_type), use_arrow)
+        for key, value in expected(kind, payload).items():
+            if not np.allclose(result[key], value, rtol=1e-9, atol=1e-12):
+                raise AssertionError(f"{kind} 的 {key} 与直接计算结果不一致")
+        print(f"核对通过: {kind}")
+
+
+def load(url, payloads, args):
+    """以指定并发发送混合请求，返回 (各请求的(类型, 延迟)列表, 总耗时)"""
+    kinds = [k for k in args.endpoints for _ in range(args.weight.get(k, 1))]
+    # 预先编码，计时只包含网络往返和服务端计算
+    encoded = {k: [encode(k, p, args.arrow) for p in payloads[k]] for k in args.endpoints}
+    local = threading.local()
+
+    def send(i):
+        if not hasattr(local, "client"):
+            local.client = Client(url)
+        kind = kinds[i % len(kinds)]
+        path, body, content_type = encoded[kind][i % len(encoded[kind])]
+        start = time.perf_counter()
+        local.client.request("POST", path, body, content_type)
+        return kind, time.perf_counter() - start
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.concurrency) as executor:
+        records = list(executor.map(send, range(args.requests)))
+    return records, time.perf_counter() - start
+
+
+def report(records, elapsed, stats):
+    """打印延迟分位数、吞吐量和合并批次统计"""
+    print(f"\n{'接口':<12}{'请求数':>8}{'p50(ms)':>10}{'p95(ms)':>10}{'p99(ms)':>10}{'最大(ms)':>10}")
+    kinds = np.array([kind for kind, _ in records])
+    latency = np.array([seconds for _, seconds in records]) * 1000
+    for kind in dict.fromkeys(kinds.tolist()):
+        values = latency[kinds == kind]
+        p50, p95, p99 = np.percentile(values, [50, 95, 99])
+        print(f"{kind:<12}{len(values):>8}{p50:>10.2f}{p95:>10.2f}{p99:>10.2f}{values.max():>10.2f}")
+    print(f"\n总请求数 {len(records)}，耗时 {elapsed:.2f} s，吞吐量 {len(records) / elapsed:.1f} 请求/秒")
+    for name in ("ahp", "score"):
+        batch = stats[name]
+        print(f"{name} 合并批次: {batch['batches']} 批，平均 {batch['mean_batch_size']:.1f} 个请求，"
+              f"最大 {batch['max_batch_size']} 个")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="评分服务吞吐量与延迟自测")
+    parser.add_argument("--url", help="已运行服务的地址；未指定时在本进程内启动服务")
+    parser.add_argument("--requests", type=int, default=2000, help="请求总数")
+    parser.add_argument("--concurrency", type=int, default=32, help="并发客户端数")
+    parser.add_argument("--endpoints", nargs="+", choices=ENDPOINTS, default=ENDPOINTS, help="参与测试的请求类型")
+    parser.add_argument("--order", type=int, default=5, help="判断矩阵阶数")
+    parser.add_argument("--ahp-batch", type=int, default=50, help="批量AHP请求中的矩阵数")
+    parser.add_argument("--rows", type=int, default=200, help="熵权法和评分请求的方案数")
+    parser.add_argument("--indicators", type=int, default=10, help="熵权法和评分请求的指标数")
+    parser.add_argument("--workers", type=int, default=None, help="本进程内服务的工作线程数")
+    parser.add_argument("--arrow", action="store_true", help="使用Arrow格式请求")
+    parser.add_argument("--seed", type=int, default=generators.DEFAULT_SEED, help="随机数种子")
+    args = parser.parse_args(argv)
+    args.weight = {"ahp": 4, "score": 4}
+
+    if args.arrow and server.pa is None:
+        print("未安装pyarrow，无法测试Arrow接口")
+        return 1
+
+    local_server = None
+    url = args.url
+    if url is None:
+        local_server, _ = server.start_server("127.0.0.1", 0, workers=args.workers)
+        url = f"http://127.0.0.1:{local_server.server_address[1]}"
+        print(f"已在本进程内启动服务: {url}")
+
+    try:
+        payloads = make_payloads(args)
+        verify(url, payloads, args.arrow)
+        records, elapsed = load(url, payloads, args)
+        stats = json.loads(Client(url).request("GET", "/stats"))
+        report(records, elapsed, stats)
+    finally:
+        if local_server is not None:
+            server.stop_server(local_server)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
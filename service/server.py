@@ -0,0 +1,284 @@
+"""本地评分服务
+
+在项目根目录运行：
+
+    python -m service.server --port 8765 --workers 4
+
+接口（POST，JSON 或 Arrow IPC 流）：
+
+    /ahp      {"matrix": [[...]], "method": "几何平均"} 或 {"matrices": [[[...]]]}
+    /entropy  {"data": [[...]], "indicator_types": [...], "optimal_ranges": [...],
+               "method": "极差法", "weight_usage": "两者都用"}
+    /score    {"data": [[...]], "weights": [...] 或 [[...]]}
+
+GET /health 返回服务状态，GET /stats 返回微批处理统计。
+
+Arrow 请求体（Content-Type: application/vnd.apache.arrow.stream）为一张表：
+/ahp 每列为判断矩阵的一列，批量时增加整数列 matrix 标识各行所属矩阵；
+/entropy 和 /score 的表即为 (方案, 指标) 数据，其余参数放在查询字符串中
+（types=max,min,range&ranges=,,0.8:1.2、weights=0.2,0.3,0.5;0.4,0.4,0.2）。
+Arrow 请求的响应同样为 Arrow 表。需要安装 pyarrow。
+"""
+import argparse
+import json
+import os
+import threading
+import time
+from http import HTTPStatus
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+import numpy as np
+
+from service import kernels
+from service.batching import MicroBatcher, WorkerPool
+
+try:
+    import pyarrow as pa
+except ImportError:  # Arrow接口为可选功能
+    pa = None
+
+ARROW_MIME = "application/vnd.apache.arrow.stream"
+JSON_MIME = "application/json"
+
+# 单个请求等待计算结果的最长时间（秒）
+REQUEST_TIMEOUT = 60
+
+
+class ScoringService:
+    """计算服务：AHP和综合评分请求经微批处理合并，熵权法请求直接在线程池中计算"""
+
+    def __init__(self, workers=None, max_batch=256, max_wait=0.002):
+        self.pool = WorkerPool(workers or os.cpu_count() or 1, warmup=kernels.warmup)
+        self.ahp_batcher = MicroBatcher(kernels.ahp_batch, self.pool, max_batch, max_wait, "ahp-batcher")
+        self.score_batcher = MicroBatcher(kernels.score_batch, self.pool, max_batch, max_wait, "score-batcher")
+        self.started = time.time()
+
+    def ahp(self, payload):
+        request = kernels.parse_ahp(payload)
+        return self.ahp_batcher.submit(kernels.ahp_key(request), request).result(REQUEST_TIMEOUT)
+
+    def entropy(self, payload):
+        request = kernels.parse_entropy(payload)
+        return self.pool.submit(kernels.entropy, request).result(REQUEST_TIMEOUT)
+
+    def score(self, payload):
+        request = kernels.parse_score(payload)
+        return self.score_batcher.submit(kernels.score_key(request), request).result(REQUEST_TIMEOUT)
+
+    def stats(self):
+        return {
+            "uptime_s": time.time() - self.started,
+            "workers": self.pool.workers,
+            "ahp": self.ahp_batcher.stats(),
+            "score": self.score_batcher.stats(),
+        }
+
+    def close(self):
+        self.ahp_batcher.close()
+        self.score_batcher.close()
+        self.pool.shutdown()
+
+
+def _split_list(text, sep=","):
+    return [item.strip() for item in text.split(sep)] if text else []
+
+
+def _arrow_table(body):
+    with pa.ipc.open_stream(body) as reader:
+        return reader.read_all()
+
+
+def _table_matrix(table, columns):
+    return np.column_stack([table.column(name).to_numpy(zero_copy_only=False) for name in columns]).astype(np.float64)
+
+
+def _arrow_payload(endpoint, table, query):
+    """将Arrow表和查询参数转换为与JSON接口相同的请求内容"""
+    payload = {key: values[-1] for key, values in query.items()}
+
+    if endpoint == "ahp":
+        columns = [name for name in table.column_names if name != "matrix"]
+        A = _table_matrix(table, columns)
+        if "matrix" not in table.column_names:
+            payload["matrix"] = A
+            return payload
+        # 按矩阵首次出现的顺序分组，组内保持行顺序
+        ids = table.column("matrix").to_numpy(zero_copy_only=False)
+        _, first, inverse, counts = np.unique(ids, return_index=True, return_inverse=True, return_counts=True)
+        if np.any(counts != len(columns)):
+            raise ValueError("每个矩阵的行数必须等于列数")
+        appearance = np.argsort(np.argsort(first))
+        rows = np.argsort(appearance[inverse], kind="stable")
+        payload["matrices"] = A[rows].reshape(-1, len(columns), len(columns))
+        return payload
+
+    payload["data"] = _table_matrix(table, table.column_names)
+    if endpoint == "entropy":
+        if "types" in payload:
+            payload["indicator_types"] = _split_list(payload.pop("types"))
+        if "ranges" in payload:
+            payload["optimal_ranges"] = [
+                tuple(float(v) for v in item.split(":")) if item else None
+                for item in _split_list(payload.pop("ranges"))
+            ]
+        if "non_negative_shift" in payload:
+            payload["non_negative_shift"] = float(payload["non_negative_shift"])
+    elif endpoint == "score":
+        scenarios = [[float(v) for v in _split_list(row)] for row in _split_list(payload.get("weights", ""), ";")]
+        payload["weights"] = scenarios[0] if len(scenarios) == 1 else scenarios
+    return payload
+
+
+def _result_table(endpoint, result):
+    """将计算结果整理为Arrow表"""
+    if endpoint == "ahp":
+        W = np.atleast_2d(result["weights"])
+        columns = {f"w{j + 1}": W[:, j] for j in range(W.shape[1])}
+        for key in ("lambda_max", "CI", "CR", "reciprocal"):
+            columns[key] = np.atleast_1d(result[key])
+        return pa.table(columns)
+
+    if endpoint == "entropy":
+        table = pa.table({
+            "distance_positive": result["distance_positive"],
+            "distance_negative": result["distance_negative"],
+            "closeness": result["closeness"],
+            "rank": result["ranks"],
+        })
+        # 指标级结果与方案级结果长度不同，放在表的元数据中
+        metadata = {key: json.dumps(result[key]) for key in ("weights", "entropy", "divergence")}
+        return table.replace_schema_metadata(metadata)
+
+    S = np.atleast_2d(result["scores"])
+    R = np.atleast_2d(result["ranks"])
+    if len(S) == 1:
+        return pa.table({"score": S[0], "rank": R[0]})
+    columns = {f"score_{i + 1}": S[i] for i in range(len(S))}
+    columns.update({f"rank_{i + 1}": R[i] for i in range(len(R))})
+    return pa.table(columns)
+
+
+def _arrow_bytes(table):
+    sink = pa.BufferOutputStream()
+    with pa.ipc.new_stream(sink, table.schema) as writer:
+        writer.write_table(table)
+    return sink.getvalue().to_pybytes()
+
+
+class ScoringRequestHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    server_version = "GreenTownScoring/1.0"
+    # 响应头和响应体分两次写出，keep-alive连接上Nagle算法与延迟确认叠加会使每个响应多等约40ms
+    disable_nagle_algorithm = True
+
+    def _send(self, status, body, content_type=JSON_MIME):
+        if not isinstance(body, bytes):
+            body = json.dumps(body, ensure_ascii=False).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        path = urlsplit(self.path).path.rstrip("/")
+        if path == "/health":
+            self._send(HTTPStatus.OK, {"status": "ok", "arrow": pa is not None})
+        elif path == "/stats":
+            self._send(HTTPStatus.OK, self.server.service.stats())
+        else:
+            self._send(HTTPStatus.NOT_FOUND, {"error": f"未知的接口: {path}"})
+
+    def do_POST(self):
+        url = urlsplit(self.path)
+        endpoint = url.path.strip("/")
+        handler = {
+            "ahp": self.server.service.ahp,
+            "entropy": self.server.service.entropy,
+            "score": self.server.service.score,
+        }.get(endpoint)
+        body = self.rfile.read(int(self.headers.get("Content-Length") or 0))
+        if handler is None:
+            self._send(HTTPStatus.NOT_FOUND, {"error": f"未知的接口: /{endpoint}"})
+            return
+
+        use_arrow = self.headers.get("Content-Type", "").startswith(ARROW_MIME)
+        if use_arrow and pa is None:
+            self._send(HTTPStatus.UNSUPPORTED_MEDIA_TYPE, {"error": "服务端未安装pyarrow，不支持Arrow格式"})
+            return
+
+        try:
+            if use_arrow:
+                payload = _arrow_payload(endpoint, _arrow_table(body), parse_qs(url.query))
+            else:
+                payload = json.loads(body or b"{}")
+                if not isinstance(payload, dict):
+                    raise TypeError("请求体必须是JSON对象")
+            result = handler(payload)
+        except (ValueError, KeyError, TypeError) as e:
+            self._send(HTTPStatus.BAD_REQUEST, {"error": str(e)})
+            return
+        except Exception as e:
+            self._send(HTTPStatus.INTERNAL_SERVER_ERROR, {"error": str(e)})
+            return
+
+        if use_arrow:
+            self._send(HTTPStatus.OK, _arrow_bytes(_result_table(endpoint, result)), ARROW_MIME)
+        else:
+            self._send(HTTPStatus.OK, result)
+
+    def log_message(self, format, *args):
+        if self.server.verbose:
+            super().log_message(format, *args)
+
+
+class ScoringServer(ThreadingHTTPServer):
+    daemon_threads = True
+    request_queue_size = 256
+
+    def __init__(self, address, service, verbose=False):
+        super().__init__(address, ScoringRequestHandler)
+        self.service = service
+        self.verbose = verbose
+
+
+def start_server(host="127.0.0.1", port=0, workers=None, max_batch=256, max_wait=0.002, verbose=False):
+    """在后台线程中启动服务，返回 (server, thread)；port=0 时自动分配端口"""
+    service = ScoringService(workers, max_batch, max_wait)
+    server = ScoringServer((host, port), service, verbose)
+    thread = threading.Thread(target=server.serve_forever, name="scoring-server", daemon=True)
+    thread.start()
+    return server, thread
+
+
+def stop_server(server):
+    server.shutdown()
+    server.server_close()
+    server.service.close()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="本地评分服务")
+    parser.add_argument("--host", default="127.0.0.1", help="监听地址")
+    parser.add_argument("--port", type=int, default=8765, help="监听端口")
+    parser.add_argument("--workers", type=int, default=None, help="工作线程数，默认为CPU核数")
+    parser.add_argument("--max-batch", type=int, default=256, help="每批合并的最大请求数")
+    parser.add_argument("--max-wait-ms", type=float, default=2.0, help="合并请求的最长等待时间（毫秒）")
+    parser.add_argument("--verbose", action="store_true", help="输出访问日志")
+    args = parser.parse_args(argv)
+
+    service = ScoringService(args.workers, args.max_batch, args.max_wait_ms / 1000)
+    server = ScoringServer((args.host, args.port), service, args.verbose)
+    print(f"评分服务已启动: http://{args.host}:{server.server_address[1]}（{service.pool.workers} 个工作线程）")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        service.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,133 @@
+import numpy as np
+import pytest
+
+from benchmarks.generators import make_ahp_matrices
+from utils.ahp_calculator import (
+    RI_dict,
+    SAATY_SCALE,
+    calculate_consistency,
+    calculate_weights_arithmetic,
+    calculate_weights_geometric,
+    check_reciprocal,
+    reciprocal_mask,
+    repair_consistency,
+)
+
+
+def loop_geometric(A):
+    """逐行几何平均（原AHP页面的写法）"""
+    n = A.shape[0]
+    W = np.array([np.prod(A[i]) ** (1 / n) for i in range(n)])
+    return W / W.sum()
+
+
+def loop_arithmetic(A):
+    n = A.shape[0]
+    col_sums = [sum(A[i, j] for i in range(n)) for j in range(n)]
+    return np.array([sum(A[i, j] / col_sums[j] for j in range(n)) / n for i in range(n)])
+
+
+def loop_consistency(A, W):
+    n = A.shape[0]
+    AW = [sum(A[i, j] * W[j] for j in range(n)) for i in range(n)]
+    lambda_max = sum(AW[i] / W[i] for i in range(n)) / n
+    if n <= 2:
+        return lambda_max, 0.0, 0.0
+    CI = (lambda_max - n) / (n - 1)
+    return lambda_max, CI, CI / RI_dict[n]
+
+
+def loop_check_reciprocal(A):
+    n = A.shape[0]
+    for i in range(n):
+        for j in range(i + 1, n):
+            if not np.isclose(A[i, j], 1 / A[j, i], atol=1e-5):
+                return False
+    return True
+
+
+@pytest.mark.parametrize("n", [2, 3, 5, 9])
+def test_weights_and_consistency_match_loop(n):
+    for A in make_ahp_matrices(4, n):
+        W = calculate_weights_geometric(A)
+        np.testing.assert_allclose(W, loop_geometric(A), rtol=1e-12)
+        np.testing.assert_allclose(calculate_weights_arithmetic(A), loop_arithmetic(A), rtol=1e-12)
+        np.testing.assert_allclose(calculate_consistency(A, W), loop_consistency(A, W), rtol=1e-10, atol=1e-12)
+
+
+@pytest.mark.parametrize("weight_method", [calculate_weights_geometric, calculate_weights_arithmetic])
+def test_batch_matches_single(weight_method):
+    A = make_ahp_matrices(6, 5)
+    W = weight_method(A)
+    lambda_max, CI, CR = calculate_consistency(A, W)
+    for k in range(len(A)):
+        np.testing.assert_allclose(W[k], weight_method(A[k]), rtol=1e-12)
+        np.testing.assert_allclose(
+            (lambda_max[k], CI[k], CR[k]), calculate_consistency(A[k], W[k]), rtol=1e-12
+        )
+
+
+def test_consistent_matrix_has_zero_cr(rng):
+    w = rng.dirichlet(np.ones(6))
+    A = w[:, np.newaxis] / w[np.newaxis, :]
+    np.testing.assert_allclose(calculate_weights_geometric(A), w, rtol=1e-12)
+    lambda_max, CI, CR = calculate_consistency(A, w)
+    assert lambda_max == pytest.approx(6)
+    assert CR == pytest.approx(0, abs=1e-12)
+
+
+def test_check_reciprocal_matches_loop():
+    A = make_ahp_matrices(5, 6)
+    A[1, 0, 3] = 5.0
+    A[3, 4, 1] *= 1.01
+    expected = [loop_check_reciprocal(a) for a in A]
+    np.testing.assert_array_equal(check_reciprocal(A), expected)
+    assert expected == [True, False, True, False, True]
+
+    mask = reciprocal_mask(A[1])
+    assert mask[0, 3] and mask.sum() == 1
+
+
+def test_non_square_matrix_is_rejected():
+    with pytest.raises(ValueError, match="方阵"):
+        calculate_weights_geometric(np.ones((2, 3, 4)))
+
+
+def test_repair_lowers_cr():
+    A = make_ahp_matrices(8, 6)
+    A[:, 0, 5] = 9.0
+    A[:, 5, 0] = 1 / 9
+    _, before = calculate_consistency(A, calculate_weights_geometric(A))[1:]
+    repaired, CR, edits = repair_consistency(A, threshold=0.1)
+
+    assert np.all(check_reciprocal(repaired))
+    np.testing.assert_allclose(CR, calculate_consistency(repaired, calculate_weights_geometric(repaired))[2])
+    assert np.all(CR <= before + 1e-12)
+    assert np.all((CR < 0.1) | (before >= 0.1))
+    assert np.all(np.isin(np.round(edits["new"], 12), np.round(SAATY_SCALE, 12)))
+
+    # 修改记录逐条回放后得到修正后的矩阵
+    replayed = A.copy()
+    for m, i, j, old, new in zip(edits["matrix"], edits["row"], edits["col"], edits["old"], edits["new"]):
+        assert replayed[m, i, j] == old
+        replayed[m, i, j], replayed[m, j, i] = new, 1 / new
+    np.testing.assert_array_equal(replayed, repaired)
+
+
+def test_repair_leaves_consistent_matrix_unchanged(rng):
+    w = rng.dirichlet(np.ones(4))
+    A = w[:, np.newaxis] / w[np.newaxis, :]
+    repaired, CR, edits = repair_consistency(A)
+    np.testing.assert_array_equal(repaired, A)
+    assert len(edits["row"]) == 0
+
+
+def test_repair_batch_matches_single():
+    A = make_ahp_matrices(4, 7)
+    A[:, 0, 6], A[:, 6, 0] = 9.0, 1 / 9
+    repaired, CR, _ = repair_consistency(A, max_edits=2)
+    for k in range(len(A)):
+        single, single_CR, edits = repair_consistency(A[k], max_edits=2)
+        np.testing.assert_array_equal(repaired[k], single)
+        assert CR[k] == pytest.approx(single_CR)
+        assert len(edits["row"]) <= 2
@@ -0,0 +1,148 @@
+import numpy as np
+import pytest
+
+from utils.combination_calculator import COMBINATION_METHODS, combine_weights
+
+
+def loop_multiplicative(W):
+    """乘法合成法的逐指标实现（原页面中的写法）"""
+    products = np.array([np.prod(W[i]) for i in range(W.shape[0])])
+    return products / np.sum(products)
+
+
+def loop_linear(W, C):
+    combined = np.zeros(W.shape[0])
+    for i in range(W.shape[0]):
+        for j in range(W.shape[1]):
+            combined[i] += C[j] * W[i, j]
+    return combined / np.sum(combined)
+
+
+def loop_min_entropy(W, C):
+    combined = np.ones(W.shape[0])
+    for i in range(W.shape[0]):
+        for j in range(W.shape[1]):
+            combined[i] *= W[i, j] ** C[j]
+    return combined / np.sum(combined)
+
+
+def loop_game_theory(W, iterations=3000):
+    """坐标下降求 min αᵀGα - 2rᵀα, α ≥ 0（与向量化实现的支撑集枚举相互独立）"""
+    G = W.T @ W
+    r = np.diag(G).copy()
+    alpha = np.full(W.shape[1], 1.0 / W.shape[1])
+    for _ in range(iterations):
+        for j in range(len(alpha)):
+            rest = G[j] @ alpha - G[j, j] * alpha[j]
+            alpha[j] = max(0.0, (r[j] - rest) / G[j, j])
+    return alpha / np.sum(alpha)
+
+
+def random_weights(rng, m, k):
+    return rng.dirichlet(np.ones(m), size=k).T
+
+
+def test_multiplicative_matches_loop(rng):
+    W = random_weights(rng, 8, 3)
+    combined, coefficients = combine_weights(W, "乘法合成")
+    assert coefficients is None
+    np.testing.assert_allclose(combined, loop_multiplicative(W), rtol=1e-12)
+
+
+def test_multiplicative_does_not_underflow(rng):
+    W = random_weights(rng, 400, 3) * 1e-120
+    combined, _ = combine_weights(W, "乘法合成")
+    assert np.all(np.isfinite(combined))
+    assert combined.sum() == pytest.approx(1.0)
+
+
+@pytest.mark.parametrize("coefficients", [None, [0.2, 0.3, 0.5]])
+def test_linear_matches_loop(rng, coefficients):
+    W = random_weights(rng, 8, 3)
+    C = np.full(3, 1 / 3) if coefficients is None else np.asarray(coefficients)
+    combined, used = combine_weights(W, "线性加权", coefficients)
+    np.testing.assert_allclose(combined, loop_linear(W, C), rtol=1e-12)
+    np.testing.assert_allclose(used, C)
+
+
+def test_min_entropy_matches_loop(rng):
+    W = random_weights(rng, 8, 3)
+    C = np.array([0.5, 0.25, 0.25])
+    combined, _ = combine_weights(W, "最小信息熵", C)
+    np.testing.assert_allclose(combined, loop_min_entropy(W, C), rtol=1e-10)
+
+
+@pytest.mark.parametrize("seed", range(20))
+def test_game_theory_matches_constrained_optimum(seed):
+    W = random_weights(np.random.default_rng(seed), 6, 3)
+    combined, alpha = combine_weights(W, "博弈论组合")
+
+    assert np.all(alpha >= 0)
+    assert alpha.sum() == pytest.approx(1.0)
+    np.testing.assert_allclose(alpha, loop_game_theory(W), atol=1e-6)
+    np.testing.assert_allclose(combined, loop_linear(W, alpha), rtol=1e-12)
+
+
+def test_game_theory_unconstrained_solution_is_unchanged(rng):
+    for _ in range(50):
+        W = random_weights(rng, 10, 2)
+        G = W.T @ W
+        expected = np.linalg.solve(G, np.diag(G))
+        if np.all(expected >= 0):
+            break
+    _, alpha = combine_weights(W, "博弈论组合")
+    np.testing.assert_allclose(alpha, expected / expected.sum(), rtol=1e-10)
+
+
+def test_game_theory_identical_weights_split_evenly(rng):
+    w = rng.dirichlet(np.ones(6))
+    _, alpha = combine_weights(np.column_stack([w, w]), "博弈论组合")
+    np.testing.assert_allclose(alpha, [0.5, 0.5])
+
+
+@pytest.mark.parametrize("method", list(COMBINATION_METHODS))
+def test_batch_matches_single(rng, method):
+    W = np.stack([random_weights(rng, 7, 3) for _ in range(5)])
+    coefficients = [0.2, 0.3, 0.5] if method in ("线性加权", "最小信息熵") else None
+    combined, C = combine_weights(W, method, coefficients)
+    for b in range(W.shape[0]):
+        single, single_C = combine_weights(W[b], method, coefficients)
+        np.testing.assert_allclose(combined[b], single, rtol=1e-12)
+        if C is not None:
+            np.testing.assert_allclose(C[b], single_C, rtol=1e-12)
+
+
+@pytest.mark.parametrize("value, message", [
+    (-0.1, "负数"),
+    (np.nan, "缺失值"),
+    (np.inf, "缺失值"),
+])
+def test_invalid_weights_are_rejected(rng, value, message):
+    W = random_weights(rng, 5, 2)
+    W[2, 1] = value
+    with pytest.raises(ValueError, match=message):
+        combine_weights(W, "线性加权")
+
+
+def test_zero_weight_column_is_rejected(rng):
+    W = random_weights(rng, 5, 2)
+    W[:, 0] = 0
+    with pytest.raises(ValueError, match="权重之和必须大于0"):
+        combine_weights(W, "博弈论组合")
+
+
+@pytest.mark.parametrize("coefficients, message", [
+    ([1.0, 1.0], "之和必须为1"),
+    ([0.5, np.nan], "缺失值"),
+    ([1.2, -0.2], "负数"),
+    ([0.2, 0.3, 0.5], "数量必须与权重方法数量"),
+])
+def test_invalid_coefficients_are_rejected(rng, coefficients, message):
+    W = random_weights(rng, 5, 2)
+    with pytest.raises(ValueError, match=message):
+        combine_weights(W, "线性加权", coefficients)
+
+
+def test_unknown_method():
+    with pytest.raises(ValueError, match="未知的组合方法"):
+        combine_weights(np.ones((3, 2)), "不存在的方法")
@@ -0,0 +1,173 @@
+import numpy as np
+import pytest
+
+from utils.ewm_calculator import (
+    calculate_entropy_weights,
+    calculate_topsis,
+    calculate_topsis_chunked,
+    standardize_data,
+)
+
+WEIGHT_USAGES = ["标准化后", "距离计算", "两者都用"]
+
+
+def loop_standardize(X, types, ranges, method="极差法", shift=0.01):
+    """逐列、逐元素标准化（原熵权法页面的写法）"""
+    n, m = X.shape
+    result = np.zeros((n, m))
+    for j in range(m):
+        col = X[:, j]
+        lo, hi = col.min(), col.max()
+        for i in range(n):
+            x = col[i]
+            if types[j] == "range":
+                a, b = ranges[j]
+                denom = max(a - lo, hi - b)
+                if denom == 0:
+                    result[i, j] = 1
+                elif x < a:
+                    result[i, j] = 1 - (a - x) / denom
+                elif x > b:
+                    result[i, j] = 1 - (x - b) / denom
+                else:
+                    result[i, j] = 1
+            elif hi == lo:
+                result[i, j] = 1
+            elif types[j] == "max":
+                result[i, j] = (x - lo) / (hi - lo)
+            else:
+                result[i, j] = (hi - x) / (hi - lo)
+    if method == "平方和":
+        for j in range(m):
+            norm = np.sqrt(sum(v ** 2 for v in result[:, j]))
+            if norm > 0:
+                result[:, j] /= norm
+    if result.min() <= 0:
+        result += abs(result.min()) + shift
+    return result
+
+
+def loop_entropy(X):
+    n, m = X.shape
+    E = np.zeros(m)
+    for j in range(m):
+        total = X[:, j].sum()
+        for i in range(n):
+            p = X[i, j] / total
+            if p > 0:
+                E[j] -= p * np.log(p)
+        E[j] /= np.log(n)
+    G = 1 - E
+    if np.allclose(G, 0):
+        G = np.ones(m)
+    return E, G, G / G.sum()
+
+
+def loop_topsis(X, w, weight_usage):
+    n, m = X.shape
+    V = X * w if weight_usage in ["标准化后", "两者都用"] else X.copy()
+    best = [max(V[:, j]) for j in range(m)]
+    worst = [min(V[:, j]) for j in range(m)]
+    scale = w if weight_usage in ["距离计算", "两者都用"] else np.ones(m)
+    d_pos = np.zeros(n)
+    d_neg = np.zeros(n)
+    closeness = np.zeros(n)
+    for i in range(n):
+        d_pos[i] = np.sqrt(sum((scale[j] * (V[i, j] - best[j])) ** 2 for j in range(m)))
+        d_neg[i] = np.sqrt(sum((scale[j] * (V[i, j] - worst[j])) ** 2 for j in range(m)))
+        if d_pos[i] + d_neg[i] != 0:
+            closeness[i] = d_neg[i] / (d_pos[i] + d_neg[i])
+    return d_pos, d_neg, closeness, V
+
+
+@pytest.fixture
+def indicators(rng):
+    X = rng.normal(50, 15, size=(60, 6))
+    X[:, 4] = 7.0  # 常数列
+    types = ["max", "min", "range", "max", "min", "range"]
+    ranges = [(None, None), (None, None), (40.0, 60.0), (None, None), (None, None), (0.0, 1000.0)]
+    return X, types, ranges
+
+
+@pytest.mark.parametrize("method", ["极差法", "平方和"])
+def test_standardize_matches_loop(indicators, method):
+    X, types, ranges = indicators
+    np.testing.assert_allclose(
+        standardize_data(X, types, ranges, method=method),
+        loop_standardize(X, types, ranges, method=method),
+        rtol=1e-12
+    )
+
+
+def test_standardize_applies_shift(rng):
+    X = rng.random((20, 3))
+    result = standardize_data(X, ["max", "min", "max"], non_negative_shift=0.05)
+    assert result.min() == pytest.approx(0.05)
+    np.testing.assert_allclose(result, loop_standardize(X, ["max", "min", "max"], None, shift=0.05))
+
+
+def test_standardize_range_requires_bounds(rng):
+    with pytest.raises(ValueError, match="第2列是适度指标"):
+        standardize_data(rng.random((5, 2)), ["max", "range"])
+
+
+def test_entropy_matches_loop(rng):
+    X = rng.random((80, 7))
+    X[3, 2] = 0.0
+    for actual, expected in zip(calculate_entropy_weights(X), loop_entropy(X)):
+        np.testing.assert_allclose(actual, expected, rtol=1e-10)
+
+
+def test_entropy_uniform_data_gives_equal_weights():
+    _, _, W = calculate_entropy_weights(np.ones((10, 4)))
+    np.testing.assert_allclose(W, np.full(4, 0.25))
+
+
+def test_entropy_rejects_zero_column(rng):
+    X = rng.random((5, 3))
+    X[:, 1] = 0
+    with pytest.raises(ValueError, match="第2列"):
+        calculate_entropy_weights(X)
+
+
+@pytest.mark.parametrize("weight_usage", WEIGHT_USAGES)
+def test_topsis_matches_loop(rng, weight_usage):
+    X = rng.random((50, 5)) + 0.01
+    w = rng.dirichlet(np.ones(5))
+    for actual, expected in zip(calculate_topsis(X, w, weight_usage), loop_topsis(X, w, weight_usage)):
+        np.testing.assert_allclose(actual, expected, rtol=1e-12, atol=1e-15)
+
+
+@pytest.mark.parametrize("weight_usage", WEIGHT_USAGES)
+def test_topsis_weight_stack_matches_single(rng, weight_usage):
+    X = rng.random((40, 5))
+    W = rng.dirichlet(np.ones(5), size=3)
+    stacked = calculate_topsis(X, W, weight_usage)
+    for k in range(3):
+        for actual, expected in zip(stacked, calculate_topsis(X, W[k], weight_usage)):
+            np.testing.assert_allclose(actual[k], expected, rtol=1e-12)
+
+
+@pytest.mark.parametrize("weight_usage", WEIGHT_USAGES)
+@pytest.mark.parametrize("block_rows, workers", [(1, 1), (13, None), (512, 2)])
+def test_topsis_chunked_matches(rng, weight_usage, block_rows, workers):
+    X = rng.random((777, 8))
+    W = rng.dirichlet(np.ones(8), size=2)
+    expected = calculate_topsis(X, W, weight_usage)
+    chunked = calculate_topsis_chunked(X, W, weight_usage, block_rows=block_rows, workers=workers)
+    for actual, reference in zip(chunked, expected):
+        np.testing.assert_allclose(actual, reference, rtol=1e-12)
+
+
+def test_topsis_chunked_without_weighted_matrix(rng):
+    X = rng.random((100, 4))
+    w = rng.dirichlet(np.ones(4))
+    *results, weighted = calculate_topsis_chunked(X, w, block_rows=16, return_weighted=False)
+    assert weighted is None
+    for actual, expected in zip(results, calculate_topsis(X, w)):
+        np.testing.assert_allclose(actual, expected, rtol=1e-12)
+
+
+def test_topsis_identical_rows_give_zero_closeness():
+    _, _, closeness, _ = calculate_topsis(np.ones((4, 3)), np.full(3, 1 / 3))
+    np.testing.assert_array_equal(closeness, np.zeros(4))
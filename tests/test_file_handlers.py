@@ -0,0 +1,107 @@
+import io
+import zipfile
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+import pytest
+
+from benchmarks.generators import make_export_tables
+from utils import file_handlers
+from utils.file_handlers import EXPORT_FORMATS, export_tables
+
+
+def read_export(content, fmt):
+    """读回导出文件，返回 {表名: DataFrame}"""
+    if fmt == "xlsx":
+        return pd.read_excel(io.BytesIO(content), sheet_name=None)
+    tables = {}
+    with zipfile.ZipFile(io.BytesIO(content)) as archive:
+        for info in archive.infolist():
+            name, _, extension = info.filename.rpartition(".")
+            data = archive.read(info)
+            if extension == "parquet":
+                tables[name] = pq.read_table(io.BytesIO(data)).to_pandas()
+            elif extension == "arrow":
+                tables[name] = pa.ipc.open_file(pa.BufferReader(data)).read_all().to_pandas()
+            else:
+                assert data.startswith("\ufeff".encode("utf-8"))
+                tables[name] = pd.read_csv(io.BytesIO(data), encoding="utf-8-sig")
+    return tables
+
+
+@pytest.mark.parametrize("fmt", list(EXPORT_FORMATS))
+def test_round_trip(fmt):
+    tables = make_export_tables(300, 5)
+    result = read_export(export_tables(tables, fmt, chunk_rows=64), fmt)
+    assert list(result) == list(tables)
+    for name, df in tables.items():
+        pd.testing.assert_frame_equal(result[name], df, check_dtype=False)
+
+
+@pytest.mark.parametrize("fmt", ["parquet", "arrow"])
+def test_numeric_columns_keep_their_types(fmt):
+    df = pd.DataFrame({"整数": np.arange(10), "小数": np.linspace(0, 1, 10), "布尔": np.arange(10) % 2 == 0})
+    result = read_export(export_tables({"表": df}, fmt, chunk_rows=3), fmt)["表"]
+    pd.testing.assert_frame_equal(result, df)
+
+
+@pytest.mark.parametrize("fmt", ["parquet", "arrow", "csv"])
+def test_object_and_tuple_columns(fmt):
+    df = pd.DataFrame({
+        "方案": ["甲", None, "丙", "丁"],
+        "组合": [(1, 2), (3, 4), None, (5,)],
+        "混合": [1, "二", 3.5, None],
+    })
+    result = read_export(export_tables({"表": df}, fmt, chunk_rows=2), fmt)["表"]
+    assert result["方案"].tolist()[0] == "甲" and result["方案"].tolist()[2:] == ["丙", "丁"]
+    assert pd.isna(result["方案"][1])
+    assert result["组合"].tolist()[:2] == ["(1, 2)", "(3, 4)"] and pd.isna(result["组合"][2])
+    assert result["混合"].tolist()[:3] == ["1", "二", "3.5"] and pd.isna(result["混合"][3])
+
+
+@pytest.mark.parametrize("fmt", ["parquet", "arrow"])
+def test_missing_chunk_keeps_schema(fmt):
+    df = pd.DataFrame({"名称": [None, None, "甲", "乙"], "值": [1.0, 2.0, np.nan, 4.0]})
+    result = read_export(export_tables({"表": df}, fmt, chunk_rows=2), fmt)["表"]
+    assert result["名称"].tolist()[2:] == ["甲", "乙"]
+    assert result["名称"][:2].isna().all()
+
+
+def test_named_index_is_exported():
+    df = pd.DataFrame({"得分": [0.3, 0.7]}, index=pd.Index(["甲", "乙"], name="方案"))
+    result = read_export(export_tables({"表": df}, "parquet"), "parquet")["表"]
+    assert result.columns.tolist() == ["方案", "得分"]
+    assert result["方案"].tolist() == ["甲", "乙"]
+
+
+def test_empty_table():
+    df = pd.DataFrame({"值": pd.Series([], dtype=float)})
+    result = read_export(export_tables({"空表": df}, "parquet"), "parquet")["空表"]
+    assert result.empty and result.columns.tolist() == ["值"]
+
+
+def test_xlsx_row_limit(monkeypatch):
+    monkeypatch.setattr(file_handlers, "XLSX_MAX_ROWS", 10)
+    export_tables({"表": pd.DataFrame({"值": range(10)})}, "xlsx")
+    with pytest.raises(ValueError, match="最大行数"):
+        export_tables({"表": pd.DataFrame({"值": range(11)})}, "xlsx")
+    export_tables({"表": pd.DataFrame({"值": range(11)})}, "parquet")
+
+
+def test_xlsx_column_limit(monkeypatch):
+    monkeypatch.setattr(file_handlers, "XLSX_MAX_COLUMNS", 3)
+    with pytest.raises(ValueError, match="最大列数"):
+        export_tables({"表": pd.DataFrame(np.ones((2, 4)))}, "xlsx")
+
+
+def test_long_sheet_names_are_truncated():
+    name = "很长的表名" * 10
+    result = read_export(export_tables({name: pd.DataFrame({"值": [1]})}, "xlsx"), "xlsx")
+    assert list(result) == [name[:31]]
+
+
+def test_unknown_format():
+    with pytest.raises(ValueError, match="未知的导出格式"):
+        export_tables({"表": pd.DataFrame({"值": [1]})}, "json")
@@ -0,0 +1,61 @@
+import numpy as np
+import pytest
+
+from benchmarks.generators import make_ahp_matrices, make_fuzzy_matrices
+from utils.ahp_calculator import calculate_consistency, calculate_weights_geometric
+from utils.fuzzy_ahp import (
+    calculate_fuzzy_ahp,
+    calculate_fuzzy_weights,
+    defuzzify_centroid,
+    fuzzy_reciprocal,
+)
+
+
+def loop_buckley(F):
+    """逐行、逐分量计算Buckley几何平均模糊权重"""
+    n = F.shape[0]
+    r = np.array([[np.prod(F[i, :, c]) ** (1 / n) for c in range(3)] for i in range(n)])
+    total = r.sum(axis=0)
+    return np.array([[r[i, 0] / total[2], r[i, 1] / total[1], r[i, 2] / total[0]] for i in range(n)])
+
+
+@pytest.mark.parametrize("n", [3, 6])
+def test_fuzzy_weights_match_loop(n):
+    for F in make_fuzzy_matrices(3, n):
+        W = calculate_fuzzy_weights(F)
+        np.testing.assert_allclose(W, loop_buckley(F), rtol=1e-12)
+        assert np.all(W[:, 0] <= W[:, 1]) and np.all(W[:, 1] <= W[:, 2])
+
+
+def test_generated_matrices_are_fuzzy_reciprocal():
+    F = make_fuzzy_matrices(2, 5)
+    np.testing.assert_allclose(np.swapaxes(F, 1, 2), fuzzy_reciprocal(F), rtol=1e-12)
+
+
+def test_crisp_matrix_matches_geometric_weights():
+    A = make_ahp_matrices(3, 5)
+    F = np.stack([A, A, A], axis=-1)
+    fuzzy_w, w, lambda_max, CI, CR = calculate_fuzzy_ahp(F)
+
+    expected = calculate_weights_geometric(A)
+    np.testing.assert_allclose(fuzzy_w, np.repeat(expected[..., np.newaxis], 3, axis=-1), rtol=1e-12)
+    np.testing.assert_allclose(w, expected, rtol=1e-12)
+    np.testing.assert_allclose((lambda_max, CI, CR), calculate_consistency(A, expected), rtol=1e-12)
+
+
+def test_batch_matches_single():
+    F = make_fuzzy_matrices(4, 6)
+    batch = calculate_fuzzy_ahp(F)
+    for k in range(len(F)):
+        for actual, expected in zip(batch, calculate_fuzzy_ahp(F[k])):
+            np.testing.assert_allclose(actual[k], expected, rtol=1e-12)
+
+
+def test_defuzzify_centroid():
+    fuzzy_w = np.array([[0.1, 0.2, 0.3], [0.5, 0.6, 1.0]])
+    np.testing.assert_allclose(defuzzify_centroid(fuzzy_w), np.array([0.2, 0.7]) / 0.9)
+
+
+def test_bad_shape_is_rejected():
+    with pytest.raises(ValueError, match="模糊判断矩阵"):
+        calculate_fuzzy_weights(np.ones((3, 3, 2)))
@@ -0,0 +1,96 @@
+"""页面冒烟测试：用AppTest上传生成的文件、点击计算，检查没有异常和错误信息"""
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from benchmarks import generators
+
+AppTest = pytest.importorskip("streamlit.testing.v1").AppTest
+
+PAGES_DIR = Path(__file__).resolve().parent.parent / "pages"
+
+XLSX_MIME = "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+
+RUN_TIMEOUT = 120
+
+
+@pytest.fixture(autouse=True)
+def run_store(tmp_path, monkeypatch):
+    monkeypatch.setenv("GREEN_TOWN_RUN_STORE", str(tmp_path / "runs"))
+
+
+def run(at):
+    at.run(timeout=RUN_TIMEOUT)
+    assert not at.exception, [e.message for e in at.exception]
+    assert not at.error, [e.value for e in at.error]
+    return at
+
+
+def open_page(filename, key, content):
+    at = run(AppTest.from_file(str(PAGES_DIR / filename), default_timeout=RUN_TIMEOUT))
+    at.file_uploader(key=key).upload("upload.xlsx", content, XLSX_MIME)
+    return run(at)
+
+
+@pytest.mark.parametrize("method", ["几何平均", "算术平均"])
+def test_ahp_page(method):
+    at = open_page("3_AHP.py", "ahp_file", generators.make_ahp_workbook(5))
+    assert not at.button(key="ahp_compute").disabled
+    at.radio(key="ahp_method").set_value(method)
+    at.button(key="ahp_compute").click()
+    run(at)
+
+    weights = at.session_state.weights
+    assert len(weights) == 5
+    assert np.sum(weights) == pytest.approx(1.0)
+
+
+def test_ahp_page_blocks_non_reciprocal_matrix():
+    A = generators.make_ahp_matrices(1, 4)[0]
+    A[0, 2] = A[2, 0] = 3.0
+    at = AppTest.from_file(str(PAGES_DIR / "3_AHP.py"), default_timeout=RUN_TIMEOUT).run()
+    at.file_uploader(key="ahp_file").upload(
+        "upload.xlsx", generators.make_workbook(pd.DataFrame(A), header=False), XLSX_MIME
+    )
+    at.run(timeout=RUN_TIMEOUT)
+    assert not at.exception
+    assert at.button(key="ahp_compute").disabled
+
+
+def test_entropy_page():
+    at = open_page("4_熵权法.py", "entropy_file", generators.make_workbook(generators.make_indicator_data(40, 6)))
+    at.selectbox(key="type_1").set_value("min")
+    run(at)
+    at.button(key="entropy_compute").click()
+    run(at)
+
+    assert at.session_state.indicator_types[1] == "min"
+    assert at.session_state.result_df is not None
+    at.radio(key="entropy_format").set_value("parquet")
+    run(at)
+
+
+@pytest.mark.parametrize("method_index", [0, 1])
+def test_combination_page(method_index):
+    at = open_page("5_组合权重.py", "combination_file", generators.make_weight_workbook(6))
+    methods = at.radio(key="combination_method_choice").options
+    at.radio(key="combination_method_choice").set_value(methods[method_index])
+    run(at)
+    at.button(key="combination_compute").click()
+    run(at)
+
+    combined = np.asarray(at.session_state.combined_weights)
+    assert combined.shape[-1] == 6
+    assert combined.sum(axis=-1) == pytest.approx(1.0)
+
+
+def test_score_page():
+    at = open_page("6_综合得分.py", "score_file", generators.make_score_workbook(30, 5))
+    at.button(key="score_compute").click()
+    run(at)
+
+    assert at.session_state.final_result is not None
+    at.radio(key="score_format").set_value("csv")
+    run(at)
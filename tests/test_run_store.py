@@ -0,0 +1,126 @@
+import sqlite3
+from datetime import datetime, timedelta
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from utils.artifacts import SCORES, WEIGHTS, Artifact
+from utils.run_store import RunStore, data_hash
+
+
+@pytest.fixture
+def store(tmp_path):
+    return RunStore(tmp_path / "runs")
+
+
+def make_artifact(run_id, kind, data, columns=None):
+    return Artifact(
+        run_id=run_id, kind=kind, name="测试", source="单元测试", data=data,
+        labels=tuple(f"项{i + 1}" for i in range(data.shape[0])), columns=columns, meta={"n": data.shape[0]}
+    )
+
+
+def test_data_hash_is_stable(rng):
+    X = rng.random((5, 3))
+    df = pd.DataFrame(X, columns=["a", "b", "c"])
+    assert data_hash(X) == data_hash(X.copy()) == data_hash(X.tolist())
+    assert data_hash(X) != data_hash(X.T)
+    assert data_hash(X) != data_hash(X.ravel())
+    assert data_hash(df) == data_hash(df.copy())
+    assert data_hash(df) != data_hash(df.rename(columns={"a": "x"}))
+    assert data_hash(X, df) != data_hash(df, X)
+
+
+def test_save_and_load_round_trip(store, rng):
+    weights = rng.dirichlet(np.ones(4))
+    matrix = rng.random((6, 4))
+    tables = {
+        "权重": pd.DataFrame({"指标": list("ABCD"), "权重": weights}),
+        "得分": pd.DataFrame(matrix, columns=[1, 2, 3, 4]),
+    }
+    run_id = store.save_run(
+        "熵权法", "TOPSIS", data_hash(matrix), params={"weight_usage": "两者都用"},
+        saved_artifacts=[make_artifact("r1", WEIGHTS, weights), make_artifact("r1", SCORES, matrix, tuple("ABCD"))],
+        tables=tables, name="第一次"
+    )
+
+    run = store.load_run(run_id)
+    assert (run.page, run.method, run.name) == ("熵权法", "TOPSIS", "第一次")
+    assert run.params == {"weight_usage": "两者都用"}
+    assert run.data_hash == data_hash(matrix)
+
+    saved = {a.kind: a for a in run.artifacts()}
+    assert isinstance(saved[WEIGHTS].data, np.memmap)
+    np.testing.assert_array_equal(saved[WEIGHTS].data, weights)
+    np.testing.assert_array_equal(saved[SCORES].data, matrix)
+    assert saved[SCORES].labels == tuple(f"项{i + 1}" for i in range(6))
+    assert saved[SCORES].columns == tuple("ABCD")
+    assert saved[WEIGHTS].columns is None
+    assert saved[WEIGHTS].meta == {"n": 4}
+    assert run.artifacts() is run.artifacts()
+
+    assert run.table_names == ["权重", "得分"]
+    pd.testing.assert_frame_equal(run.table("权重"), tables["权重"])
+    np.testing.assert_array_equal(run.table("得分").values, matrix)
+    assert list(run.table("得分").columns) == ["1", "2", "3", "4"]
+
+
+def test_tables_are_read_on_demand(store):
+    run_id = store.save_run(
+        "综合得分", "加权求和", "h",
+        tables={"甲": pd.DataFrame({"x": [1, 2]}), "乙": pd.DataFrame({"y": [3.0]})}
+    )
+    run = store.load_run(run_id)
+    assert run._tables == {}
+
+    # 未访问的表即使文件已不存在也不影响其他表的读取
+    (store.root / run_id / "table_1.parquet").unlink()
+    assert run.table("甲")["x"].tolist() == [1, 2]
+    assert list(run._tables) == ["甲"]
+    assert run.table("甲") is run.table("甲")
+
+
+def test_list_runs_filters(store):
+    ids = {
+        "a": store.save_run("AHP", "几何平均法", "h1"),
+        "b": store.save_run("AHP", "算术平均法", "h2"),
+        "c": store.save_run("熵权法", "TOPSIS", "h1"),
+    }
+    with sqlite3.connect(store.db_path) as conn:
+        old = (datetime.now() - timedelta(days=10)).isoformat(timespec="seconds")
+        conn.execute("UPDATE runs SET created_at = ? WHERE run_id = ?", (old, ids["a"]))
+
+    assert set(store.list_runs()["run_id"]) == set(ids.values())
+    assert store.list_runs()["run_id"].iloc[-1] == ids["a"]
+    assert set(store.list_runs(page="AHP")["run_id"]) == {ids["a"], ids["b"]}
+    assert store.list_runs(page="AHP", method="算术平均法")["run_id"].tolist() == [ids["b"]]
+    assert set(store.list_runs(data_hash="h1")["run_id"]) == {ids["a"], ids["c"]}
+    since = datetime.now() - timedelta(days=7)
+    assert set(store.list_runs(since=since)["run_id"]) == {ids["b"], ids["c"]}
+    assert store.list_runs(until=since)["run_id"].tolist() == [ids["a"]]
+    assert len(store.list_runs(limit=1)) == 1
+    assert store.list_runs(page="不存在").empty
+
+    assert store.methods() == ["TOPSIS", "几何平均法", "算术平均法"]
+    assert store.methods("AHP") == ["几何平均法", "算术平均法"]
+
+
+def test_delete_run(store, rng):
+    run_id = store.save_run(
+        "AHP", "几何平均法", "h", saved_artifacts=[make_artifact("r", WEIGHTS, rng.random(3))],
+        tables={"权重": pd.DataFrame({"w": [1.0]})}
+    )
+    keep = store.save_run("AHP", "几何平均法", "h")
+    store.delete_run(run_id)
+
+    assert store.load_run(run_id) is None
+    assert not (store.root / run_id).exists()
+    assert store.list_runs()["run_id"].tolist() == [keep]
+    with sqlite3.connect(store.db_path) as conn:
+        assert conn.execute("SELECT COUNT(*) FROM artifacts").fetchone()[0] == 0
+        assert conn.execute("SELECT COUNT(*) FROM result_tables").fetchone()[0] == 0
+
+
+def test_missing_run(store):
+    assert store.load_run("不存在") is None
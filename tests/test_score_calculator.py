@@ -0,0 +1,142 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from utils.score_calculator import (
+    calculate_scores,
+    calculate_scores_chunked,
+    kendall_tau_matrix,
+    kendall_w,
+    rank_scores,
+    score_scenarios,
+    top_k_indices,
+)
+
+
+def loop_scores(X, w):
+    """逐方案加权求和（原综合得分页面的写法）"""
+    w = w / np.sum(w)
+    scores = np.zeros(X.shape[0])
+    for i in range(X.shape[0]):
+        for j in range(X.shape[1]):
+            scores[i] += X[i, j] * w[j]
+    return scores
+
+
+def loop_kendall_tau(x, y):
+    """逐对比较计算Kendall τ-b"""
+    n = len(x)
+    concordant = discordant = ties_x = ties_y = 0
+    for i in range(n):
+        for j in range(i + 1, n):
+            dx = np.sign(x[i] - x[j])
+            dy = np.sign(y[i] - y[j])
+            if dx == 0 and dy == 0:
+                continue
+            if dx == 0:
+                ties_x += 1
+            elif dy == 0:
+                ties_y += 1
+            elif dx == dy:
+                concordant += 1
+            else:
+                discordant += 1
+    denom = np.sqrt((concordant + discordant + ties_x) * (concordant + discordant + ties_y))
+    return (concordant - discordant) / denom if denom else np.nan
+
+
+def test_scores_match_loop(rng):
+    X = rng.random((200, 7))
+    w = rng.random(7)
+    np.testing.assert_allclose(calculate_scores(X, w)[0], loop_scores(X, w), rtol=1e-12)
+
+
+def test_scenario_scores_match_loop(rng):
+    X = rng.random((150, 6))
+    W = rng.random((4, 6))
+    scores = calculate_scores(X, W)
+    assert scores.shape == (4, 150)
+    for s in range(4):
+        np.testing.assert_allclose(scores[s], loop_scores(X, W[s]), rtol=1e-12)
+
+
+@pytest.mark.parametrize("block_rows, workers", [(1, 1), (7, None), (64, 2), (100000, None)])
+def test_chunked_scores_match(rng, block_rows, workers):
+    X = rng.random((1003, 30))
+    W = rng.random((3, 30))
+    expected = calculate_scores(X, W)
+    chunked = calculate_scores_chunked(X, W, block_rows=block_rows, workers=workers)
+    np.testing.assert_allclose(chunked, expected, rtol=1e-12)
+
+
+def test_weight_count_mismatch(rng):
+    with pytest.raises(ValueError, match="不一致"):
+        calculate_scores(rng.random((5, 3)), np.ones(4))
+    with pytest.raises(ValueError, match="不一致"):
+        calculate_scores_chunked(rng.random((5, 3)), np.ones(4))
+
+
+def test_non_positive_weight_sum():
+    with pytest.raises(ValueError, match="之和必须大于0"):
+        calculate_scores(np.ones((3, 2)), np.zeros(2))
+
+
+def test_ranks_match_pandas(rng):
+    scores = rng.random((3, 50))
+    expected = pd.DataFrame(scores.T).rank(ascending=False, method="first").astype(int).values.T
+    np.testing.assert_array_equal(rank_scores(scores), expected)
+
+
+def test_ranks_break_ties_by_position():
+    np.testing.assert_array_equal(rank_scores(np.array([0.5, 0.9, 0.5, 0.1])), [[2, 1, 3, 4]])
+
+
+@pytest.mark.parametrize("k", [1, 5, 40, 100])
+def test_top_k_matches_argsort(rng, k):
+    scores = rng.random((4, 40))
+    expected = np.argsort(-scores, axis=1, kind="stable")[:, :min(k, 40)]
+    np.testing.assert_array_equal(top_k_indices(scores, k), expected)
+
+
+@pytest.mark.parametrize("n", [2, 3, 17, 100])
+@pytest.mark.parametrize("ties", [False, True])
+def test_kendall_tau_matches_loop(rng, n, ties):
+    scores = rng.random((4, n))
+    if ties:
+        scores = np.round(scores * 3)
+    tau = kendall_tau_matrix(scores)
+    for i in range(4):
+        assert tau[i, i] == 1
+        for j in range(4):
+            if i != j:
+                expected = loop_kendall_tau(scores[i], scores[j])
+                np.testing.assert_allclose(tau[i, j], expected, rtol=1e-12, equal_nan=True)
+
+
+def test_kendall_tau_constant_scenario_is_nan(rng):
+    scores = np.vstack([rng.random(10), np.ones(10)])
+    assert np.isnan(kendall_tau_matrix(scores)[0, 1])
+
+
+def test_kendall_tau_single_alternative():
+    np.testing.assert_array_equal(kendall_tau_matrix(np.ones((3, 1))), np.eye(3))
+
+
+def test_kendall_w(rng):
+    scores = rng.random((5, 30))
+    np.testing.assert_allclose(kendall_w(np.vstack([scores[0]] * 4)), 1.0)
+
+    R = rank_scores(scores).astype(float)
+    m, n = R.shape
+    expected = 12 * np.sum((R.sum(axis=0) - m * (n + 1) / 2) ** 2) / (m ** 2 * (n ** 3 - n))
+    assert kendall_w(scores) == pytest.approx(expected)
+
+
+def test_score_scenarios_labels(rng):
+    score_df, rank_df, tau_df = score_scenarios(
+        rng.random((6, 3)), rng.random((2, 3)), scenario_names=["甲", "乙"]
+    )
+    assert list(score_df.index) == ["甲", "乙"]
+    assert list(score_df.columns) == [f"方案{i + 1}" for i in range(6)]
+    assert rank_df.shape == (2, 6)
+    assert list(tau_df.columns) == ["甲", "乙"]
@@ -0,0 +1,47 @@
+"""评价计算核心
+
+子模块在首次访问时才导入（PEP 562），``import utils`` 本身不加载NumPy、pandas等依赖：
+
+    import utils
+    weights = utils.ahp_calculator.calculate_weights_geometric(A)
+
+页面仍按 ``from utils.xxx import yyy`` 直接导入所需子模块；
+utils.warmup.start_prewarm() 在后台线程中预先导入全部子模块及其依赖。
+"""
+import importlib
+
+# 纯计算模块（不依赖Streamlit，可在脚本和评分服务中使用）
+CORE_MODULES = (
+    "ahp_calculator",
+    "chunking",
+    "combination_calculator",
+    "ewm_calculator",
+    "file_handlers",
+    "fuzzy_ahp",
+    "mcdm_engine",
+    "score_calculator",
+    "strategy",
+    "validation",
+)
+
+# 页面辅助模块（依赖Streamlit）
+UI_MODULES = (
+    "artifacts",
+    "display",
+    "instrumentation",
+    "run_store",
+)
+
+__all__ = list(CORE_MODULES + UI_MODULES + ("warmup",))
+
+
+def __getattr__(name):
+    if name in __all__:
+        module = importlib.import_module(f"{__name__}.{name}")
+        globals()[name] = module
+        return module
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+def __dir__():
+    return sorted(set(globals()) | set(__all__))
@@ -0,0 +1,192 @@
+import numpy as np
+
+# 定义RI字典
+RI_dict = {
+    1: 0, 2: 0, 3: 0.52, 4: 0.89, 5: 1.12, 6: 1.26, 7: 1.36,
+    8: 1.41, 9: 1.46, 10: 1.49, 11: 1.52, 12: 1.54, 13: 1.56,
+    14: 1.58, 15: 1.59, 16: 1.5943, 17: 1.6064, 18: 1.6133,
+    19: 1.6207, 20: 1.6292
+}
+
+# Saaty 1-9 标度
+SAATY_SCALE = np.array([1 / 9, 1 / 8, 1 / 7, 1 / 6, 1 / 5, 1 / 4, 1 / 3, 1 / 2,
+                        1, 2, 3, 4, 5, 6, 7, 8, 9])
+
+# 一致性修正时每批候选矩阵的元素上限，控制临时内存
+_REPAIR_CHUNK_ELEMENTS = 1 << 22
+
+
+def _as_stack(matrix):
+    """将判断矩阵整理为 (k, n, n) 形状，并返回是否为单个矩阵"""
+    A = np.asarray(matrix, dtype=np.float64)
+    if A.ndim == 2:
+        return A[np.newaxis], True
+    if A.ndim != 3 or A.shape[-1] != A.shape[-2]:
+        raise ValueError("判断矩阵必须是 (n, n) 或 (k, n, n) 形状的方阵")
+    return A, False
+
+
+def reciprocal_mask(matrix, atol=1e-5):
+    """标记上三角中不满足 a_ij = 1/a_ji 的位置，返回与输入同形状的布尔数组"""
+    A, single = _as_stack(matrix)
+    n = A.shape[-1]
+    with np.errstate(divide="ignore", invalid="ignore"):
+        mismatch = ~np.isclose(A, 1 / np.swapaxes(A, -1, -2), atol=atol)
+    mismatch &= np.triu(np.ones((n, n), dtype=bool), k=1)
+    return mismatch[0] if single else mismatch
+
+
+def check_reciprocal(matrix, atol=1e-5):
+    """检查矩阵是否为互反矩阵（支持批量输入）"""
+    mismatch = reciprocal_mask(matrix, atol=atol)
+    return ~np.any(mismatch, axis=(-1, -2))
+
+
+def calculate_weights_geometric(matrix):
+    """几何平均法计算权重"""
+    A, single = _as_stack(matrix)
+    n = A.shape[-1]
+    row_products = np.prod(A, axis=-1)
+    W = np.power(row_products, 1 / n)
+    W = W / np.sum(W, axis=-1, keepdims=True)
+    return W[0] if single else W
+
+
+def calculate_weights_arithmetic(matrix):
+    """算术平均法计算权重"""
+    A, single = _as_stack(matrix)
+    col_sums = np.sum(A, axis=-2, keepdims=True)
+    W = np.mean(A / col_sums, axis=-1)
+    return W[0] if single else W
+
+
+def calculate_consistency(matrix, weights):
+    """计算一致性指标，返回 (λ_max, CI, CR)
+
+    n≤2 时判断矩阵总是一致的，CI、CR取0。
+    """
+    A, single = _as_stack(matrix)
+    W = np.atleast_2d(np.asarray(weights, dtype=np.float64))
+    n = A.shape[-1]
+
+    AW = np.einsum('kij,kj->ki', A, W)
+    lambda_max = np.mean(AW / W, axis=-1)
+    if n > 2:
+        CI = (lambda_max - n) / (n - 1)
+        CR = CI / RI_dict[n]
+    else:
+        CI = np.zeros_like(lambda_max)
+        CR = np.zeros_like(lambda_max)
+
+    if single:
+        return lambda_max[0], CI[0], CR[0]
+    return lambda_max, CI, CR
+
+
+def format_saaty(value):
+    """将判断值格式化为Saaty标度的写法（如 3、1/5），非标度值保留4位有效数字"""
+    if value >= 1:
+        return str(int(round(value))) if np.isclose(value, round(value)) else f"{value:.4g}"
+    inverse = 1 / value
+    return f"1/{int(round(inverse))}" if np.isclose(inverse, round(inverse)) else f"{value:.4g}"
+
+
+def _consistency_ratio(A, weight_method):
+    """批量计算权重和CR"""
+    W = weight_method(A)
+    return W, calculate_consistency(A, W)[2]
+
+
+def _best_edits(A, W, CR, edited, candidates, weight_method):
+    """对每个矩阵尝试修改偏离最大的若干判断，返回使CR最小的 (行, 列, 新值, 新CR)"""
+    m, n, _ = A.shape
+    rows, cols = np.triu_indices(n, k=1)
+    t = min(candidates, len(rows))
+    S = len(SAATY_SCALE)
+
+    # 判断 a_ij 与权重比 w_i/w_j 的偏离程度，已修改过的判断不再修改
+    deviation = np.abs(np.log(A[:, rows, cols] * W[:, cols] / W[:, rows]))
+    deviation[edited[:, rows, cols]] = -np.inf
+    top = np.argpartition(-deviation, t - 1, axis=1)[:, :t]
+    ci, cj = rows[top], cols[top]
+
+    # 构造全部候选矩阵：(矩阵, 候选判断, 标度取值, n, n)
+    trial = np.broadcast_to(A[:, np.newaxis, np.newaxis], (m, t, S, n, n)).copy()
+    mi = np.arange(m)[:, np.newaxis, np.newaxis]
+    ti = np.arange(t)[np.newaxis, :, np.newaxis]
+    si = np.arange(S)[np.newaxis, np.newaxis, :]
+    trial[mi, ti, si, ci[..., np.newaxis], cj[..., np.newaxis]] = SAATY_SCALE
+    trial[mi, ti, si, cj[..., np.newaxis], ci[..., np.newaxis]] = 1 / SAATY_SCALE
+
+    trial_CR = _consistency_ratio(trial.reshape(-1, n, n), weight_method)[1].reshape(m, t, S)
+    current = A[np.arange(m)[:, np.newaxis], ci, cj][..., np.newaxis]
+    unchanged = np.isclose(SAATY_SCALE, current)
+    invalid = np.take_along_axis(deviation, top, axis=1) == -np.inf
+    trial_CR = np.where(unchanged | invalid[..., np.newaxis], np.inf, trial_CR)
+
+    best = np.argmin(trial_CR.reshape(m, -1), axis=1)
+    best_t, best_s = np.divmod(best, S)
+    picked = np.arange(m)
+    return ci[picked, best_t], cj[picked, best_t], SAATY_SCALE[best_s], trial_CR[picked, best_t, best_s]
+
+
+def repair_consistency(matrix, threshold=0.1, max_edits=None, candidates=3,
+                       weight_method=calculate_weights_geometric):
+    """自动修正判断矩阵，使CR低于阈值（支持批量输入）
+
+    贪心迭代：每轮对每个CR不达标的矩阵，取偏离权重比 w_i/w_j 最大的 candidates 个
+    上三角判断，逐一尝试Saaty标度的全部取值（互反位置同时修改），采用使CR最小的
+    一处修改；直到CR低于阈值、达到修改次数上限，或任何单处修改都不能再降低CR。
+    所有矩阵在同一轮中一起向量化计算。
+
+    返回 (修正后的矩阵, 修正后的CR, 修改记录)。修改记录为数组字典：
+    matrix、row、col（均从0开始）、old、new、CR（该次修改后的CR），按修改顺序排列。
+    """
+    A, single = _as_stack(matrix)
+    A = A.copy()
+    k, n, _ = A.shape
+    if max_edits is None:
+        max_edits = n * (n - 1) // 2
+
+    W, CR = _consistency_ratio(A, weight_method)
+    edited = np.zeros(A.shape, dtype=bool)
+    n_edits = np.zeros(k, dtype=int)
+    active = (CR >= threshold) & (n_edits < max_edits)
+    chunk = max(1, _REPAIR_CHUNK_ELEMENTS // (candidates * len(SAATY_SCALE) * n * n))
+    records = []
+
+    while np.any(active):
+        idx = np.flatnonzero(active)
+        results = [
+            _best_edits(A[part], W[part], CR[part], edited[part], candidates, weight_method)
+            for part in np.array_split(idx, max(1, -(-len(idx) // chunk)))
+        ]
+        i, j, value, new_CR = (np.concatenate(r) for r in zip(*results))
+
+        # 不能再降低CR的矩阵停止修正
+        improved = new_CR < CR[idx] - 1e-12
+        stuck = idx[~improved]
+        idx, i, j, value = idx[improved], i[improved], j[improved], value[improved]
+
+        records.append((idx, i, j, A[idx, i, j], value))
+        A[idx, i, j] = value
+        A[idx, j, i] = 1 / value
+        edited[idx, i, j] = edited[idx, j, i] = True
+        n_edits[idx] += 1
+        W[idx], CR[idx] = _consistency_ratio(A[idx], weight_method)
+        records[-1] += (CR[idx],)
+
+        active[stuck] = False
+        active[idx] = (CR[idx] >= threshold) & (n_edits[idx] < max_edits)
+
+    fields = ("matrix", "row", "col", "old", "new", "CR")
+    if records:
+        columns = [np.concatenate(values) for values in zip(*records)]
+        order = np.argsort(columns[0], kind="stable")
+        edits = {name: values[order] for name, values in zip(fields, columns)}
+    else:
+        edits = {name: np.array([], dtype=int if name in fields[:3] else float) for name in fields}
+
+    if single:
+        return A[0], CR[0], edits
+    return A, CR, edits
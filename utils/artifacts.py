@@ -0,0 +1,131 @@
+"""页面之间共享计算结果的内存制品库
+
+AHP、熵权法、组合权重和综合得分页面将权重向量、标准化矩阵和得分以
+NumPy数组发布到当前会话，下游页面直接选用，无需经由Excel下载再上传。
+"""
+import uuid
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Optional, Tuple
+
+import numpy as np
+import streamlit as st
+
+_STORE_KEY = "_artifact_store"
+
+# 制品类型
+WEIGHTS = "weights"
+STANDARDIZED = "standardized"
+SCORES = "scores"
+
+KIND_NAMES = {
+    WEIGHTS: "权重",
+    STANDARDIZED: "标准化矩阵",
+    SCORES: "综合得分",
+}
+
+
+@dataclass(frozen=True, eq=False)
+class Artifact:
+    """一次计算产生的结果
+
+    data 为只读数组：权重和得分为 (n,)，标准化矩阵为 (方案, 指标)；
+    labels 对应 data 的第一维，columns 对应矩阵的第二维。
+    """
+    run_id: str
+    kind: str
+    name: str
+    source: str
+    data: np.ndarray
+    labels: Tuple[str, ...]
+    columns: Optional[Tuple[str, ...]] = None
+    created_at: datetime = field(default_factory=datetime.now)
+    meta: dict = field(default_factory=dict)
+
+    @property
+    def title(self):
+        """用于下拉选择的显示名称"""
+        return f"{self.name}（{self.source}，{self.created_at:%H:%M:%S}，{self.run_id}）"
+
+
+def _store():
+    if _STORE_KEY not in st.session_state:
+        st.session_state[_STORE_KEY] = {}
+    return st.session_state[_STORE_KEY]
+
+
+def new_run_id():
+    """生成运行ID，同一次计算发布的多个制品共用一个ID"""
+    return f"{datetime.now():%Y%m%d%H%M%S}-{uuid.uuid4().hex[:6]}"
+
+
+def publish(run_id, kind, name, source, data, labels, columns=None, meta=None):
+    """发布制品；同一运行ID、同一类型的制品会被覆盖"""
+    if kind not in KIND_NAMES:
+        raise ValueError(f"未知的制品类型: {kind}")
+
+    array = np.array(data, dtype=np.float64)
+    array.setflags(write=False)
+    labels = tuple(str(label) for label in labels)
+    if len(labels) != array.shape[0]:
+        raise ValueError(f"标签数量({len(labels)})与数据行数({array.shape[0]})不一致!")
+    if columns is not None:
+        columns = tuple(str(col) for col in columns)
+        if array.ndim != 2 or len(columns) != array.shape[1]:
+            raise ValueError("列名数量与数据列数不一致!")
+
+    artifact = Artifact(
+        run_id=run_id,
+        kind=kind,
+        name=name,
+        source=source,
+        data=array,
+        labels=labels,
+        columns=columns,
+        meta=dict(meta or {})
+    )
+    _store()[(run_id, kind)] = artifact
+    return artifact
+
+
+def register(artifact):
+    """登记已有的制品（如从运行记录中载入的制品），数据不复制"""
+    _store()[(artifact.run_id, artifact.kind)] = artifact
+    return artifact
+
+
+def list_artifacts(kind=None):
+    """列出当前会话的制品（最新的在前）"""
+    artifacts = [a for a in _store().values() if kind is None or a.kind == kind]
+    return sorted(artifacts, key=lambda a: a.created_at, reverse=True)
+
+
+def get_artifact(run_id, kind):
+    """按运行ID和类型获取制品"""
+    return _store().get((run_id, kind))
+
+
+def _choices(kind):
+    """以运行ID为选项值（组件状态只保存字符串），返回 (选项, ID到制品的映射)"""
+    artifacts = {a.run_id: a for a in list_artifacts(kind)}
+    if not artifacts:
+        st.info(f"当前会话中还没有可用的{KIND_NAMES[kind]}，请先在相应页面完成计算")
+    return list(artifacts), artifacts
+
+
+def select_artifact(kind, label, key):
+    """下拉选择一个制品，没有可用制品时提示并返回None"""
+    options, artifacts = _choices(kind)
+    if not options:
+        return None
+    run_id = st.selectbox(label, options, format_func=lambda r: artifacts[r].title, key=key)
+    return artifacts.get(run_id)
+
+
+def select_artifacts(kind, label, key):
+    """多选制品"""
+    options, artifacts = _choices(kind)
+    if not options:
+        return []
+    run_ids = st.multiselect(label, options, format_func=lambda r: artifacts[r].title, key=key)
+    return [artifacts[r] for r in run_ids if r in artifacts]
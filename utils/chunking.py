@@ -0,0 +1,32 @@
+"""按行分块并行计算
+
+数百万个方案（如地块级评价）时，整体向量化计算会同时分配多个与数据同样大小的
+临时矩阵。分块计算按行块在线程池中执行（NumPy运算期间释放GIL），各块结果直接
+写入预先分配的输出数组，临时内存只与块大小成正比。本模块只依赖标准库。
+"""
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+# 每块的行数
+DEFAULT_BLOCK_ROWS = 32768
+
+
+def row_blocks(n_rows, block_rows=DEFAULT_BLOCK_ROWS):
+    """将 n_rows 行划分为连续的行块，返回切片列表"""
+    if block_rows < 1:
+        raise ValueError("每块行数必须大于0!")
+    return [slice(start, min(start + block_rows, n_rows)) for start in range(0, n_rows, block_rows)]
+
+
+def run_blocks(func, blocks, workers=None):
+    """对每个行块调用 func(block)，按块的顺序返回结果列表
+
+    只有一个块或 workers 为1时在当前线程中执行；workers 为 None 时取CPU核数。
+    """
+    if workers is None:
+        workers = os.cpu_count() or 1
+    workers = min(workers, len(blocks))
+    if workers <= 1:
+        return [func(block) for block in blocks]
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="row-block") as pool:
+        return list(pool.map(func, blocks))
@@ -0,0 +1,157 @@
+import numpy as np
+
+# 组合系数之和与1的允许误差
+COEFFICIENT_ATOL = 1e-6
+
+
+def _as_batch(weights):
+    """将权重数据整理为 (批次, 指标, 方法) 形状，并返回是否为单组数据"""
+    W = np.asarray(weights, dtype=np.float64)
+    if W.ndim == 2:
+        return W[np.newaxis], True
+    if W.ndim != 3:
+        raise ValueError("权重数据必须是 (指标, 方法) 或 (批次, 指标, 方法) 形状")
+    return W, False
+
+
+def _check_weights(W):
+    """权重数据不能包含缺失值或负数，每种方法的权重之和必须大于0"""
+    if not np.all(np.isfinite(W)):
+        raise ValueError("权重数据不能包含缺失值或无穷大!")
+    if np.any(W < 0):
+        raise ValueError("权重数据不能为负数!")
+    if np.any(np.sum(W, axis=-2) <= 0):
+        raise ValueError("每种方法的权重之和必须大于0!")
+
+
+def _normalize(W):
+    """沿指标方向归一化"""
+    return W / np.sum(W, axis=-1, keepdims=True)
+
+
+def _check_positive(W):
+    """乘法类方法要求权重全部为正数"""
+    if np.any(W <= 0):
+        raise ValueError("权重数据必须全部为正数!")
+
+
+def _prepare_coefficients(coefficients, batch, k):
+    """整理组合系数为 (批次, 方法) 形状；系数必须非负且之和为1"""
+    if coefficients is None:
+        return np.full((batch, k), 1.0 / k)
+
+    try:
+        C = np.broadcast_to(np.asarray(coefficients, dtype=np.float64), (batch, k))
+    except ValueError:
+        raise ValueError(f"组合系数的数量必须与权重方法数量({k})一致!")
+    if not np.all(np.isfinite(C)):
+        raise ValueError("组合系数不能包含缺失值或无穷大!")
+    if np.any(C < 0):
+        raise ValueError("组合系数不能为负数!")
+    sums = np.sum(C, axis=-1, keepdims=True)
+    bad = np.abs(sums - 1.0) > COEFFICIENT_ATOL
+    if np.any(bad):
+        raise ValueError(f"组合系数之和必须为1（当前为{sums[bad][0]:.6g}）!")
+    # 消除允许误差内的舍入偏差
+    return C / sums
+
+
+def _log_weighted_product(W, C):
+    """按系数计算对数加权乘积并归一化，避免多个小权重连乘下溢"""
+    log_w = np.einsum('bmk,bk->bm', np.log(W), C)
+    log_w -= np.max(log_w, axis=-1, keepdims=True)
+    return _normalize(np.exp(log_w))
+
+
+def multiplicative_combination(W, coefficients=None):
+    """乘法合成法：各方法权重连乘后归一化"""
+    _check_positive(W)
+    k = W.shape[-1]
+    return _log_weighted_product(W, np.ones((W.shape[0], k))), None
+
+
+def linear_combination(W, coefficients=None):
+    """线性加权组合法：按组合系数对各方法权重加权求和"""
+    C = _prepare_coefficients(coefficients, W.shape[0], W.shape[-1])
+    return _normalize(np.einsum('bmk,bk->bm', W, C)), C
+
+
+def _nonnegative_game_coefficients(gram, rhs):
+    """在 α ≥ 0 约束下求博弈论组合的最优系数
+
+    目标函数 αᵀGα - 2rᵀα 为凸二次函数，约束最优解等于其非零系数（支撑集）上的无约束最优解。
+    权重方法很少，从包含全部方法的支撑集开始逐一枚举，取系数全部非负且目标函数最小的解
+    （目标函数相同时保留方法较多的解）；所有批次同时计算。
+    全部方法的无约束解本身非负时，结果与直接求解相同。
+    """
+    batch, k = rhs.shape
+    best = np.zeros((batch, k))
+    best_value = np.full(batch, np.inf)
+    supports = [[j for j in range(k) if mask >> j & 1] for mask in range(1, 2 ** k)]
+    for support in sorted(supports, key=len, reverse=True):
+        alpha = np.zeros((batch, k))
+        # 使用伪逆求解，权重向量线性相关时仍可得到稳定解
+        sub_gram = gram[:, support][:, :, support]
+        alpha[:, support] = np.einsum('bij,bj->bi', np.linalg.pinv(sub_gram), rhs[:, support])
+
+        value = np.einsum('bi,bij,bj->b', alpha, gram, alpha) - 2 * np.einsum('bi,bi->b', rhs, alpha)
+        tolerance = COEFFICIENT_ATOL * np.sum(np.abs(alpha), axis=-1)
+        improvement = best_value - value
+        better = np.all(alpha >= -tolerance[:, np.newaxis], axis=-1) & (improvement > COEFFICIENT_ATOL * np.abs(value))
+        best[better] = alpha[better]
+        best_value[better] = value[better]
+    return np.maximum(best, 0.0)
+
+
+def game_theory_combination(W, coefficients=None):
+    """博弈论组合法：求解 Σα_j·w_i·w_j = w_i·w_i 得到最优组合系数
+
+    无约束解出现负系数时（各方法权重冲突），不取绝对值，而是在系数非负的约束下重新求最优解。
+    """
+    gram = np.einsum('bmi,bmj->bij', W, W)
+    rhs = np.diagonal(gram, axis1=1, axis2=2)
+
+    alpha = _nonnegative_game_coefficients(gram, rhs)
+    sums = np.sum(alpha, axis=-1, keepdims=True)
+    if not np.all(np.isfinite(alpha)) or np.any(sums <= 0):
+        raise ValueError("博弈论组合无法求得有效的组合系数，请检查权重数据或改用其他组合方法!")
+    alpha /= sums
+
+    return _normalize(np.einsum('bmk,bk->bm', W, alpha)), alpha
+
+
+def min_entropy_combination(W, coefficients=None):
+    """最小信息熵组合法：按组合系数计算加权几何平均后归一化"""
+    _check_positive(W)
+    C = _prepare_coefficients(coefficients, W.shape[0], W.shape[-1])
+    return _log_weighted_product(W, C), C
+
+
+COMBINATION_METHODS = {
+    "乘法合成": multiplicative_combination,
+    "线性加权": linear_combination,
+    "博弈论组合": game_theory_combination,
+    "最小信息熵": min_entropy_combination,
+}
+
+
+def combine_weights(weights, method="乘法合成", coefficients=None):
+    """计算组合权重
+
+    weights 形状为 (指标, 方法) 或 (批次, 指标, 方法)，批次维可为地区、
+    自助抽样次数等，所有批次在一次向量化计算中完成。
+
+    返回 (组合权重, 组合系数)，组合权重形状为 (指标,) 或 (批次, 指标)；
+    乘法合成法不使用组合系数，此时返回 None。
+    """
+    if method not in COMBINATION_METHODS:
+        raise ValueError(f"未知的组合方法: {method}")
+
+    W, single = _as_batch(weights)
+    _check_weights(W)
+    combined, C = COMBINATION_METHODS[method](W, coefficients)
+
+    if single:
+        combined = combined[0]
+        C = None if C is None else C[0]
+    return combined, C
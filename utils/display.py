@@ -0,0 +1,144 @@
+import math
+from datetime import datetime
+
+import numpy as np
+import plotly.graph_objects as go
+import streamlit as st
+
+from utils.file_handlers import EXPORT_FORMATS, export_tables
+from utils.instrumentation import stage
+
+# 每页显示的行数
+DEFAULT_PAGE_SIZE = 50
+# 数据量较大时的前N/后N条数
+DEFAULT_TOP_N = 20
+# 分布曲线最多绘制的点数
+MAX_DISTRIBUTION_POINTS = 2000
+
+
+def paged_dataframe(df, key, page_size=DEFAULT_PAGE_SIZE, fmt=None):
+    """分页显示数据表，仅对当前页的切片进行格式化"""
+    n_rows = len(df)
+    n_pages = max(1, math.ceil(n_rows / page_size))
+
+    page = 1
+    if n_pages > 1:
+        page = st.number_input(
+            "页码",
+            min_value=1,
+            max_value=n_pages,
+            value=1,
+            step=1,
+            key=f"{key}_page"
+        )
+        st.caption(f"共 {n_rows} 行，{n_pages} 页，每页 {page_size} 行")
+
+    start = (int(page) - 1) * page_size
+    page_df = df.iloc[start:start + page_size]
+
+    with stage("表格渲染", page_df):
+        if fmt is None:
+            st.dataframe(page_df)
+        else:
+            st.dataframe(page_df.style.format(fmt))
+
+
+def _bar_figure(labels, values, title):
+    """创建柱状图"""
+    fig = go.Figure(go.Bar(x=labels, y=values))
+    fig.update_layout(title=title, margin=dict(l=10, r=10, t=40, b=10))
+    return fig
+
+
+def ranking_chart(series, top_n=DEFAULT_TOP_N, max_points=MAX_DISTRIBUTION_POINTS):
+    """绘制方案得分图：数据量小时显示全部，数据量大时显示前N/后N及降采样分布"""
+    with stage("图表渲染", series):
+        _ranking_chart(series, top_n, max_points)
+
+
+def _ranking_chart(series, top_n, max_points):
+    values = series.to_numpy(dtype=np.float64)
+    labels = series.index.astype(str).to_numpy()
+    n = len(values)
+
+    if n <= 2 * top_n:
+        st.plotly_chart(_bar_figure(labels, values, ""), use_container_width=True)
+        return
+
+    # 使用argpartition选取前N/后N，避免对全部方案排序
+    top_idx = np.argpartition(-values, top_n)[:top_n]
+    top_idx = top_idx[np.argsort(-values[top_idx])]
+    bottom_idx = np.argpartition(values, top_n)[:top_n]
+    bottom_idx = bottom_idx[np.argsort(-values[bottom_idx])]
+
+    col1, col2 = st.columns(2)
+    with col1:
+        st.plotly_chart(
+            _bar_figure(labels[top_idx], values[top_idx], f"前{top_n}名"),
+            use_container_width=True
+        )
+    with col2:
+        st.plotly_chart(
+            _bar_figure(labels[bottom_idx], values[bottom_idx], f"后{top_n}名"),
+            use_container_width=True
+        )
+
+    # 按名次降采样的得分分布，使用WebGL绘制
+    sorted_values = np.sort(values)[::-1]
+    step = max(1, math.ceil(n / max_points))
+    ranks = np.arange(0, n, step)
+    if ranks[-1] != n - 1:
+        ranks = np.append(ranks, n - 1)
+
+    fig = go.Figure(go.Scattergl(x=ranks + 1, y=sorted_values[ranks], mode="lines"))
+    fig.update_layout(
+        title=f"得分分布（共{n}个方案，每{step}名取样）",
+        xaxis_title="名次",
+        yaxis_title="得分",
+        margin=dict(l=10, r=10, t=40, b=10)
+    )
+    st.plotly_chart(fig, use_container_width=True)
+
+
+def select_export_format(key):
+    """选择导出格式（xlsx、Parquet、Arrow IPC、CSV），返回格式代码"""
+    return st.radio(
+        "导出格式",
+        list(EXPORT_FORMATS),
+        format_func=lambda fmt: EXPORT_FORMATS[fmt][0],
+        horizontal=True,
+        key=f"{key}_format"
+    )
+
+
+def download_results(tables, prefix, key, fmt, source=None, data=None, label="下载结果"):
+    """在内存中导出结果并提供下载按钮
+
+    tables 为 {名称: DataFrame}，或返回该字典的函数（命中缓存时不调用）。
+    给出 source（本次计算结果对象）时，导出内容按 (source, 格式) 缓存在会话中，
+    页面重新运行时不再重复导出。data 仅用于记录导出耗时的数据规模。
+    """
+    cache_key = f"{key}_export"
+    cached = st.session_state.get(cache_key)
+    if source is not None and cached is not None and cached[0] is source and cached[1] == fmt:
+        content = cached[2]
+    else:
+        if callable(tables):
+            tables = tables()
+        try:
+            with stage(f"导出{fmt}", data):
+                content = export_tables(tables, fmt)
+        except ValueError as e:
+            st.error(str(e))
+            return
+        if source is not None:
+            st.session_state[cache_key] = (source, fmt, content)
+
+    _, extension, mime = EXPORT_FORMATS[fmt]
+    st.download_button(
+        label=label,
+        data=content,
+        file_name=f"{prefix}_{datetime.now().strftime('%Y%m%d_%H%M%S')}{extension}",
+        mime=mime,
+        key=f"{key}_download"
+    )
@@ -0,0 +1,193 @@
+import numpy as np
+
+from utils.chunking import DEFAULT_BLOCK_ROWS, row_blocks, run_blocks
+
+
+def standardize_data(data, indicator_types, optimal_ranges=None, method="极差法", non_negative_shift=0.01):
+    """标准化数据
+
+    data 形状为 (方案, 指标)；indicator_types 为各指标类型 "max"/"min"/"range"，
+    optimal_ranges 为适度指标的 (a, b) 区间。所有指标在一次向量化计算中完成。
+    """
+    X = np.asarray(data, dtype=np.float64)
+    n, m = X.shape
+    types = np.asarray(indicator_types)
+    if optimal_ranges is None:
+        optimal_ranges = [(None, None)] * m
+
+    col_min = np.min(X, axis=0)
+    col_max = np.max(X, axis=0)
+    spread = col_max - col_min
+    constant = spread == 0
+    safe_spread = np.where(constant, 1.0, spread)
+
+    standardized = np.ones_like(X)
+    is_max = (types == "max") & ~constant
+    is_min = (types == "min") & ~constant
+    standardized[:, is_max] = (X[:, is_max] - col_min[is_max]) / safe_spread[is_max]
+    standardized[:, is_min] = (col_max[is_min] - X[:, is_min]) / safe_spread[is_min]
+
+    # 适度指标：区间内为1，区间外按距离线性衰减
+    range_cols = np.flatnonzero(types == "range")
+    if len(range_cols):
+        bounds = [optimal_ranges[j] for j in range_cols]
+        missing = [j for j, (a, b) in zip(range_cols, bounds) if a is None or b is None]
+        if missing:
+            raise ValueError(f"第{missing[0] + 1}列是适度指标，但未设置有效范围")
+
+        a = np.array([bound[0] for bound in bounds], dtype=np.float64)
+        b = np.array([bound[1] for bound in bounds], dtype=np.float64)
+        col = X[:, range_cols]
+        denominator = np.maximum(a - col_min[range_cols], col_max[range_cols] - b)
+        safe_denominator = np.where(denominator == 0, 1.0, denominator)
+
+        values = np.ones_like(col)
+        values = np.where(col < a, 1 - (a - col) / safe_denominator, values)
+        values = np.where(col > b, 1 - (col - b) / safe_denominator, values)
+        standardized[:, range_cols] = np.where(denominator == 0, 1.0, values)
+
+    # 平方和法
+    if method == "平方和":
+        norm = np.sqrt(np.sum(standardized ** 2, axis=0))
+        positive = norm > 0
+        standardized[:, positive] /= norm[positive]
+
+    # 非负平移处理，保证所有值大于0
+    min_val = standardized.min()
+    if min_val <= 0:
+        standardized += abs(min_val) + non_negative_shift
+
+    return standardized
+
+
+def calculate_entropy_weights(data):
+    """计算熵权法权重，返回 (熵值, 差异系数, 权重)
+
+    所有指标熵值都为1时赋予相等权重。
+    """
+    X = np.asarray(data, dtype=np.float64)
+    n, m = X.shape
+
+    col_sums = np.sum(X, axis=0)
+    invalid = np.flatnonzero(col_sums <= 0)
+    if len(invalid):
+        raise ValueError(f"第{invalid[0] + 1}列指标的和为0或负数，无法计算")
+
+    # 计算比重和熵值，p=0时定义p*ln(p)=0
+    P = X / col_sums
+    plogp = P * np.log(np.where(P > 0, P, 1.0))
+    E = -np.sum(plogp, axis=0) / np.log(n)
+
+    # 计算差异系数
+    G = 1 - E
+    if np.allclose(G, 0):
+        G = np.ones(m)
+
+    W = G / np.sum(G)
+    return E, G, W
+
+
+def calculate_topsis(data, weights, weight_usage="两者都用"):
+    """计算TOPSIS结果，返回 (正理想解距离, 负理想解距离, 接近度, 加权矩阵)
+
+    data 为标准化后的矩阵，标准化已将所有指标转换为效益型（越大越好），
+    正理想解取各列最大值、负理想解取各列最小值。weights 形状为 (指标,) 或 (权重组, 指标)，
+    后者一次计算多组权重，结果相应增加首维。weight_usage 取 "标准化后"、"距离计算" 或 "两者都用"。
+    """
+    X = np.asarray(data, dtype=np.float64)
+    W = np.asarray(weights, dtype=np.float64)
+    single = W.ndim == 1
+    W = np.atleast_2d(W)[:, np.newaxis, :]
+
+    # 创建加权矩阵
+    if weight_usage in ["标准化后", "两者都用"]:
+        weighted = X[np.newaxis] * W
+    else:
+        weighted = np.broadcast_to(X, (W.shape[0],) + X.shape)
+
+    # 确定正负理想解
+    positive_ideal = np.max(weighted, axis=1, keepdims=True)
+    negative_ideal = np.min(weighted, axis=1, keepdims=True)
+
+    # 计算（加权）欧氏距离
+    diff_pos = weighted - positive_ideal
+    diff_neg = weighted - negative_ideal
+    if weight_usage in ["距离计算", "两者都用"]:
+        diff_pos = diff_pos * W
+        diff_neg = diff_neg * W
+    distance_positive = np.sqrt(np.sum(diff_pos ** 2, axis=-1))
+    distance_negative = np.sqrt(np.sum(diff_neg ** 2, axis=-1))
+
+    # 计算接近度
+    total = distance_positive + distance_negative
+    closeness = np.divide(distance_negative, total, out=np.zeros_like(total), where=total != 0)
+
+    if single:
+        return distance_positive[0], distance_negative[0], closeness[0], weighted[0]
+    return distance_positive, distance_negative, closeness, weighted
+
+
+def calculate_topsis_chunked(data, weights, weight_usage="两者都用",
+                             block_rows=DEFAULT_BLOCK_ROWS, workers=None, return_weighted=True):
+    """按行分块计算TOPSIS，参数和返回值与 calculate_topsis 相同，结果完全一致
+
+    先分块求各列最大、最小值得到正负理想解，再在线程池中分块计算距离和接近度，
+    结果写入预先分配的数组，临时内存只与块大小成正比。return_weighted 为 False 时
+    不保存加权矩阵（返回 None），只需要接近度时可省去一份与数据同样大小的输出。
+    """
+    X = np.asarray(data, dtype=np.float64)
+    W = np.asarray(weights, dtype=np.float64)
+    single = W.ndim == 1
+    W = np.atleast_2d(W)
+    n, m = X.shape
+    scale_data = weight_usage in ["标准化后", "两者都用"]
+    scale_distance = weight_usage in ["距离计算", "两者都用"]
+    blocks = row_blocks(n, block_rows)
+
+    # 确定正负理想解：乘以权重不改变（负权重时反转）大小顺序，
+    # 加权矩阵的列最值等于原矩阵列最值乘以权重
+    extremes = run_blocks(lambda b: (np.max(X[b], axis=0), np.min(X[b], axis=0)), blocks, workers)
+    x_max = np.max([e[0] for e in extremes], axis=0)
+    x_min = np.min([e[1] for e in extremes], axis=0)
+    if scale_data:
+        col_max = np.where(W >= 0, x_max * W, x_min * W)
+        col_min = np.where(W >= 0, x_min * W, x_max * W)
+    else:
+        col_max = np.broadcast_to(x_max, W.shape)
+        col_min = np.broadcast_to(x_min, W.shape)
+    positive_ideal = col_max[:, np.newaxis, :]
+    negative_ideal = col_min[:, np.newaxis, :]
+    W = W[:, np.newaxis, :]
+
+    distance_positive = np.empty((W.shape[0], n))
+    distance_negative = np.empty((W.shape[0], n))
+    closeness = np.zeros((W.shape[0], n))
+    weighted = np.empty((W.shape[0], n, m)) if return_weighted else None
+
+    def _block(b):
+        if scale_data:
+            block = X[np.newaxis, b] * W
+        else:
+            block = np.broadcast_to(X[b], (W.shape[0],) + X[b].shape)
+        if weighted is not None:
+            weighted[:, b] = block
+
+        diff_pos = block - positive_ideal
+        diff_neg = block - negative_ideal
+        if scale_distance:
+            diff_pos = diff_pos * W
+            diff_neg = diff_neg * W
+        d_pos = distance_positive[:, b]
+        d_neg = distance_negative[:, b]
+        d_pos[...] = np.sqrt(np.sum(diff_pos ** 2, axis=-1))
+        d_neg[...] = np.sqrt(np.sum(diff_neg ** 2, axis=-1))
+
+        total = d_pos + d_neg
+        np.divide(d_neg, total, out=closeness[:, b], where=total != 0)
+
+    run_blocks(_block, blocks, workers)
+
+    if single:
+        return (distance_positive[0], distance_negative[0], closeness[0],
+                None if weighted is None else weighted[0])
+    return distance_positive, distance_negative, closeness, weighted
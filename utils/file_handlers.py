@@ -0,0 +1,270 @@
+import io
+import zipfile
+
+import numpy as np
+import pandas as pd
+
+from utils.validation import ISSUE_COLUMNS, excel_column_name, validate_numeric_frame
+
+
+def extract_weight_columns(df):
+    """提取包含'权重'的列"""
+    if df.shape[1] < 2:
+        raise ValueError("数据格式错误: 至少需要两列权重数据!")
+
+    weight_cols = [col for col in df.columns if '权重' in str(col)]
+    if not weight_cols:
+        raise ValueError("数据格式错误: 没有找到包含'权重'的列!")
+    return weight_cols
+
+
+def parse_score_sheet(df):
+    """解析综合得分数据表（无表头读取：第一列权重，第三列指标名称，第四列开始为标准化数据）
+
+    返回 (权重, 指标名称, 标准化矩阵, 问题表)，标准化矩阵的行为指标、列为方案。
+    """
+    weights_frame, weight_issues = validate_numeric_frame(
+        df.iloc[1:, [0]], row_offset=1, check_constant=False, check_positive_sums=True
+    )
+    standardized_data, data_issues = validate_numeric_frame(
+        df.iloc[1:, 3:], row_offset=1, col_offset=3, check_constant=False
+    )
+    issues = pd.concat([weight_issues, data_issues], ignore_index=True)
+
+    weights = weights_frame.iloc[:, 0].values
+    indicator_names = df.iloc[1:, 2].values
+    standardized_data.columns = [f"指标{i+1}" for i in range(standardized_data.shape[1])]
+    standardized_data.index = indicator_names
+    return weights, indicator_names, standardized_data, issues
+
+
+def read_scenario_weights(uploaded_file, indicator_names):
+    """读取情景权重矩阵（第一列情景名称，其后各列依次为各指标权重），返回 (情景名称, 权重, 问题表)"""
+    df = pd.read_excel(uploaded_file, header=0)
+    if df.shape[1] - 1 != len(indicator_names):
+        raise ValueError(
+            f"情景权重列数({df.shape[1] - 1})与指标数量({len(indicator_names)})不一致!"
+        )
+    weights_df, issues = validate_numeric_frame(df.iloc[:, 1:], row_offset=1, col_offset=1, check_constant=False)
+    return df.iloc[:, 0].astype(str).tolist(), weights_df.values, issues
+
+
+def _row_issues(rows, message, values, first_col, last_col):
+    """整理整行问题记录（rows 为数据行序号，从0开始，表头占第1行）"""
+    rows = np.asarray(rows)
+    first, last = excel_column_name(first_col), excel_column_name(last_col)
+    return pd.DataFrame({
+        "级别": "错误",
+        "单元格": [f"{first}{r + 2}:{last}{r + 2}" for r in rows],
+        "行": rows + 2,
+        "列": None,
+        "问题": message,
+        "值": values
+    }, columns=ISSUE_COLUMNS)
+
+
+def parse_fuzzy_judgments(df):
+    """解析长格式的三角模糊判断表（第一行为表头）
+
+    每行一条判断：[矩阵名称,] 因素A, 因素B, l, m, u，表示A相对B的重要程度；
+    互反位置和对角线自动补齐。中值m留空时按区间判断 [l, u] 处理，取 √(l·u)。
+    各矩阵的因素集合相同（按首次出现的顺序排列）。
+    返回 (矩阵名称, 因素名称, (k, n, n, 3) 模糊判断矩阵, 问题表)，存在错误时模糊判断矩阵为 None。
+    """
+    if df.shape[1] not in (5, 6):
+        raise ValueError("模糊判断表应为5列（因素A、因素B、l、m、u）或6列（首列为矩阵名称）!")
+    offset = df.shape[1] - 5
+    groups = df.iloc[:, 0].astype(str).str.strip() if offset else pd.Series("矩阵1", index=df.index)
+    first = df.iloc[:, offset].astype(str).str.strip()
+    second = df.iloc[:, offset + 1].astype(str).str.strip()
+
+    numeric, issues = validate_numeric_frame(
+        df.iloc[:, offset + 2:], row_offset=1, col_offset=offset + 2, check_constant=False
+    )
+    # 中值留空表示区间判断
+    middle_col = df.columns[offset + 3]
+    issues = issues[~((issues["问题"] == "缺失值") & (issues["列"] == middle_col))]
+    values = numeric.to_numpy(dtype=np.float64, copy=True)
+    values[:, 1] = np.where(np.isnan(values[:, 1]), np.sqrt(values[:, 0] * values[:, 2]), values[:, 1])
+
+    parts = [issues]
+    with np.errstate(invalid="ignore"):
+        unordered = ~((values[:, 0] > 0) & (values[:, 0] <= values[:, 1]) & (values[:, 1] <= values[:, 2]))
+    unordered &= ~np.isnan(values).any(axis=1)
+    rows = np.flatnonzero(unordered)
+    parts.append(_row_issues(rows, "须满足 0 < l ≤ m ≤ u", [tuple(v) for v in values[rows]],
+                             offset + 2, offset + 4))
+
+    matrix_names = pd.unique(groups).tolist()
+    factor_names = pd.unique(pd.concat([first, second], ignore_index=True)).tolist()
+    g = pd.Categorical(groups, categories=matrix_names).codes
+    a = pd.Categorical(first, categories=factor_names).codes
+    b = pd.Categorical(second, categories=factor_names).codes
+
+    rows = np.flatnonzero(a == b)
+    parts.append(_row_issues(rows, "因素不能与自身比较", first.values[rows], offset, offset + 1))
+    pair = pd.DataFrame({"g": g, "i": np.minimum(a, b), "j": np.maximum(a, b)})
+    rows = np.flatnonzero(pair.duplicated(keep="first").values & (a != b))
+    parts.append(_row_issues(rows, "重复的判断", (first + " / " + second).values[rows], offset, offset + 1))
+
+    errors = [part for part in parts if len(part)]
+    if errors:
+        return matrix_names, factor_names, None, pd.concat(errors, ignore_index=True)
+
+    k, n = len(matrix_names), len(factor_names)
+    F = np.full((k, n, n, 3), np.nan)
+    F[:, np.arange(n), np.arange(n)] = 1.0
+    F[g, a, b] = values
+    F[g, b, a] = 1 / values[:, ::-1]
+
+    missing_g, missing_i, missing_j = np.nonzero(np.isnan(F[..., 1]) & np.triu(np.ones((n, n), dtype=bool)))
+    if len(missing_g):
+        issues = pd.DataFrame({
+            "级别": "错误",
+            "单元格": None,
+            "行": None,
+            "列": None,
+            "问题": "缺少判断",
+            "值": [f"{matrix_names[m]}: {factor_names[i]} / {factor_names[j]}"
+                  for m, i, j in zip(missing_g, missing_i, missing_j)]
+        }, columns=ISSUE_COLUMNS)
+        return matrix_names, factor_names, None, issues
+    return matrix_names, factor_names, F, issues
+
+
+# 导出格式：(显示名称, 扩展名, MIME类型)；列式格式每个表一个文件，打包为zip
+EXPORT_FORMATS = {
+    "xlsx": ("Excel (xlsx)", ".xlsx", "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"),
+    "parquet": ("Parquet（zstd压缩）", ".zip", "application/zip"),
+    "arrow": ("Arrow IPC（zstd压缩）", ".zip", "application/zip"),
+    "csv": ("CSV（zip压缩）", ".zip", "application/zip"),
+}
+
+# 列式导出时每块的行数（Parquet行组、Arrow记录批、CSV写入块）
+EXPORT_CHUNK_ROWS = 65536
+
+# xlsx工作表的最大数据行数（不含表头）
+XLSX_MAX_ROWS = 1048575
+
+# xlsx工作表的最大列数
+XLSX_MAX_COLUMNS = 16384
+
+
+def _export_frame(df):
+    """导出前整理数据表：有名称的索引转为普通列（无名称的索引不导出），列名统一为字符串"""
+    if any(name is not None for name in df.index.names):
+        df = df.reset_index()
+    df = df.copy(deep=False)
+    df.columns = [str(col) for col in df.columns]
+    return df
+
+
+def _record_batches(df, chunk_rows):
+    """按行块生成Arrow记录批
+
+    数值列直接引用NumPy数组的内存（pandas按列连续存储，切片不复制），
+    其余列逐块由pandas转换为字符串类型，缺失值保留为空值。列类型按整个数据表确定一次，
+    避免某一块全为缺失值时被推断为 null 类型而与其他块的结构不一致。
+    """
+    import pyarrow as pa
+
+    columns, fields = [], []
+    for name in df.columns:
+        series = df[name]
+        if isinstance(series.dtype, np.dtype) and series.dtype.kind in "biufM":
+            values = series.to_numpy()
+            fields.append(pa.field(name, pa.from_numpy_dtype(values.dtype)))
+        else:
+            values = series
+            fields.append(pa.field(name, pa.string()))
+        columns.append(values)
+    schema = pa.schema(fields)
+
+    def _chunk(values, field, start):
+        if isinstance(values, np.ndarray):
+            return pa.array(values[start:start + chunk_rows], type=field.type)
+        return pa.array(values.iloc[start:start + chunk_rows].astype("string"), type=field.type, from_pandas=True)
+
+    for start in range(0, max(len(df), 1), chunk_rows):
+        yield pa.RecordBatch.from_arrays(
+            [_chunk(values, field, start) for values, field in zip(columns, schema)],
+            schema=schema
+        )
+
+
+def _write_parquet(df, handle, chunk_rows):
+    import pyarrow.parquet as pq
+
+    writer = None
+    for batch in _record_batches(df, chunk_rows):
+        if writer is None:
+            writer = pq.ParquetWriter(handle, batch.schema, compression="zstd")
+        writer.write_batch(batch, row_group_size=chunk_rows)
+    writer.close()
+
+
+def _write_arrow(df, handle, chunk_rows):
+    import pyarrow as pa
+
+    writer = None
+    for batch in _record_batches(df, chunk_rows):
+        if writer is None:
+            options = pa.ipc.IpcWriteOptions(compression="zstd")
+            writer = pa.ipc.new_file(handle, batch.schema, options=options)
+        writer.write_batch(batch)
+    writer.close()
+
+
+def _write_csv(df, handle, chunk_rows):
+    # 写入BOM，便于Excel直接打开中文CSV
+    import pyarrow.csv as pa_csv
+
+    handle.write("\ufeff".encode("utf-8"))
+
+    writer = None
+    for batch in _record_batches(df, chunk_rows):
+        if writer is None:
+            writer = pa_csv.CSVWriter(handle, batch.schema)
+        writer.write_batch(batch)
+    writer.close()
+
+
+_COLUMNAR_WRITERS = {
+    "parquet": (_write_parquet, ".parquet", zipfile.ZIP_STORED),
+    "arrow": (_write_arrow, ".arrow", zipfile.ZIP_STORED),
+    "csv": (_write_csv, ".csv", zipfile.ZIP_DEFLATED),
+}
+
+# CSV的zip压缩级别：大文件时1级压缩比默认级别快数倍，压缩率相差不大
+_ZIP_COMPRESSLEVEL = 1
+
+
+def export_tables(tables, fmt="xlsx", chunk_rows=EXPORT_CHUNK_ROWS):
+    """将 {名称: DataFrame} 导出为指定格式，返回文件内容（bytes）
+
+    xlsx 每个表一个工作表（表名截取前31个字符）；parquet、arrow、csv 每个表一个文件，按行块逐块写入，
+    打包为zip（Parquet、Arrow文件内部已按zstd压缩，CSV由zip压缩）。
+    全部在内存中完成，不写临时文件。
+    """
+    if fmt not in EXPORT_FORMATS:
+        raise ValueError(f"未知的导出格式: {fmt}")
+    tables = {name: _export_frame(df) for name, df in tables.items()}
+    buffer = io.BytesIO()
+
+    if fmt == "xlsx":
+        for name, df in tables.items():
+            if len(df) > XLSX_MAX_ROWS:
+                raise ValueError(f"{name}超过xlsx的最大行数({XLSX_MAX_ROWS})，请选择Parquet、Arrow或CSV格式!")
+            if df.shape[1] > XLSX_MAX_COLUMNS:
+                raise ValueError(f"{name}超过xlsx的最大列数({XLSX_MAX_COLUMNS})，请选择Parquet、Arrow或CSV格式!")
+        with pd.ExcelWriter(buffer, engine="openpyxl") as writer:
+            for name, df in tables.items():
+                df.to_excel(writer, sheet_name=name[:31], index=False)
+        return buffer.getvalue()
+
+    write, extension, compression = _COLUMNAR_WRITERS[fmt]
+    with zipfile.ZipFile(buffer, "w", compression=compression, compresslevel=_ZIP_COMPRESSLEVEL) as archive:
+        for name, df in tables.items():
+            with archive.open(name + extension, "w", force_zip64=True) as handle:
+                write(df, handle, chunk_rows)
+    return buffer.getvalue()
@@ -0,0 +1,61 @@
+"""模糊层次分析法（三角模糊数）
+
+模糊判断矩阵形状为 (n, n, 3) 或 (k, n, n, 3)，最后一维依次为三角模糊数的
+下限 l、中值 m、上限 u。权重按Buckley几何平均法计算，重心法解模糊。
+"""
+import numpy as np
+
+from utils.ahp_calculator import calculate_consistency, calculate_weights_geometric
+
+
+def _as_fuzzy_stack(matrix):
+    """将模糊判断矩阵整理为 (k, n, n, 3) 形状，并返回是否为单个矩阵"""
+    F = np.asarray(matrix, dtype=np.float64)
+    if F.ndim == 3:
+        F = F[np.newaxis]
+        single = True
+    else:
+        single = False
+    if F.ndim != 4 or F.shape[1] != F.shape[2] or F.shape[-1] != 3:
+        raise ValueError("模糊判断矩阵必须是 (n, n, 3) 或 (k, n, n, 3) 形状")
+    return F, single
+
+
+def fuzzy_reciprocal(values):
+    """三角模糊数的倒数：(l, m, u) -> (1/u, 1/m, 1/l)"""
+    return 1 / np.asarray(values, dtype=np.float64)[..., ::-1]
+
+
+def calculate_fuzzy_weights(matrix):
+    """Buckley几何平均法计算模糊权重，返回 (n, 3) 或 (k, n, 3)
+
+    r_i 为第 i 行各模糊数的几何平均（按分量计算），w_i = r_i ⊗ (Σr)⁻¹，
+    即下限除以各行上限之和、上限除以各行下限之和。
+    """
+    F, single = _as_fuzzy_stack(matrix)
+    r = np.exp(np.mean(np.log(F), axis=2))
+    W = r / np.sum(r, axis=1, keepdims=True)[..., ::-1]
+    return W[0] if single else W
+
+
+def defuzzify_centroid(fuzzy_weights):
+    """重心法解模糊 (l + m + u) / 3，并归一化"""
+    crisp = np.mean(np.asarray(fuzzy_weights, dtype=np.float64), axis=-1)
+    return crisp / np.sum(crisp, axis=-1, keepdims=True)
+
+
+def calculate_fuzzy_ahp(matrix):
+    """一次计算全部模糊判断矩阵的模糊权重、解模糊权重和一致性
+
+    一致性按中值矩阵检验（几何平均法权重）。
+    返回 (模糊权重, 解模糊权重, λ_max, CI, CR)。
+    """
+    F, single = _as_fuzzy_stack(matrix)
+    fuzzy_weights = calculate_fuzzy_weights(F)
+    weights = defuzzify_centroid(fuzzy_weights)
+
+    middle = F[..., 1]
+    lambda_max, CI, CR = calculate_consistency(middle, calculate_weights_geometric(middle))
+    if single:
+        return fuzzy_weights[0], weights[0], lambda_max[0], CI[0], CR[0]
+    return fuzzy_weights, weights, lambda_max, CI, CR
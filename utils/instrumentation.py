@@ -0,0 +1,215 @@
+"""计算流程各阶段的耗时与内存诊断
+
+    with stage("标准化", df) as record:
+        ...
+        record.set_shape(result)
+
+启用方式：侧边栏勾选“诊断模式”，或设置环境变量 GREEN_TOWN_DIAGNOSTICS=1。
+每个阶段记录墙钟时间和处理的行×列数，显示在诊断面板中，同时以JSON行写入日志
+green_town.diagnostics（设置 GREEN_TOWN_DIAGNOSTICS_LOG 时追加写入该文件，便于跨会话汇总）。
+未启用时 stage() 直接返回空操作对象，开销可忽略。
+
+内存分配增量（tracemalloc）是进程级的开销（分配密集的计算会慢数倍），且统计的是
+整个进程的分配，只能在启动前通过环境变量 GREEN_TOWN_TRACE_ALLOC=1 开启，
+适用于单用户调试；会话中的诊断开关只控制计时和显示，不会启停 tracemalloc。
+"""
+import json
+import logging
+import os
+import time
+import tracemalloc
+import uuid
+from collections import deque
+from datetime import datetime
+
+import pandas as pd
+import streamlit as st
+from streamlit import runtime
+
+logger = logging.getLogger("green_town.diagnostics")
+
+_ENABLED_KEY = "_diagnostics_enabled"
+_WIDGET_KEY = "_diagnostics_toggle"
+_RECORDS_KEY = "_diagnostics_records"
+_PAGE_KEY = "_diagnostics_page"
+_SESSION_KEY = "_diagnostics_session"
+
+# 面板中保留的最近记录数
+MAX_RECORDS = 200
+
+# 非Streamlit环境（脚本、服务）下的记录
+_local_records = deque(maxlen=MAX_RECORDS)
+_log_configured = False
+
+
+def _env_flag(name):
+    return os.environ.get(name, "").lower() in ("1", "true", "yes")
+
+
+# 内存分配统计在导入时按环境变量确定，进程运行期间不再启停
+TRACE_ALLOC = _env_flag("GREEN_TOWN_TRACE_ALLOC")
+if TRACE_ALLOC and not tracemalloc.is_tracing():
+    tracemalloc.start()
+
+
+def _env_enabled():
+    return _env_flag("GREEN_TOWN_DIAGNOSTICS")
+
+
+def is_enabled():
+    """当前会话是否启用诊断"""
+    if runtime.exists():
+        return st.session_state.get(_ENABLED_KEY, _env_enabled())
+    return _env_enabled()
+
+
+def _configure_log():
+    """首次记录时配置JSON行日志输出"""
+    global _log_configured
+    if _log_configured:
+        return
+    _log_configured = True
+
+    path = os.environ.get("GREEN_TOWN_DIAGNOSTICS_LOG")
+    if path and not logger.handlers:
+        handler = logging.FileHandler(path, encoding="utf-8")
+        handler.setFormatter(logging.Formatter("%(message)s"))
+        logger.addHandler(handler)
+        logger.setLevel(logging.INFO)
+
+
+def _shape(data):
+    """获取数据的行数和列数"""
+    shape = getattr(data, "shape", None)
+    if shape is None:
+        return None, None
+    rows = int(shape[0]) if len(shape) > 0 else 1
+    cols = int(shape[1]) if len(shape) > 1 else 1
+    return rows, cols
+
+
+class _NullStage:
+    """未启用诊断时使用的空操作对象"""
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def set_shape(self, data):
+        pass
+
+
+_NULL_STAGE = _NullStage()
+
+
+class _Stage:
+    """一个计算阶段的计时记录（TRACE_ALLOC 开启时同时记录内存分配增量）"""
+
+    def __init__(self, name, data=None):
+        self.name = name
+        self.rows, self.cols = _shape(data)
+
+    def set_shape(self, data):
+        """阶段开始时数据尚未就绪（如文件读取）时，可在阶段内补充数据规模"""
+        self.rows, self.cols = _shape(data)
+
+    def __enter__(self):
+        self._memory_start = tracemalloc.get_traced_memory()[0] if TRACE_ALLOC else None
+        self._start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        wall = time.perf_counter() - self._start
+        memory_delta = None
+        if self._memory_start is not None:
+            memory_delta = tracemalloc.get_traced_memory()[0] - self._memory_start
+        _record({
+            "event": "stage",
+            "stage": self.name,
+            "wall_s": round(wall, 6),
+            "rows": self.rows,
+            "cols": self.cols,
+            "alloc_delta_bytes": memory_delta,
+            "ok": exc_type is None
+        })
+        return False
+
+
+def stage(name, data=None):
+    """记录一个计算阶段；data 为处理的数据（用于记录行×列数）"""
+    if not is_enabled():
+        return _NULL_STAGE
+    return _Stage(name, data)
+
+
+def _record(record):
+    """补充会话信息，写入面板记录和JSON日志"""
+    if runtime.exists():
+        if _SESSION_KEY not in st.session_state:
+            st.session_state[_SESSION_KEY] = uuid.uuid4().hex[:12]
+        if _RECORDS_KEY not in st.session_state:
+            st.session_state[_RECORDS_KEY] = deque(maxlen=MAX_RECORDS)
+        record = {
+            "timestamp": datetime.now().isoformat(timespec="milliseconds"),
+            "session": st.session_state[_SESSION_KEY],
+            "page": st.session_state.get(_PAGE_KEY),
+            **record
+        }
+        st.session_state[_RECORDS_KEY].append(record)
+    else:
+        record = {"timestamp": datetime.now().isoformat(timespec="milliseconds"), **record}
+        _local_records.append(record)
+
+    _configure_log()
+    logger.info(json.dumps(record, ensure_ascii=False))
+
+
+def set_page(name):
+    """设置当前页面名称，用于标记后续记录"""
+    if runtime.exists():
+        st.session_state[_PAGE_KEY] = name
+
+
+def get_records():
+    """获取最近的诊断记录"""
+    if runtime.exists():
+        return list(st.session_state.get(_RECORDS_KEY, []))
+    return list(_local_records)
+
+
+def _on_toggle():
+    st.session_state[_ENABLED_KEY] = st.session_state[_WIDGET_KEY]
+
+
+def render_diagnostics_panel():
+    """在侧边栏显示诊断开关和最近的阶段记录"""
+    st.sidebar.checkbox("诊断模式", value=is_enabled(), key=_WIDGET_KEY, on_change=_on_toggle)
+    if not is_enabled():
+        return
+
+    records = get_records()
+    with st.sidebar.expander("诊断信息", expanded=True):
+        if not records:
+            st.caption("暂无记录，执行计算后显示各阶段耗时")
+            return
+        df = pd.DataFrame(records[::-1])
+        df["耗时(ms)"] = df["wall_s"] * 1000
+        columns = ["page", "stage", "耗时(ms)", "rows", "cols"]
+        if TRACE_ALLOC:
+            df["内存增量(MiB)"] = pd.to_numeric(df["alloc_delta_bytes"]) / 2 ** 20
+            columns.append("内存增量(MiB)")
+        else:
+            st.caption("内存分配统计未开启（启动前设置 GREEN_TOWN_TRACE_ALLOC=1）")
+        st.dataframe(
+            df[columns].rename(
+                columns={"page": "页面", "stage": "阶段", "rows": "行", "cols": "列"}
+            ).style.format({"耗时(ms)": "{:.2f}", "内存增量(MiB)": "{:.3f}"}, na_rep="")
+        )
+        st.download_button(
+            label="下载诊断记录(JSON行)",
+            data="\n".join(json.dumps(r, ensure_ascii=False) for r in records),
+            file_name="diagnostics.jsonl",
+            mime="application/json"
+        )
@@ -0,0 +1,200 @@
+import numpy as np
+import pandas as pd
+
+from utils.ewm_calculator import calculate_entropy_weights, calculate_topsis, standardize_data
+from utils.score_calculator import kendall_tau_matrix, rank_scores
+
+
+def entropy_weights(X):
+    """熵权法权重"""
+    return calculate_entropy_weights(X)[2]
+
+
+def critic_weights(X):
+    """CRITIC法权重：对比强度（标准差）与冲突性（1-相关系数）之积"""
+    m = X.shape[1]
+    std = np.std(X, axis=0, ddof=1)
+
+    # 常数列的相关系数无定义，视为不相关
+    with np.errstate(invalid="ignore", divide="ignore"):
+        corr = np.atleast_2d(np.corrcoef(X, rowvar=False))
+    corr = np.nan_to_num(corr)
+
+    information = std * np.sum(1 - corr, axis=0)
+    if np.sum(information) <= 0:
+        return np.full(m, 1.0 / m)
+    return information / np.sum(information)
+
+
+def cv_weights(X):
+    """变异系数法权重：标准差与均值之比"""
+    m = X.shape[1]
+    mean = np.mean(X, axis=0)
+    invalid = np.flatnonzero(mean <= 0)
+    if len(invalid):
+        raise ValueError(f"第{invalid[0] + 1}列指标的均值为0或负数，无法计算变异系数")
+
+    variation = np.std(X, axis=0, ddof=1) / mean
+    if np.sum(variation) <= 0:
+        return np.full(m, 1.0 / m)
+    return variation / np.sum(variation)
+
+
+def topsis_scores(X, W, weight_usage="标准化后"):
+    """TOPSIS接近度，W 形状为 (权重组, 指标)，返回 (权重组, 方案)"""
+    return calculate_topsis(X, W, weight_usage=weight_usage)[2]
+
+
+def vikor_scores(X, W, v=0.5):
+    """VIKOR折衷值Q，越小越好"""
+    best = np.max(X, axis=0)
+    worst = np.min(X, axis=0)
+    spread = best - worst
+    D = np.divide(best - X, spread, out=np.zeros_like(X), where=spread != 0)
+
+    # 群体效用S与个别遗憾R
+    S = W @ D.T
+    R = np.max(W[:, np.newaxis, :] * D[np.newaxis], axis=-1)
+
+    def _scaled(values):
+        low = np.min(values, axis=1, keepdims=True)
+        span = np.max(values, axis=1, keepdims=True) - low
+        return np.divide(values - low, span, out=np.zeros_like(values), where=span != 0)
+
+    return v * _scaled(S) + (1 - v) * _scaled(R)
+
+
+def grey_relational_scores(X, W, rho=0.5):
+    """灰色关联度：以各指标最优值为参考序列"""
+    delta = np.abs(np.max(X, axis=0) - X)
+    delta_min = np.min(delta)
+    delta_max = np.max(delta)
+    if delta_max == 0:
+        coefficients = np.ones_like(X)
+    else:
+        coefficients = (delta_min + rho * delta_max) / (delta + rho * delta_max)
+
+    # 关联系数与权重无关，所有权重组一次矩阵乘法得到关联度
+    return W @ coefficients.T
+
+
+def weighted_sum_scores(X, W):
+    """加权求和得分"""
+    return W @ X.T
+
+
+WEIGHT_METHODS = {
+    "熵权法": entropy_weights,
+    "CRITIC": critic_weights,
+    "变异系数法": cv_weights,
+}
+
+# 排序方法及其得分方向（True 表示越大越好）
+RANKING_METHODS = {
+    "TOPSIS": (topsis_scores, True),
+    "VIKOR": (vikor_scores, False),
+    "灰色关联分析": (grey_relational_scores, True),
+    "加权求和": (weighted_sum_scores, True),
+}
+
+
+class MCDMEngine:
+    """多方法综合评价引擎
+
+    原始数据只标准化一次并缓存，各赋权方法和排序方法共享同一标准化矩阵；
+    每种排序方法对所有权重组一次向量化计算。
+    """
+
+    def __init__(self, data, indicator_types=None, optimal_ranges=None, method="极差法",
+                 non_negative_shift=0.01, weight_usage="标准化后"):
+        if isinstance(data, pd.DataFrame):
+            self.indicator_names = [str(col) for col in data.columns]
+            data = data.values
+        else:
+            self.indicator_names = None
+
+        self.data = np.asarray(data, dtype=np.float64)
+        n, m = self.data.shape
+        if self.indicator_names is None:
+            self.indicator_names = [f"指标{j + 1}" for j in range(m)]
+        self.alternative_names = [f"方案{i + 1}" for i in range(n)]
+
+        self.indicator_types = list(indicator_types) if indicator_types is not None else ["max"] * m
+        self.optimal_ranges = list(optimal_ranges) if optimal_ranges is not None else [(None, None)] * m
+        self.method = method
+        self.non_negative_shift = non_negative_shift
+        self.weight_usage = weight_usage
+
+        self._standardized = None
+        self._weights = {}
+
+    @property
+    def standardized(self):
+        """标准化矩阵（首次访问时计算并缓存）"""
+        if self._standardized is None:
+            self._standardized = standardize_data(
+                self.data,
+                self.indicator_types,
+                self.optimal_ranges,
+                method=self.method,
+                non_negative_shift=self.non_negative_shift
+            )
+        return self._standardized
+
+    def weights(self, method):
+        """计算（并缓存）指定赋权方法的权重"""
+        if method not in WEIGHT_METHODS:
+            raise ValueError(f"未知的赋权方法: {method}")
+        if method not in self._weights:
+            self._weights[method] = WEIGHT_METHODS[method](self.standardized)
+        return self._weights[method]
+
+    def evaluate(self, weight_methods=None, ranking_methods=None, extra_weights=None):
+        """计算所选赋权方法与排序方法的全部组合
+
+        extra_weights 为 {名称: 权重向量}，可加入AHP、组合权重等外部权重。
+        返回 (权重表, 得分表, 排名对比表)，得分表与排名对比表的列为
+        "赋权方法-排序方法"。
+        """
+        if weight_methods is None:
+            weight_methods = list(WEIGHT_METHODS)
+        if ranking_methods is None:
+            ranking_methods = list(RANKING_METHODS)
+
+        weight_sets = {name: self.weights(name) for name in weight_methods}
+        for name, w in (extra_weights or {}).items():
+            w = np.asarray(w, dtype=np.float64)
+            if w.shape != (self.data.shape[1],):
+                raise ValueError(f"权重 '{name}' 的数量与指标数量不一致!")
+            weight_sets[name] = w / np.sum(w)
+        if not weight_sets:
+            raise ValueError("请至少选择一种赋权方法!")
+
+        weight_names = list(weight_sets)
+        W = np.vstack([weight_sets[name] for name in weight_names])
+
+        scores = {}
+        ranks = {}
+        for ranking in ranking_methods:
+            if ranking not in RANKING_METHODS:
+                raise ValueError(f"未知的排序方法: {ranking}")
+            func, higher_is_better = RANKING_METHODS[ranking]
+            if ranking == "TOPSIS":
+                S = func(self.standardized, W, weight_usage=self.weight_usage)
+            else:
+                S = func(self.standardized, W)
+            R = rank_scores(S if higher_is_better else -S)
+            for i, name in enumerate(weight_names):
+                scores[f"{name}-{ranking}"] = S[i]
+                ranks[f"{name}-{ranking}"] = R[i]
+
+        weights_df = pd.DataFrame(W.T, index=self.indicator_names, columns=weight_names)
+        score_df = pd.DataFrame(scores, index=self.alternative_names)
+        rank_df = pd.DataFrame(ranks, index=self.alternative_names)
+        return weights_df, score_df, rank_df
+
+    @staticmethod
+    def rank_agreement(rank_df):
+        """各排名结果之间的Kendall τ系数"""
+        tau = kendall_tau_matrix(-rank_df.values.T.astype(np.float64))
+        return pd.DataFrame(tau, index=rank_df.columns, columns=rank_df.columns)
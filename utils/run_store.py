@@ -0,0 +1,374 @@
+"""计算结果的本地持久化存储
+
+SQLite 保存每次运行的元数据和参数，矩阵以 .npy、结果表以 Parquet 保存在
+每次运行各自的目录中：
+
+    <根目录>/runs.sqlite
+    <根目录>/<运行ID>/<制品ID>_<类型>.npy
+    <根目录>/<运行ID>/table_<序号>.parquet
+
+运行按数据哈希、页面、方法和时间建立索引，各页面可以筛选、载入历史运行而无需
+重新计算。载入时矩阵以内存映射方式打开，只有实际访问的部分才从磁盘读取，
+大矩阵的运行也能立即打开。根目录默认为 ~/.green_town/runs，
+可通过环境变量 GREEN_TOWN_RUN_STORE 指定。
+"""
+import hashlib
+import json
+import os
+import shutil
+import sqlite3
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import streamlit as st
+
+from utils import artifacts
+from utils.artifacts import Artifact, KIND_NAMES
+from utils.display import paged_dataframe
+
+DEFAULT_ROOT = "~/.green_town/runs"
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    run_id TEXT PRIMARY KEY,
+    page TEXT NOT NULL,
+    method TEXT,
+    data_hash TEXT,
+    name TEXT,
+    created_at TEXT NOT NULL,
+    params TEXT
+);
+CREATE TABLE IF NOT EXISTS artifacts (
+    run_id TEXT NOT NULL REFERENCES runs(run_id) ON DELETE CASCADE,
+    artifact_id TEXT NOT NULL,
+    kind TEXT NOT NULL,
+    name TEXT,
+    source TEXT,
+    file TEXT NOT NULL,
+    labels TEXT,
+    col_labels TEXT,
+    meta TEXT,
+    created_at TEXT,
+    PRIMARY KEY (run_id, artifact_id, kind)
+);
+CREATE TABLE IF NOT EXISTS result_tables (
+    run_id TEXT NOT NULL REFERENCES runs(run_id) ON DELETE CASCADE,
+    position INTEGER NOT NULL,
+    name TEXT NOT NULL,
+    file TEXT NOT NULL,
+    n_rows INTEGER,
+    n_cols INTEGER,
+    PRIMARY KEY (run_id, position)
+);
+CREATE INDEX IF NOT EXISTS idx_runs_data_hash ON runs(data_hash);
+CREATE INDEX IF NOT EXISTS idx_runs_page_method ON runs(page, method, created_at);
+CREATE INDEX IF NOT EXISTS idx_runs_created_at ON runs(created_at);
+"""
+
+# 当前载入的运行（StoredRun），页面重新运行时直接使用，不再重复读取元数据、制品和结果表
+_LOADED_KEY = "_run_store_loaded"
+_DATA_KEY = "_run_store_current_data"
+
+
+def data_hash(*objects):
+    """计算输入数据的哈希值，用于查找同一份数据的历史运行"""
+    digest = hashlib.sha1()
+    for obj in objects:
+        if isinstance(obj, pd.DataFrame):
+            digest.update(pd.util.hash_pandas_object(obj, index=False).values.tobytes())
+            digest.update(repr([str(col) for col in obj.columns]).encode("utf-8"))
+        else:
+            array = np.ascontiguousarray(obj, dtype=np.float64)
+            digest.update(repr(array.shape).encode("utf-8"))
+            digest.update(array.tobytes())
+    return digest.hexdigest()
+
+
+def _json(value):
+    return json.dumps(value, ensure_ascii=False, default=str)
+
+
+class StoredRun:
+    """从存储中打开的一次运行；矩阵和结果表在访问时才读取"""
+
+    def __init__(self, directory, run, artifact_rows, table_rows):
+        self.directory = directory
+        self.run_id = run["run_id"]
+        self.page = run["page"]
+        self.method = run["method"]
+        self.data_hash = run["data_hash"]
+        self.name = run["name"]
+        self.created_at = datetime.fromisoformat(run["created_at"])
+        self.params = json.loads(run["params"] or "{}")
+        self._artifact_rows = artifact_rows
+        self._table_rows = table_rows
+        self._tables = {}
+        self._artifacts = None
+
+    def artifacts(self):
+        """以内存映射方式打开保存的制品（首次访问时打开）"""
+        if self._artifacts is not None:
+            return self._artifacts
+        result = []
+        for row in self._artifact_rows:
+            labels = json.loads(row["labels"])
+            col_labels = json.loads(row["col_labels"]) if row["col_labels"] else None
+            result.append(Artifact(
+                run_id=row["artifact_id"],
+                kind=row["kind"],
+                name=row["name"],
+                source=row["source"],
+                data=np.load(self.directory / row["file"], mmap_mode="r"),
+                labels=tuple(labels),
+                columns=tuple(col_labels) if col_labels is not None else None,
+                created_at=datetime.fromisoformat(row["created_at"]),
+                meta=json.loads(row["meta"] or "{}")
+            ))
+        self._artifacts = result
+        return result
+
+    @property
+    def table_names(self):
+        return [row["name"] for row in self._table_rows]
+
+    def table(self, name):
+        """读取结果表（首次访问时从Parquet文件读取）"""
+        if name not in self._tables:
+            row = next(row for row in self._table_rows if row["name"] == name)
+            self._tables[name] = pd.read_parquet(self.directory / row["file"], memory_map=True)
+        return self._tables[name]
+
+
+class RunStore:
+    """运行记录存储；每次操作使用独立的数据库连接，可在多个会话线程中共用"""
+
+    def __init__(self, root=None):
+        self.root = Path(root or os.environ.get("GREEN_TOWN_RUN_STORE") or DEFAULT_ROOT).expanduser()
+        self.root.mkdir(parents=True, exist_ok=True)
+        self.db_path = self.root / "runs.sqlite"
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.executescript(_SCHEMA)
+
+    @contextmanager
+    def _connect(self):
+        conn = sqlite3.connect(self.db_path, timeout=30)
+        conn.row_factory = sqlite3.Row
+        conn.execute("PRAGMA foreign_keys = ON")
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    def save_run(self, page, method, data_hash, params=None, saved_artifacts=(), tables=None,
+                 name=None, run_id=None):
+        """保存一次运行，返回运行ID
+
+        saved_artifacts 为 Artifact 列表，数据保存为 .npy；tables 为 {表名: DataFrame}，
+        保存为 Parquet。文件全部写完后才写入元数据，读取方不会看到不完整的运行。
+        """
+        run_id = run_id or artifacts.new_run_id()
+        directory = self.root / run_id
+        directory.mkdir(parents=True, exist_ok=True)
+        created_at = datetime.now().isoformat(timespec="seconds")
+
+        artifact_rows = []
+        for artifact in saved_artifacts:
+            file = f"{artifact.run_id}_{artifact.kind}.npy"
+            np.save(directory / file, np.ascontiguousarray(artifact.data))
+            artifact_rows.append((
+                run_id, artifact.run_id, artifact.kind, artifact.name, artifact.source, file,
+                _json(list(artifact.labels)),
+                _json(list(artifact.columns)) if artifact.columns is not None else None,
+                _json(artifact.meta),
+                artifact.created_at.isoformat(timespec="seconds")
+            ))
+
+        table_rows = []
+        for position, (table_name, df) in enumerate((tables or {}).items()):
+            file = f"table_{position}.parquet"
+            frame = df.copy()
+            frame.columns = [str(col) for col in frame.columns]
+            frame.to_parquet(directory / file)
+            table_rows.append((run_id, position, table_name, file, frame.shape[0], frame.shape[1]))
+
+        with self._connect() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO runs VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (run_id, page, method, data_hash, name, created_at, _json(params or {}))
+            )
+            conn.executemany("INSERT OR REPLACE INTO artifacts VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)", artifact_rows)
+            conn.executemany("INSERT OR REPLACE INTO result_tables VALUES (?, ?, ?, ?, ?, ?)", table_rows)
+        return run_id
+
+    def list_runs(self, page=None, method=None, data_hash=None, since=None, until=None, limit=200):
+        """按条件筛选运行记录，按时间从新到旧排列"""
+        conditions, values = [], []
+        for column, value in (("page", page), ("method", method), ("data_hash", data_hash)):
+            if value is not None:
+                conditions.append(f"{column} = ?")
+                values.append(value)
+        if since is not None:
+            conditions.append("created_at >= ?")
+            values.append(since.isoformat(timespec="seconds"))
+        if until is not None:
+            conditions.append("created_at <= ?")
+            values.append(until.isoformat(timespec="seconds"))
+
+        where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+        with self._connect() as conn:
+            rows = conn.execute(
+                f"SELECT run_id, page, method, name, data_hash, created_at, params FROM runs {where} "
+                "ORDER BY created_at DESC, run_id DESC LIMIT ?",
+                values + [limit]
+            ).fetchall()
+        return pd.DataFrame(
+            [dict(row) for row in rows],
+            columns=["run_id", "page", "method", "name", "data_hash", "created_at", "params"]
+        )
+
+    def methods(self, page=None):
+        """已保存运行中出现过的方法"""
+        with self._connect() as conn:
+            if page is None:
+                rows = conn.execute("SELECT DISTINCT method FROM runs ORDER BY method").fetchall()
+            else:
+                rows = conn.execute(
+                    "SELECT DISTINCT method FROM runs WHERE page = ? ORDER BY method", (page,)
+                ).fetchall()
+        return [row["method"] for row in rows if row["method"] is not None]
+
+    def load_run(self, run_id):
+        """打开一次运行；不存在时返回None"""
+        with self._connect() as conn:
+            run = conn.execute("SELECT * FROM runs WHERE run_id = ?", (run_id,)).fetchone()
+            if run is None:
+                return None
+            artifact_rows = conn.execute(
+                "SELECT * FROM artifacts WHERE run_id = ? ORDER BY artifact_id, kind", (run_id,)
+            ).fetchall()
+            table_rows = conn.execute(
+                "SELECT * FROM result_tables WHERE run_id = ? ORDER BY position", (run_id,)
+            ).fetchall()
+        return StoredRun(self.root / run_id, run, artifact_rows, table_rows)
+
+    def delete_run(self, run_id):
+        """删除运行记录及其文件"""
+        with self._connect() as conn:
+            conn.execute("DELETE FROM runs WHERE run_id = ?", (run_id,))
+        shutil.rmtree(self.root / run_id, ignore_errors=True)
+
+
+_stores = {}
+
+
+def get_store():
+    """当前进程共用的运行存储"""
+    root = os.environ.get("GREEN_TOWN_RUN_STORE") or DEFAULT_ROOT
+    if root not in _stores:
+        _stores[root] = RunStore(root)
+    return _stores[root]
+
+
+def set_current_data(page, *objects):
+    """记录页面当前的输入数据，用于筛选同一数据的历史运行（需要时才计算哈希）"""
+    st.session_state.setdefault(_DATA_KEY, {})[page] = objects
+
+
+def save_session_run(page, method, data, saved_artifacts=(), params=None, tables=None, name=None, run_id=None):
+    """保存当前会话中的一次计算；data 为输入数据（数组或DataFrame的元组），保存失败时只给出提示"""
+    try:
+        return get_store().save_run(
+            page, method, data_hash(*data), params=params, saved_artifacts=saved_artifacts,
+            tables=tables, name=name, run_id=run_id
+        )
+    except Exception as e:
+        st.warning(f"运行记录保存失败: {str(e)}")
+        return None
+
+
+def _load_run(run_id):
+    run = get_store().load_run(run_id)
+    if run is None:
+        return
+    # 载入的制品发布到当前会话，其他页面可直接选用
+    for artifact in run.artifacts():
+        artifacts.register(artifact)
+    st.session_state[_LOADED_KEY] = run
+
+
+def _delete_run(run_id):
+    get_store().delete_run(run_id)
+    st.session_state["_history_confirm_delete"] = False
+    loaded = st.session_state.get(_LOADED_KEY)
+    if loaded is not None and loaded.run_id == run_id:
+        st.session_state[_LOADED_KEY] = None
+
+
+def render_run_history(page):
+    """历史运行记录：按页面、方法、时间和数据筛选，载入（不重新计算）或删除"""
+    with st.expander("历史运行记录"):
+        try:
+            store = get_store()
+        except Exception as e:
+            st.warning(f"无法打开运行记录存储: {str(e)}")
+            return
+
+        col1, col2, col3 = st.columns(3)
+        with col1:
+            scope = st.radio("页面", ["当前页面", "全部页面"], horizontal=True, key="_history_scope")
+        page_filter = page if scope == "当前页面" else None
+        with col2:
+            method = st.selectbox("方法", ["全部"] + store.methods(page_filter), key="_history_method")
+        with col3:
+            period = st.selectbox("时间范围", ["全部", "最近7天", "最近30天"], key="_history_period")
+
+        current = st.session_state.get(_DATA_KEY, {}).get(page)
+        same_data = st.checkbox("仅显示与当前数据相同的运行", disabled=current is None, key="_history_same")
+
+        runs = store.list_runs(
+            page=page_filter,
+            method=None if method == "全部" else method,
+            data_hash=data_hash(*current) if same_data and current is not None else None,
+            since=datetime.now() - timedelta(days={"最近7天": 7, "最近30天": 30}[period])
+            if period != "全部" else None
+        )
+        if runs.empty:
+            st.caption("暂无符合条件的历史运行")
+        else:
+            st.dataframe(
+                runs.assign(data_hash=runs["data_hash"].str[:10]).rename(columns={
+                    "run_id": "运行ID", "page": "页面", "method": "方法", "name": "名称",
+                    "data_hash": "数据哈希", "created_at": "时间", "params": "参数"
+                }).set_index("运行ID")
+            )
+            labels = dict(zip(runs["run_id"], runs["created_at"] + "  " + runs["page"] + "  " + runs["method"].fillna("")))
+            run_id = st.selectbox("选择运行", runs["run_id"], format_func=lambda r: labels[r], key="_history_run")
+
+            # 在回调中载入和删除，本次运行即显示更新后的列表
+            col1, col2 = st.columns(2)
+            with col1:
+                st.button("载入", key="_history_load", on_click=_load_run, args=(run_id,))
+            with col2:
+                confirmed = st.checkbox("确认删除所选运行", key="_history_confirm_delete")
+                st.button("删除", key="_history_delete", on_click=_delete_run, args=(run_id,), disabled=not confirmed)
+
+        run = st.session_state.get(_LOADED_KEY)
+        if run is not None:
+            st.markdown(f"**已载入：{run.page} / {run.method}（{run.created_at:%Y-%m-%d %H:%M:%S}，{run.run_id}）**")
+            if run.params:
+                st.json(run.params, expanded=False)
+            saved = run.artifacts()
+            if saved:
+                st.caption("已发布到当前会话：" + "，".join(
+                    f"{a.name}（{KIND_NAMES[a.kind]}，{'×'.join(map(str, a.data.shape))}）" for a in saved
+                ))
+            # 只读取选中的结果表，读取后缓存在已载入的运行中
+            if run.table_names:
+                table_name = st.selectbox("查看结果表", ["不显示"] + run.table_names, key="_history_table")
+                if table_name != "不显示":
+                    paged_dataframe(run.table(table_name), key="_history_table_view")
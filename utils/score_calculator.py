@@ -0,0 +1,197 @@
+import numpy as np
+import pandas as pd
+
+from utils.chunking import DEFAULT_BLOCK_ROWS, row_blocks, run_blocks
+
+# Kendall τ 计算时每批处理的元素上限，控制临时内存
+_TAU_CHUNK_ELEMENTS = 1 << 22
+
+
+def normalize_weight_matrix(weights):
+    """将权重整理为 (情景, 指标) 矩阵并逐行归一化"""
+    W = np.atleast_2d(np.asarray(weights, dtype=np.float64))
+    sums = np.sum(W, axis=1, keepdims=True)
+    if np.any(sums <= 0):
+        raise ValueError("每个情景的权重之和必须大于0!")
+    return W / sums
+
+
+def calculate_scores(data, weights):
+    """计算各情景下的综合得分
+
+    data 形状为 (方案, 指标)，weights 形状为 (指标,) 或 (情景, 指标)。
+    所有情景的得分通过一次矩阵乘法得到，返回形状为 (情景, 方案)。
+    """
+    X = np.asarray(data, dtype=np.float64)
+    W = normalize_weight_matrix(weights)
+    if W.shape[1] != X.shape[1]:
+        raise ValueError(f"权重数量({W.shape[1]})与指标数量({X.shape[1]})不一致!")
+    return W @ X.T
+
+
+def calculate_scores_chunked(data, weights, block_rows=DEFAULT_BLOCK_ROWS, workers=None):
+    """按方案分块计算综合得分，参数和返回值与 calculate_scores 相同
+
+    各行块在线程池中分别做一次矩阵乘法，结果写入预先分配的 (情景, 方案) 数组，
+    适用于数百万个方案；排名等需要全部得分的计算在分块完成后进行。
+    BLAS的累加顺序随矩阵形状和内存对齐变化，与 calculate_scores 可能有末位差异：
+    相对误差不超过 指标数×2⁻⁵³（30个指标时约 3e-15），按 rtol=1e-12 比较一致；
+    名次只在得分差异小于该误差的并列方案之间可能互换。
+    """
+    X = np.asarray(data, dtype=np.float64)
+    W = normalize_weight_matrix(weights)
+    if W.shape[1] != X.shape[1]:
+        raise ValueError(f"权重数量({W.shape[1]})与指标数量({X.shape[1]})不一致!")
+
+    scores = np.empty((W.shape[0], X.shape[0]))
+
+    def _block(b):
+        np.matmul(W, X[b].T, out=scores[:, b])
+
+    run_blocks(_block, row_blocks(X.shape[0], block_rows), workers)
+    return scores
+
+
+def rank_scores(scores):
+    """按得分从高到低计算各情景下的名次（从1开始）"""
+    S = np.atleast_2d(scores)
+    order = np.argsort(-S, axis=1, kind="stable")
+    ranks = np.empty_like(order)
+    np.put_along_axis(ranks, order, np.arange(1, S.shape[1] + 1), axis=1)
+    return ranks
+
+
+def top_k_indices(scores, k):
+    """返回各情景得分最高的k个方案下标，按得分从高到低排列"""
+    S = np.atleast_2d(scores)
+    k = min(k, S.shape[1])
+    if k < S.shape[1]:
+        idx = np.argpartition(-S, k - 1, axis=1)[:, :k]
+    else:
+        idx = np.tile(np.arange(S.shape[1]), (S.shape[0], 1))
+    top = np.take_along_axis(S, idx, axis=1)
+    return np.take_along_axis(idx, np.argsort(-top, axis=1, kind="stable"), axis=1)
+
+
+def _dense_ranks(S):
+    """逐行计算稠密秩，相同得分取相同秩"""
+    order = np.argsort(S, axis=1, kind="stable")
+    sorted_s = np.take_along_axis(S, order, axis=1)
+    is_new = np.ones(S.shape, dtype=bool)
+    is_new[:, 1:] = sorted_s[:, 1:] != sorted_s[:, :-1]
+    dense = np.empty(S.shape, dtype=np.int64)
+    np.put_along_axis(dense, order, np.cumsum(is_new, axis=1) - 1, axis=1)
+    return dense
+
+
+def _tied_pairs(is_new):
+    """根据分组起点标记计算每行中取值相同的样本对数量"""
+    idx = np.arange(is_new.shape[1])
+    first = np.maximum.accumulate(np.where(is_new, idx, 0), axis=1)
+    return np.sum(idx - first, axis=1)
+
+
+def _count_inversions(Y):
+    """逐行统计逆序对数量（自底向上归并，所有行同时处理）"""
+    P, n = Y.shape
+    size = 1
+    while size < n:
+        size *= 2
+
+    # 末尾用大于所有取值的数填充，不会引入逆序对
+    dtype = np.int32 if n < 2 ** 30 else np.int64
+    runs = np.full((P, size), n, dtype=dtype)
+    runs[:, :n] = Y
+    inversions = np.zeros(P, dtype=np.int64)
+
+    width = 1
+    while width < size:
+        n_blocks = size // (2 * width)
+
+        # 最低位标记左右段，取值相同时左段在前，排序即完成归并
+        keys = runs.reshape(P, n_blocks, 2, width) * 2
+        keys[:, :, 1, :] += 1
+        keys = np.sort(keys.reshape(P, n_blocks, 2 * width), axis=-1)
+        is_right = (keys & 1).astype(np.uint8)
+
+        # 位于位置p的第r个右段元素之前有 p-r 个左段元素不大于它，
+        # 其余左段元素与它构成逆序对，对r求和后只需右段元素位置之和
+        positions = np.arange(2 * width, dtype=np.int64)
+        right_positions = np.einsum("pbk,k->p", is_right, positions)
+        inversions += n_blocks * (width * width + width * (width - 1) // 2) - right_positions
+
+        runs = (keys >> 1).reshape(P, size)
+        width *= 2
+
+    return inversions
+
+
+def kendall_tau_matrix(scores):
+    """计算各情景得分之间两两的Kendall τ-b系数，返回 (情景, 情景) 矩阵"""
+    S = np.atleast_2d(np.asarray(scores, dtype=np.float64))
+    n_scenarios, n = S.shape
+    tau = np.eye(n_scenarios)
+    if n < 2:
+        return tau
+
+    ranks = _dense_ranks(S)
+    sorted_ranks = np.sort(ranks, axis=1)
+    is_new = np.ones(S.shape, dtype=bool)
+    is_new[:, 1:] = sorted_ranks[:, 1:] != sorted_ranks[:, :-1]
+    ties = _tied_pairs(is_new)
+    n0 = n * (n - 1) // 2
+
+    pairs_i, pairs_j = np.triu_indices(n_scenarios, k=1)
+    chunk = max(1, _TAU_CHUNK_ELEMENTS // n)
+    for start in range(0, len(pairs_i), chunk):
+        pi = pairs_i[start:start + chunk]
+        pj = pairs_j[start:start + chunk]
+        # 先按x再按y排序，y中的逆序对即为不一致对；秩为整数，
+        # 合成一个键排序即可代替lexsort
+        keys = np.sort(ranks[pi] * n + ranks[pj], axis=1)
+        Xs, Ys = np.divmod(keys, n)
+        discordant = _count_inversions(Ys)
+
+        joint_new = np.ones(Xs.shape, dtype=bool)
+        joint_new[:, 1:] = (Xs[:, 1:] != Xs[:, :-1]) | (Ys[:, 1:] != Ys[:, :-1])
+        joint_ties = _tied_pairs(joint_new)
+
+        n1 = ties[pi]
+        n2 = ties[pj]
+        concordant = n0 - n1 - n2 + joint_ties - discordant
+        denom = np.sqrt((n0 - n1).astype(np.float64) * (n0 - n2))
+        with np.errstate(invalid="ignore", divide="ignore"):
+            values = np.where(denom > 0, (concordant - discordant) / denom, np.nan)
+        tau[pi, pj] = values
+        tau[pj, pi] = values
+
+    return tau
+
+
+def kendall_w(scores):
+    """计算所有情景排名的Kendall协和系数W（不做结校正）"""
+    R = rank_scores(scores).astype(np.float64)
+    m, n = R.shape
+    if n < 2:
+        return np.nan
+    deviations = np.sum(R, axis=0) - m * (n + 1) / 2
+    return 12 * np.sum(deviations ** 2) / (m ** 2 * (n ** 3 - n))
+
+
+def score_scenarios(data, weights, scenario_names=None, alternative_names=None):
+    """多情景综合评分
+
+    返回 (得分表, 名次表, Kendall τ 矩阵)，得分表与名次表为 情景 × 方案。
+    """
+    scores = calculate_scores(data, weights)
+    n_scenarios, n_alternatives = scores.shape
+
+    if scenario_names is None:
+        scenario_names = [f"情景{i + 1}" for i in range(n_scenarios)]
+    if alternative_names is None:
+        alternative_names = [f"方案{i + 1}" for i in range(n_alternatives)]
+
+    score_df = pd.DataFrame(scores, index=scenario_names, columns=alternative_names)
+    rank_df = pd.DataFrame(rank_scores(scores), index=scenario_names, columns=alternative_names)
+    tau_df = pd.DataFrame(kendall_tau_matrix(scores), index=scenario_names, columns=scenario_names)
+    return score_df, rank_df, tau_df
@@ -0,0 +1,353 @@
+"""策略生成流水线
+
+输入各方案的标准化矩阵、指标权重和综合得分，找出每个方案与最优值加权差距最大的
+短板指标，再由可替换的后端生成策略文本：
+
+- TemplateBackend：规则/模板后端，按短板指标名称中的关键词匹配措施，离线可用；
+- LocalModelBackend：本地模型服务客户端，提示词按批发送到内网推理服务
+  （调试时可用 python -m service.model_stub 启动服务桩）。
+
+生成结果按 (后端配置, 方案输入) 的哈希缓存在本地SQLite中，重新生成报告时只为
+输入发生变化的方案调用后端。缓存文件默认为 ~/.green_town/strategy_cache.sqlite，
+可通过环境变量 GREEN_TOWN_STRATEGY_CACHE 指定。本模块不依赖Streamlit。
+"""
+import hashlib
+import json
+import os
+import sqlite3
+import urllib.request
+from contextlib import contextmanager
+from dataclasses import dataclass
+from datetime import datetime
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from utils.score_calculator import calculate_scores, rank_scores
+
+DEFAULT_CACHE_PATH = "~/.green_town/strategy_cache.sqlite"
+
+# 每个方案列出的短板指标数
+DEFAULT_WEAKEST = 3
+# 每批发送给后端的方案数
+DEFAULT_BATCH_SIZE = 32
+
+# 模板或提示词修改后递增，使旧的缓存结果失效
+TEMPLATE_VERSION = 1
+PROMPT_VERSION = 1
+
+# SQLite单条语句的参数数量上限
+_SQL_CHUNK = 500
+
+# 短板指标名称关键词 -> 措施
+DEFAULT_RULES = (
+    (("水", "灌溉"), "推广节水灌溉和水肥一体化，加强农田水利设施管护"),
+    (("土壤", "耕地", "化肥", "农药"), "实施测土配方施肥和化肥农药减量增效，推进耕地质量提升"),
+    (("碳", "排放", "能耗"), "推广秸秆综合利用和农机节能，探索农业碳汇项目开发与交易"),
+    (("收入", "增收", "工资"), "发展农产品精深加工和品牌营销，完善联农带农利益联结机制"),
+    (("旅游", "休闲", "文化"), "挖掘生态和农耕文化资源，发展休闲农业与乡村旅游"),
+    (("森林", "植被", "绿化", "生物"), "加强生态保护修复，提高植被覆盖度和生物多样性"),
+    (("产值", "产量", "规模"), "推进适度规模经营，提升良种、良法、良机配套水平"),
+    (("认证", "品牌", "绿色", "有机"), "扩大绿色、有机和地理标志农产品认证，建立产品溯源体系"),
+    (("投入", "资金", "金融"), "用好生态补偿和涉农资金，引导社会资本和绿色金融投入"),
+    (("人口", "劳动", "人才", "培训"), "加强高素质农民培训，引进农业科技和经营人才"),
+)
+DEFAULT_MEASURE = "对标该指标得分最高的方案，查明差距成因，制定分年度提升目标"
+
+TIER_ADVICE = {
+    "领先": "整体处于领先水平，应巩固优势，总结可复制推广的经验做法。",
+    "中等": "整体处于中游，应集中资源补齐关键短板，力争进入前列。",
+    "落后": "整体差距较大，建议优先解决以下短板，分阶段推进提升。",
+}
+
+
+@dataclass(frozen=True)
+class StrategyInput:
+    """一个方案的策略生成输入
+
+    weakest 为短板指标 ((指标, 标准化值, 权重, 加权差距), ...)，按加权差距从大到小排列。
+    """
+    alternative: str
+    score: float
+    rank: int
+    total: int
+    weakest: tuple
+
+    @property
+    def tier(self):
+        """按名次所在分位划分：前20%领先，20%~60%中等，其余落后"""
+        position = self.rank / self.total
+        if position <= 0.2:
+            return "领先"
+        if position <= 0.6:
+            return "中等"
+        return "落后"
+
+    def key_data(self):
+        """参与缓存哈希的内容（数值保留6位小数，避免浮点末位差异导致缓存失效）"""
+        return {
+            "alternative": self.alternative,
+            "score": round(self.score, 6),
+            "rank": self.rank,
+            "total": self.total,
+            "weakest": [[name, round(value, 6), round(weight, 6), round(gap, 6)]
+                        for name, value, weight, gap in self.weakest],
+        }
+
+
+def build_strategy_inputs(standardized, weights, scores=None, alternative_names=None,
+                          indicator_names=None, n_weakest=DEFAULT_WEAKEST):
+    """由标准化矩阵 (方案, 指标)、权重和得分构建各方案的策略输入
+
+    短板指标为加权差距 w_j·(max_i x_ij - x_ij) 最大的指标，所有方案一次向量化计算；
+    scores 为 None 时按权重加权求和计算综合得分。
+    """
+    X = np.asarray(standardized, dtype=np.float64)
+    w = np.asarray(weights, dtype=np.float64)
+    n, m = X.shape
+    if len(w) != m:
+        raise ValueError(f"权重数量({len(w)})与指标数量({m})不一致!")
+    if scores is None:
+        scores = calculate_scores(X, w)[0]
+    scores = np.asarray(scores, dtype=np.float64)
+    if len(scores) != n:
+        raise ValueError(f"得分数量({len(scores)})与方案数量({n})不一致!")
+    if alternative_names is None:
+        alternative_names = [f"方案{i + 1}" for i in range(n)]
+    if indicator_names is None:
+        indicator_names = [f"指标{j + 1}" for j in range(m)]
+
+    ranks = rank_scores(scores)[0]
+    gaps = (np.max(X, axis=0) - X) * w
+    k = min(n_weakest, m)
+    idx = np.argpartition(-gaps, k - 1, axis=1)[:, :k]
+    idx = np.take_along_axis(idx, np.argsort(-np.take_along_axis(gaps, idx, axis=1), axis=1, kind="stable"), axis=1)
+
+    return [
+        StrategyInput(
+            alternative=str(alternative_names[i]),
+            score=float(scores[i]),
+            rank=int(ranks[i]),
+            total=n,
+            weakest=tuple(
+                (str(indicator_names[j]), float(X[i, j]), float(w[j]), float(gaps[i, j]))
+                for j in idx[i]
+            )
+        )
+        for i in range(n)
+    ]
+
+
+def build_prompt(item):
+    """生成单个方案的提示词"""
+    lines = [
+        "你是农业生态产品价值实现领域的策略顾问。",
+        f"评价对象：{item.alternative}；综合得分 {item.score:.4f}，"
+        f"在 {item.total} 个评价对象中排名第 {item.rank}（{item.tier}）。",
+        "主要短板指标（按与最优值的加权差距从大到小）：",
+    ]
+    for i, (name, value, weight, gap) in enumerate(item.weakest, 1):
+        lines.append(f"{i}. {name}：标准化值 {value:.3f}，权重 {weight:.3f}，加权差距 {gap:.4f}")
+    lines.append("请针对上述短板提出3条具体、可操作的提升策略，每条不超过60字。")
+    return "\n".join(lines)
+
+
+class TemplateBackend:
+    """规则/模板后端：按名次分档给出总体判断，按关键词为每个短板指标匹配措施"""
+
+    name = "规则模板"
+
+    def __init__(self, rules=DEFAULT_RULES, default_measure=DEFAULT_MEASURE):
+        self.rules = rules
+        self.default_measure = default_measure
+
+    def config(self):
+        return {
+            "backend": "template",
+            "version": TEMPLATE_VERSION,
+            "rules": [[list(keywords), measure] for keywords, measure in self.rules],
+            "default": self.default_measure,
+        }
+
+    def measure(self, indicator):
+        for keywords, measure in self.rules:
+            if any(keyword in indicator for keyword in keywords):
+                return measure
+        return self.default_measure
+
+    def render(self, item):
+        lines = [
+            f"{item.alternative}综合得分 {item.score:.4f}，排名第 {item.rank}/{item.total}。"
+            + TIER_ADVICE[item.tier]
+        ]
+        for i, (name, value, weight, gap) in enumerate(item.weakest, 1):
+            lines.append(f"{i}. 补齐“{name}”短板（标准化值 {value:.3f}，加权差距 {gap:.4f}）：{self.measure(name)}。")
+        return "\n".join(lines)
+
+    def generate(self, items):
+        return [self.render(item) for item in items]
+
+
+class LocalModelBackend:
+    """本地模型服务客户端
+
+    每批方案的提示词在一次请求中发送：
+    POST endpoint {"model": ..., "prompts": [...], "max_tokens": ...}，
+    响应 {"outputs": [...]}，顺序与 prompts 一致。
+    """
+
+    name = "本地模型"
+    DEFAULT_ENDPOINT = "http://127.0.0.1:8766/generate"
+
+    def __init__(self, endpoint=DEFAULT_ENDPOINT, model="local", max_tokens=512, timeout=120):
+        self.endpoint = endpoint
+        self.model = model
+        self.max_tokens = max_tokens
+        self.timeout = timeout
+
+    def config(self):
+        # 服务地址不影响生成内容，不参与缓存哈希
+        return {"backend": "local_model", "model": self.model, "max_tokens": self.max_tokens, "prompt": PROMPT_VERSION}
+
+    def generate(self, items):
+        body = json.dumps({
+            "model": self.model,
+            "prompts": [build_prompt(item) for item in items],
+            "max_tokens": self.max_tokens,
+        }, ensure_ascii=False).encode("utf-8")
+        request = urllib.request.Request(
+            self.endpoint, data=body, headers={"Content-Type": "application/json"}, method="POST"
+        )
+        with urllib.request.urlopen(request, timeout=self.timeout) as response:
+            outputs = json.loads(response.read()).get("outputs")
+        if not isinstance(outputs, list) or len(outputs) != len(items):
+            raise ValueError("本地模型服务返回的结果数量与提示词数量不一致!")
+        return [str(text) for text in outputs]
+
+
+BACKENDS = {
+    TemplateBackend.name: TemplateBackend,
+    LocalModelBackend.name: LocalModelBackend,
+}
+
+
+class StrategyCache:
+    """策略文本缓存（SQLite），键为后端配置与方案输入的哈希"""
+
+    def __init__(self, path=None):
+        self.path = Path(path or DEFAULT_CACHE_PATH).expanduser()
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with self._connect() as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS strategies ("
+                "key TEXT PRIMARY KEY, backend TEXT, text TEXT NOT NULL, created_at TEXT)"
+            )
+
+    @contextmanager
+    def _connect(self):
+        conn = sqlite3.connect(self.path, timeout=30)
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    def get_many(self, keys):
+        """批量查询，返回 {键: 文本}（只含命中的键）"""
+        keys = list(keys)
+        found = {}
+        with self._connect() as conn:
+            for start in range(0, len(keys), _SQL_CHUNK):
+                chunk = keys[start:start + _SQL_CHUNK]
+                rows = conn.execute(
+                    f"SELECT key, text FROM strategies WHERE key IN ({','.join('?' * len(chunk))})", chunk
+                )
+                found.update(rows)
+        return found
+
+    def put_many(self, entries, backend):
+        """批量写入 [(键, 文本), ...]"""
+        created_at = datetime.now().isoformat(timespec="seconds")
+        with self._connect() as conn:
+            conn.executemany(
+                "INSERT OR REPLACE INTO strategies (key, backend, text, created_at) VALUES (?, ?, ?, ?)",
+                [(key, backend, text, created_at) for key, text in entries]
+            )
+
+    def count(self):
+        with self._connect() as conn:
+            return conn.execute("SELECT COUNT(*) FROM strategies").fetchone()[0]
+
+    def clear(self):
+        with self._connect() as conn:
+            conn.execute("DELETE FROM strategies")
+
+
+_caches = {}
+
+
+def get_cache():
+    """当前进程共用的策略缓存"""
+    path = os.environ.get("GREEN_TOWN_STRATEGY_CACHE") or DEFAULT_CACHE_PATH
+    if path not in _caches:
+        _caches[path] = StrategyCache(path)
+    return _caches[path]
+
+
+def strategy_key(backend, item):
+    """缓存键：后端配置与方案输入的SHA-256"""
+    payload = json.dumps({"backend": backend.config(), "input": item.key_data()}, ensure_ascii=False, sort_keys=True)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def generate_strategies(items, backend, cache=None, batch_size=DEFAULT_BATCH_SIZE, progress=None):
+    """为各方案生成策略文本，返回 (文本列表, 统计)
+
+    先批量查询缓存，未命中的方案（相同输入只生成一次）按 batch_size 分批交给后端，
+    每批完成后立即写入缓存，中途失败时已完成的批次不会丢失。
+    progress(已完成数, 待生成数) 在每批完成后调用。
+    """
+    keys = [strategy_key(backend, item) for item in items]
+    cached = cache.get_many(set(keys)) if cache is not None else {}
+    texts = [cached.get(key) for key in keys]
+
+    pending = {}
+    for i, key in enumerate(keys):
+        if texts[i] is None:
+            pending.setdefault(key, []).append(i)
+    todo = list(pending)
+
+    n_batches = 0
+    for start in range(0, len(todo), batch_size):
+        batch = todo[start:start + batch_size]
+        outputs = backend.generate([items[pending[key][0]] for key in batch])
+        for key, text in zip(batch, outputs):
+            for i in pending[key]:
+                texts[i] = text
+        if cache is not None:
+            cache.put_many(zip(batch, outputs), backend.name)
+        n_batches += 1
+        if progress is not None:
+            progress(min(start + batch_size, len(todo)), len(todo))
+
+    stats = {
+        "方案数": len(items),
+        "缓存命中": sum(key in cached for key in keys),
+        "新生成": len(todo),
+        "批次数": n_batches,
+    }
+    return texts, stats
+
+
+def strategy_table(items, texts):
+    """整理策略结果表（按名次排列）"""
+    df = pd.DataFrame({
+        "方案": [item.alternative for item in items],
+        "综合得分": [item.score for item in items],
+        "名次": [item.rank for item in items],
+        "分档": [item.tier for item in items],
+        "短板指标": ["、".join(name for name, *_ in item.weakest) for item in items],
+        "策略建议": texts,
+    })
+    return df.sort_values("名次", kind="stable").reset_index(drop=True)
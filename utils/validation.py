@@ -0,0 +1,147 @@
+import warnings
+
+import numpy as np
+import pandas as pd
+
+from utils.ahp_calculator import reciprocal_mask
+
+ISSUE_COLUMNS = ["级别", "单元格", "行", "列", "问题", "值"]
+
+IMPUTE_STRATEGIES = ["均值填充", "中位数填充", "零值填充"]
+
+
+def excel_column_name(index):
+    """将从0开始的列序号转换为Excel列名（0 -> A）"""
+    name = ""
+    index += 1
+    while index:
+        index, rem = divmod(index - 1, 26)
+        name = chr(ord("A") + rem) + name
+    return name
+
+
+def _cell_issues(mask, frame, level, message, row_offset, col_offset):
+    """将布尔掩码中所有为真的单元格整理为问题记录"""
+    rows, cols = np.nonzero(mask)
+    return pd.DataFrame({
+        "级别": level,
+        "单元格": [f"{excel_column_name(c + col_offset)}{r + row_offset + 1}" for r, c in zip(rows, cols)],
+        "行": rows + row_offset + 1,
+        "列": frame.columns.values[cols],
+        "问题": message,
+        "值": frame.values[rows, cols]
+    }, columns=ISSUE_COLUMNS)
+
+
+def _column_issues(mask, frame, level, message, values, col_offset):
+    """将列级问题整理为问题记录"""
+    cols = np.flatnonzero(mask)
+    return pd.DataFrame({
+        "级别": level,
+        "单元格": [excel_column_name(c + col_offset) for c in cols],
+        "行": None,
+        "列": frame.columns.values[cols],
+        "问题": message,
+        "值": np.asarray(values)[cols]
+    }, columns=ISSUE_COLUMNS)
+
+
+def _concat_issues(parts):
+    """合并问题记录"""
+    parts = [part for part in parts if len(part)]
+    if not parts:
+        return pd.DataFrame(columns=ISSUE_COLUMNS)
+    return pd.concat(parts, ignore_index=True)
+
+
+def validate_numeric_frame(df, row_offset=0, col_offset=0, check_constant=True, check_positive_sums=False):
+    """一次性检查数据表中的所有问题
+
+    row_offset、col_offset 为数据区域左上角在Excel中的位置（从0开始），
+    用于给出准确的单元格坐标，问题表中的“行”为Excel行号（从1开始）。返回 (数值化后的数据表, 问题表)；
+    缺失值和非数值单元格在数值化后的数据表中均为 NaN。
+    """
+    numeric = df.apply(pd.to_numeric, errors="coerce")
+    missing = df.isna().values
+    non_numeric = numeric.isna().values & ~missing
+    parts = [
+        _cell_issues(non_numeric, df, "错误", "非数值", row_offset, col_offset),
+        _cell_issues(missing, df, "错误", "缺失值", row_offset, col_offset),
+    ]
+
+    values = numeric.to_numpy(dtype=np.float64)
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore", RuntimeWarning)
+        col_min = np.nanmin(values, axis=0) if values.size else np.array([])
+        col_max = np.nanmax(values, axis=0) if values.size else np.array([])
+
+    if check_constant:
+        constant = col_min == col_max
+        parts.append(_column_issues(constant, df, "警告", "常数列（所有值相同）", col_min, col_offset))
+
+    if check_positive_sums:
+        col_sums = np.nansum(values, axis=0)
+        parts.append(_column_issues(col_sums <= 0, df, "错误", "列和为0或负数", col_sums, col_offset))
+
+    return numeric, _concat_issues(parts)
+
+
+def validate_ahp_matrices(matrices, names=None, atol=1e-5):
+    """批量检查判断矩阵：非正数、对角线不为1、不满足互反性
+
+    matrices 形状为 (n, n) 或 (k, n, n)，返回问题表（单元格坐标按矩阵位于A1计算）。
+    """
+    A = np.asarray(matrices, dtype=np.float64)
+    if A.ndim == 2:
+        A = A[np.newaxis]
+    k, n, _ = A.shape
+    if names is None:
+        names = [f"矩阵{i + 1}" for i in range(k)]
+    names = np.asarray(names, dtype=object)
+
+    checks = [
+        ("错误", "判断值必须为正数", A <= 0),
+        ("错误", "对角线元素必须为1", np.eye(n, dtype=bool) & ~np.isclose(A, 1.0)),
+        ("错误", "不满足互反性 a_ij = 1/a_ji", reciprocal_mask(A, atol=atol)),
+    ]
+
+    parts = []
+    for level, message, mask in checks:
+        m_idx, rows, cols = np.nonzero(mask)
+        parts.append(pd.DataFrame({
+            "级别": level,
+            "矩阵": names[m_idx],
+            "单元格": [f"{excel_column_name(c)}{r + 1}" for r, c in zip(rows, cols)],
+            "行": rows + 1,
+            "列": cols + 1,
+            "问题": message,
+            "值": A[m_idx, rows, cols]
+        }))
+
+    parts = [part for part in parts if len(part)]
+    if not parts:
+        return pd.DataFrame(columns=["级别", "矩阵"] + ISSUE_COLUMNS[1:])
+    return pd.concat(parts, ignore_index=True)
+
+
+def has_errors(issues):
+    """问题表中是否存在错误级别的问题"""
+    return bool(len(issues)) and bool((issues["级别"] == "错误").any())
+
+
+def impute_missing(df, strategy="均值填充"):
+    """按列填充缺失值（NaN），所有列一次向量化计算"""
+    values = df.to_numpy(dtype=np.float64)
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore", RuntimeWarning)
+        if strategy == "均值填充":
+            fill = np.nanmean(values, axis=0)
+        elif strategy == "中位数填充":
+            fill = np.nanmedian(values, axis=0)
+        elif strategy == "零值填充":
+            fill = np.zeros(values.shape[1])
+        else:
+            raise ValueError(f"未知的缺失值处理方式: {strategy}")
+
+    filled = np.where(np.isnan(values), fill, values)
+    return pd.DataFrame(filled, index=df.index, columns=df.columns)
@@ -0,0 +1,106 @@
+"""启动预热
+
+Streamlit服务进程内所有会话共用已导入的模块。应用首次打开时，start_prewarm()
+在后台线程中导入计算核心以及页面首次计算时才用到的依赖（openpyxl、pyarrow、
+表格样式模板等），并以小数据运行一次各计算内核和Excel读写，用户进入分析页面时
+这些开销已经完成。本模块只依赖标准库，导入开销可忽略，不会拖慢首页显示。
+"""
+import importlib
+import json
+import logging
+import threading
+import time
+
+import utils
+
+logger = logging.getLogger("green_town.warmup")
+
+# 计算核心之外，页面首次读写文件、显示表格时才导入的依赖
+EXTRA_MODULES = (
+    "openpyxl",
+    "pyarrow",
+    "pandas.io.formats.style",
+)
+
+_lock = threading.Lock()
+_thread = None
+_timings = {}
+_done = threading.Event()
+
+
+def _exercise_kernels():
+    """以小数据运行一次各计算内核、Excel和Parquet读写及表格样式渲染"""
+    import io
+
+    import numpy as np
+    import pandas as pd
+
+    from utils import ahp_calculator as ahp
+    from utils import combination_calculator, ewm_calculator, fuzzy_ahp, score_calculator
+
+    A = np.array([[1, 2, 4], [1 / 2, 1, 2], [1 / 4, 1 / 2, 1]])
+    w = ahp.calculate_weights_geometric(A)
+    ahp.calculate_consistency(A, w)
+    fuzzy_ahp.calculate_fuzzy_ahp(np.stack([A / 2, A, A * 2], axis=-1))
+
+    X = np.arange(1.0, 16.0).reshape(5, 3) ** 1.5
+    standardized = ewm_calculator.standardize_data(X, ["max", "min", "max"])
+    weights = ewm_calculator.calculate_entropy_weights(standardized)[2]
+    ewm_calculator.calculate_topsis(standardized, weights)
+    scores = score_calculator.calculate_scores(standardized, np.vstack([weights, weights[::-1]]))
+    score_calculator.kendall_tau_matrix(scores)
+    for method in combination_calculator.COMBINATION_METHODS:
+        combination_calculator.combine_weights(np.column_stack([weights, weights[::-1]]), method)
+
+    df = pd.DataFrame(X, columns=["a", "b", "c"])
+    buffer = io.BytesIO()
+    df.to_excel(buffer, index=False, engine="openpyxl")
+    pd.read_excel(io.BytesIO(buffer.getvalue()))
+    df.to_parquet(io.BytesIO())
+    df.style.format("{:.4f}").to_html()
+    pd.util.hash_pandas_object(df, index=False)
+
+
+def prewarm():
+    """在当前线程中完成预热，返回各步骤耗时（秒）"""
+    timings = {}
+    names = [f"utils.{name}" for name in utils.CORE_MODULES + utils.UI_MODULES] + list(EXTRA_MODULES)
+    for name in names:
+        start = time.perf_counter()
+        try:
+            importlib.import_module(name)
+        except ImportError as e:
+            # 可选依赖缺失时跳过，页面用到时再报错
+            logger.info("预热跳过 %s: %s", name, e)
+            continue
+        timings[name] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    _exercise_kernels()
+    timings["计算内核"] = time.perf_counter() - start
+    return timings
+
+
+def _run():
+    try:
+        _timings.update(prewarm())
+        logger.info("预热完成: %s", json.dumps(_timings, ensure_ascii=False))
+    except Exception:
+        logger.exception("预热失败")
+    finally:
+        _done.set()
+
+
+def start_prewarm():
+    """在后台线程中预热，每个进程只启动一次，返回线程对象"""
+    global _thread
+    with _lock:
+        if _thread is None:
+            _thread = threading.Thread(target=_run, name="core-prewarm", daemon=True)
+            _thread.start()
+    return _thread
+
+
+def prewarm_status():
+    """返回 (预热是否完成, 各步骤耗时)"""
+    return _done.is_set(), dict(_timings)